@@ -10,11 +10,17 @@ from app.settings import settings
 from app.db import Base
 from app.properties.models import Properties
 from app.reservations.models import Reservations
+from app.jobs.models import Job
+from app.idempotency.models import IdempotencyKey
 
 
-# Config Alembic
+# Config Alembic; quem chama pela API pode indicar outro banco (ex.: testes)
 config = context.config
-config.set_main_option('sqlalchemy.url', settings.DATABASE_URL)
+# (o configparser interpreta "%", presente em URLs codificadas)
+config.set_main_option(
+    'sqlalchemy.url',
+    config.attributes.get('database_url', settings.DATABASE_URL)
+    .replace('%', '%%'))
 
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
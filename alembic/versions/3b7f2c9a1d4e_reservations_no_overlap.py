@@ -0,0 +1,36 @@
+"""reservations no overlap
+
+Revision ID: 3b7f2c9a1d4e
+Revises: 99fc782d7e21
+Create Date: 2025-08-26 10:12:31.408215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7f2c9a1d4e'
+down_revision: Union[str, Sequence[str], None] = '99fc782d7e21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # btree_gist permite usar o operador = em colunas inteiras num índice GiST
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+
+    # Garante no banco que não existam reservas sobrepostas por propriedade
+    op.execute(
+        "ALTER TABLE reservations ADD CONSTRAINT reservations_no_overlap "
+        "EXCLUDE USING gist ("
+        "property_id WITH =, daterange(start_date, end_date) WITH &&)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('reservations_no_overlap', 'reservations')
@@ -0,0 +1,54 @@
+"""property calendar
+
+Revision ID: 4a6c1f0e9b83
+Revises: e7a90d3b5c12
+Create Date: 2025-09-03 10:12:47.503918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4a6c1f0e9b83'
+down_revision: Union[str, Sequence[str], None] = 'e7a90d3b5c12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'property_calendar',
+        sa.Column('property_id', sa.Integer(), nullable=False),
+        sa.Column('night', sa.Date(), nullable=False),
+        sa.Column('reservation_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['property_id'],
+                                ['properties.property_id']),
+        sa.ForeignKeyConstraint(['reservation_id'],
+                                ['reservations.reservation_id'],
+                                ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('property_id', 'night'),
+    )
+    op.create_index(
+        'ix_property_calendar_reservation_id',
+        'property_calendar',
+        ['reservation_id'],
+    )
+    # Preenche o calendário com as reservas existentes
+    op.execute(
+        "INSERT INTO property_calendar (property_id, night, reservation_id) "
+        "SELECT r.property_id, night::date, r.reservation_id "
+        "FROM reservations r "
+        "CROSS JOIN generate_series(r.start_date, r.end_date - 1, "
+        "interval '1 day') AS night"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_property_calendar_reservation_id',
+                  table_name='property_calendar')
+    op.drop_table('property_calendar')
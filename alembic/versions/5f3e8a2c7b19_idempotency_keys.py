@@ -0,0 +1,43 @@
+"""idempotency keys
+
+Revision ID: 5f3e8a2c7b19
+Revises: d2f47a91c6e5
+Create Date: 2025-09-12 16:42:07.519310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f3e8a2c7b19'
+down_revision: Union[str, Sequence[str], None] = 'd2f47a91c6e5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'idempotency_keys',
+        sa.Column('scope', sa.String(length=50), nullable=False),
+        sa.Column('key', sa.String(length=255), nullable=False),
+        sa.Column('request_hash', sa.LargeBinary(), nullable=False),
+        sa.Column('status_code', sa.SmallInteger(), nullable=True),
+        sa.Column('response', sa.LargeBinary(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('scope', 'key'),
+    )
+    # Limpeza das chaves expiradas pelo worker
+    op.create_index('ix_idempotency_keys_created_at', 'idempotency_keys',
+                    ['created_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_idempotency_keys_created_at',
+                  table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
@@ -0,0 +1,48 @@
+"""reservations indexes
+
+Revision ID: 8d41e6b0c2f7
+Revises: 3b7f2c9a1d4e
+Create Date: 2025-08-27 09:41:03.117482
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d41e6b0c2f7'
+down_revision: Union[str, Sequence[str], None] = '3b7f2c9a1d4e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Reservas por propriedade e verificação de sobreposição
+    op.create_index(
+        'ix_reservations_property_dates',
+        'reservations',
+        ['property_id', 'start_date', 'end_date'],
+    )
+    # Busca de disponibilidade por intervalo de datas (operador &&)
+    op.create_index(
+        'ix_reservations_daterange',
+        'reservations',
+        [sa.text('daterange(start_date, end_date)')],
+        postgresql_using='gist',
+    )
+    # Reservas por e-mail do cliente
+    op.create_index(
+        'ix_reservations_client_email',
+        'reservations',
+        ['client_email'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_reservations_client_email', table_name='reservations')
+    op.drop_index('ix_reservations_daterange', table_name='reservations')
+    op.drop_index('ix_reservations_property_dates', table_name='reservations')
@@ -0,0 +1,35 @@
+"""properties version
+
+Revision ID: a83d1f6c4e20
+Revises: 5f3e8a2c7b19
+Create Date: 2025-09-15 10:18:33.902144
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a83d1f6c4e20'
+down_revision: Union[str, Sequence[str], None] = '5f3e8a2c7b19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # ETag (version) e Last-Modified (updated_at) das leituras; defaults
+    # constantes por linha, sem reescrever a tabela
+    op.add_column('properties', sa.Column(
+        'version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('properties', sa.Column(
+        'updated_at', sa.DateTime(timezone=True),
+        server_default=sa.text('now()'), nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('properties', 'updated_at')
+    op.drop_column('properties', 'version')
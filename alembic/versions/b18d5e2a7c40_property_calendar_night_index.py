@@ -0,0 +1,35 @@
+"""property calendar night index
+
+Revision ID: b18d5e2a7c40
+Revises: 4a6c1f0e9b83
+Create Date: 2025-09-05 15:27:09.884120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b18d5e2a7c40'
+down_revision: Union[str, Sequence[str], None] = '4a6c1f0e9b83'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Busca de disponibilidade: noites ocupadas de todas as propriedades
+    # em um intervalo, sem varrer o calendário inteiro
+    op.create_index(
+        'ix_property_calendar_night',
+        'property_calendar',
+        ['night', 'property_id'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_property_calendar_night',
+                  table_name='property_calendar')
@@ -0,0 +1,33 @@
+"""properties price index
+
+Revision ID: c52a8e17f93b
+Revises: 8d41e6b0c2f7
+Create Date: 2025-08-27 15:22:48.530917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c52a8e17f93b'
+down_revision: Union[str, Sequence[str], None] = '8d41e6b0c2f7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Paginação por keyset ordenada por preço (desempate pelo ID)
+    op.create_index(
+        'ix_properties_price_id',
+        'properties',
+        ['price_per_night', 'property_id'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_properties_price_id', table_name='properties')
@@ -0,0 +1,60 @@
+"""jobs
+
+Revision ID: d2f47a91c6e5
+Revises: b18d5e2a7c40
+Create Date: 2025-09-09 11:05:38.271640
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f47a91c6e5'
+down_revision: Union[str, Sequence[str], None] = 'b18d5e2a7c40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'jobs',
+        sa.Column('job_id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('kind', sa.String(length=100), nullable=False),
+        sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()),
+                  server_default=sa.text("'{}'::jsonb"), nullable=False),
+        sa.Column('status', sa.String(length=20),
+                  server_default='queued', nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0',
+                  nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('run_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()'), nullable=False),
+        sa.Column('locked_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('result', postgresql.JSONB(astext_type=sa.Text()),
+                  nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()'), nullable=False),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('job_id'),
+    )
+    # Fila: só os jobs aguardando execução, na ordem de run_at
+    op.create_index(
+        'ix_jobs_queued_run_at',
+        'jobs',
+        ['run_at', 'job_id'],
+        postgresql_where=sa.text("status = 'queued'"),
+    )
+    op.create_index('ix_jobs_status_kind', 'jobs', ['status', 'kind'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_jobs_status_kind', table_name='jobs')
+    op.drop_index('ix_jobs_queued_run_at', table_name='jobs')
+    op.drop_table('jobs')
@@ -0,0 +1,79 @@
+"""properties search
+
+Revision ID: e7a90d3b5c12
+Revises: c52a8e17f93b
+Create Date: 2025-08-28 11:05:19.274660
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a90d3b5c12'
+down_revision: Union[str, Sequence[str], None] = 'c52a8e17f93b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('pt_unaccent', title), 'A') || "
+    "setweight(to_tsvector('pt_unaccent', address_neighborhood || ' ' "
+    "|| address_city || ' ' || address_state), 'B') || "
+    "setweight(to_tsvector('pt_unaccent', address_street), 'C')"
+)
+
+TRIGRAM_COLUMNS = [
+    'address_street',
+    'address_neighborhood',
+    'address_city',
+    'address_state',
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+
+    # Português sem acentos: "Sao Paulo" encontra "São Paulo" e vice-versa
+    op.execute(
+        "CREATE TEXT SEARCH CONFIGURATION pt_unaccent (COPY = portuguese)")
+    op.execute(
+        "ALTER TEXT SEARCH CONFIGURATION pt_unaccent "
+        "ALTER MAPPING FOR hword, hword_part, word "
+        "WITH unaccent, portuguese_stem")
+
+    op.add_column('properties', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(SEARCH_VECTOR, persisted=True),
+        nullable=True,
+    ))
+    op.create_index(
+        'ix_properties_search_vector',
+        'properties',
+        ['search_vector'],
+        postgresql_using='gin',
+    )
+
+    # Filtros ILIKE '%...%' de localização passam a usar índice
+    for column in TRIGRAM_COLUMNS:
+        op.create_index(
+            f'ix_properties_{column}_trgm',
+            'properties',
+            [column],
+            postgresql_using='gin',
+            postgresql_ops={column: 'gin_trgm_ops'},
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in reversed(TRIGRAM_COLUMNS):
+        op.drop_index(f'ix_properties_{column}_trgm', table_name='properties')
+    op.drop_index('ix_properties_search_vector', table_name='properties')
+    op.drop_column('properties', 'search_vector')
+    op.execute("DROP TEXT SEARCH CONFIGURATION pt_unaccent")
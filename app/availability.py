@@ -0,0 +1,386 @@
+"""
+Motor de disponibilidade em memória (opcional, AVAILABILITY_ENGINE=numpy).
+Mantém em arrays NumPy a capacidade, o preço e um bitset de ocupação por
+propriedade, cobrindo um horizonte móvel a partir da data da carga, e
+responde à busca de disponibilidade com filtros de preço e capacidade por
+operações vetorizadas. Consultas fora do horizonte ou com filtros de texto
+seguem pelo caminho SQL.
+"""
+import asyncio
+import logging
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Optional
+
+try:
+    import numpy as np
+except ImportError:  # dependência opcional, apenas para AVAILABILITY_ENGINE=numpy
+    np = None
+
+from sqlalchemy import text
+from . import cache
+from .db import AsyncSessionLocal
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+PROPERTIES_SQL = (
+    "SELECT property_id, capacity, (price_per_night * 100)::bigint "
+    "FROM properties "
+)
+NIGHTS_SQL = (
+    "SELECT property_id, night - CAST(:origin AS date) "
+    "FROM property_calendar "
+    "WHERE night >= :origin AND night < :end "
+)
+# Nomes de cache cuja invalidação altera o estado de uma propriedade
+WATCHED_NAMESPACES = ("availability", "property")
+
+
+def _cents(value) -> int:
+    """Converte um preço em centavos (o preço é Numeric(10, 2))."""
+    return int(Decimal(str(value)) * 100)
+
+
+class AvailabilityIndex:
+    """
+    Índice de disponibilidade de todas as propriedades.
+    Linhas ordenadas por property_id; a ocupação é uma matriz de bits
+    (uma linha por propriedade, um bit por noite desde origin).
+    As operações síncronas não fazem await, então são atômicas entre
+    corrotinas; cargas do banco são serializadas por um lock.
+    """
+
+    def __init__(self, horizon_days: int):
+        self.horizon_days = horizon_days
+        self.nbytes = (horizon_days + 7) // 8
+        self.origin: Optional[date] = None
+        self.ids = np.empty(0, np.int64)
+        self.capacity = np.empty(0, np.int64)
+        self.price = np.empty(0, np.int64)
+        self.active = np.empty(0, bool)
+        self.occupancy = np.empty((0, self.nbytes), np.uint8)
+        self.by_price = np.empty(0, np.int64)
+        # Propriedades alteradas por este ou outros workers, a recarregar
+        self.dirty: set[int] = set()
+        self._lock = asyncio.Lock()
+        self.load_seconds = 0.0
+        self.queries = 0
+        self.fallbacks = 0
+        self.refreshes = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self.origin is not None
+
+    def replace(self, origin: date, ids, capacity, price,
+                night_ids, night_offsets) -> None:
+        """
+        Substitui todo o estado do índice.
+        Args:
+            origin: Data do primeiro bit de ocupação.
+            ids, capacity, price: Arrays das propriedades (preço em
+                centavos).
+            night_ids, night_offsets: Noites ocupadas (property_id e dias
+                desde origin), já limitadas ao horizonte.
+        """
+        order = np.argsort(ids, kind="stable")
+        ids = np.asarray(ids, np.int64)[order]
+        occupancy = np.zeros((len(ids), self.nbytes), np.uint8)
+        self._set_bits(occupancy, ids, night_ids, night_offsets)
+        self.origin = origin
+        self.ids = ids
+        self.capacity = np.asarray(capacity, np.int64)[order]
+        self.price = np.asarray(price, np.int64)[order]
+        self.active = np.ones(len(ids), bool)
+        self.occupancy = occupancy
+        self._sort_by_price()
+
+    def upsert(self, ids, capacity, price, night_ids, night_offsets,
+               requested) -> None:
+        """
+        Atualiza algumas propriedades a partir de dados recém-lidos.
+        Args:
+            ids, capacity, price: Propriedades encontradas no banco.
+            night_ids, night_offsets: Noites ocupadas dessas propriedades.
+            requested: IDs pedidos; os ausentes do banco foram removidos.
+        """
+        ids = np.asarray(ids, np.int64)
+        new = ~np.isin(ids, self.ids)
+        if new.any():
+            count = int(new.sum())
+            merged = np.concatenate([self.ids, ids[new]])
+            order = np.argsort(merged, kind="stable")
+            self.ids = merged[order]
+            self.capacity = np.concatenate(
+                [self.capacity, np.zeros(count, np.int64)])[order]
+            self.price = np.concatenate(
+                [self.price, np.zeros(count, np.int64)])[order]
+            self.active = np.concatenate(
+                [self.active, np.zeros(count, bool)])[order]
+            self.occupancy = np.concatenate(
+                [self.occupancy, np.zeros((count, self.nbytes), np.uint8)]
+            )[order]
+
+        removed = self._rows(np.asarray(requested, np.int64))
+        self.active[removed] = False
+        self.occupancy[removed] = 0
+        rows = self._rows(ids)
+        self.capacity[rows] = np.asarray(capacity, np.int64)
+        self.price[rows] = np.asarray(price, np.int64)
+        self.active[rows] = True
+        self._set_bits(self.occupancy, self.ids, night_ids, night_offsets)
+        self._sort_by_price()
+
+    def mark(self, property_id: int, start_date: date, end_date: date,
+             booked: bool) -> None:
+        """
+        Marca noites [start_date, end_date) como ocupadas ou livres.
+        Propriedades desconhecidas ficam pendentes de recarga.
+        """
+        if not self.loaded:
+            return
+        rows = self._rows(np.array([property_id], np.int64))
+        if not len(rows):
+            self.dirty.add(property_id)
+            return
+        first = max((start_date - self.origin).days, 0)
+        last = min((end_date - self.origin).days, self.horizon_days)
+        if first >= last:
+            return
+        bits = np.unpackbits(self.occupancy[rows[0]], bitorder="little")
+        bits[first:last] = booked
+        self.occupancy[rows[0]] = np.packbits(bits, bitorder="little")
+
+    def find(self, start_date: date, end_date: date,
+             max_price: Optional[float] = None,
+             min_capacity: Optional[int] = None,
+             sort: str = "property_id",
+             after: Optional[list] = None,
+             limit: Optional[int] = None) -> Optional[list[int]]:
+        """
+        Busca propriedades livres em [start_date, end_date).
+        Mesma semântica de filtros e paginação de get_available_properties.
+        Returns:
+            IDs na ordem de sort, ou None se o intervalo sair do horizonte.
+        """
+        if not self.loaded:
+            return None
+        first = (start_date - self.origin).days
+        last = (end_date - self.origin).days
+        if first < 0 or last > self.horizon_days or first >= last:
+            return None
+        low, high = first >> 3, ((last - 1) >> 3) + 1
+        window = np.zeros(self.nbytes * 8, bool)
+        window[first:last] = True
+        window = np.packbits(window, bitorder="little")[low:high]
+
+        free = self.active & ~(self.occupancy[:, low:high] & window).any(axis=1)
+        if min_capacity:
+            free &= self.capacity >= min_capacity
+        if max_price:
+            free &= self.price <= _cents(max_price)
+
+        if sort == "price_per_night":
+            if after is not None:
+                price, property_id = _cents(after[0]), after[1]
+                free &= (self.price > price) | (
+                    (self.price == price) & (self.ids > property_id))
+            rows = self.by_price[free[self.by_price]]
+        else:
+            if after is not None:
+                free &= self.ids > after[0]
+            rows = np.flatnonzero(free)
+        if limit is not None:
+            rows = rows[:limit]
+        return self.ids[rows].tolist()
+
+    def on_invalidate(self, name: str) -> None:
+        """Ouvinte das invalidações de cache de todos os workers."""
+        namespace, _, ident = name.partition(":")
+        if namespace in WATCHED_NAMESPACES and ident.isdigit():
+            self.dirty.add(int(ident))
+
+    async def load(self) -> None:
+        """
+        Carrega todas as propriedades e noites ocupadas do banco primário.
+        O horizonte passa a começar na data de hoje.
+        """
+        async with self._lock:
+            started = time.perf_counter()
+            origin = date.today()
+            self.dirty.clear()
+            properties, nights = await self._fetch(origin)
+            self.replace(origin, *properties, *nights)
+            self.load_seconds = time.perf_counter() - started
+        logger.info("availability index loaded: %d properties in %.2fs",
+                    len(self.ids), self.load_seconds)
+
+    async def refresh(self) -> None:
+        """Recarrega do banco primário as propriedades pendentes."""
+        if not self.dirty or not self.loaded:
+            return
+        async with self._lock:
+            if not self.dirty:
+                return
+            requested = sorted(self.dirty)
+            self.dirty.clear()
+            properties, nights = await self._fetch(self.origin, requested)
+            self.upsert(*properties, *nights, requested)
+            self.refreshes += 1
+
+    async def _fetch(self, origin: date, property_ids=None):
+        properties_sql, nights_sql = PROPERTIES_SQL, NIGHTS_SQL
+        params = {"origin": origin,
+                  "end": origin + timedelta(days=self.horizon_days)}
+        if property_ids is not None:
+            properties_sql += "WHERE property_id = ANY(CAST(:ids AS integer[]))"
+            nights_sql += "AND property_id = ANY(CAST(:ids AS integer[]))"
+            params["ids"] = property_ids
+        async with AsyncSessionLocal() as db:
+            properties = (await db.execute(text(properties_sql), params)).all()
+            nights = (await db.execute(text(nights_sql), params)).all()
+        return (
+            tuple(np.array(column, np.int64)
+                  for column in zip(*properties)) or _empty(3),
+            tuple(np.array(column, np.int64)
+                  for column in zip(*nights)) or _empty(2),
+        )
+
+    def _rows(self, property_ids):
+        positions = np.searchsorted(self.ids, property_ids)
+        positions = positions[positions < len(self.ids)]
+        return positions[np.isin(self.ids[positions], property_ids)]
+
+    def _set_bits(self, occupancy, ids, night_ids, night_offsets) -> None:
+        night_ids = np.asarray(night_ids, np.int64)
+        offsets = np.asarray(night_offsets, np.int64)
+        rows = np.searchsorted(ids, night_ids)
+        known = rows < len(ids)
+        known[known] = ids[rows[known]] == night_ids[known]
+        rows, offsets = rows[known], offsets[known]
+        np.bitwise_or.at(occupancy, (rows, offsets >> 3),
+                         (1 << (offsets & 7)).astype(np.uint8))
+
+    def _sort_by_price(self) -> None:
+        self.by_price = np.lexsort((self.ids, self.price))
+
+    def stats(self) -> dict:
+        """
+        Retorna o estado e os contadores do índice.
+        Returns:
+            Dicionário com tamanho, horizonte, tempos e contadores.
+        """
+        return {
+            "enabled": True,
+            "loaded": self.loaded,
+            "properties": int(self.active.sum()),
+            "origin": self.origin,
+            "horizon_days": self.horizon_days,
+            "memory_bytes": sum(int(array.nbytes) for array in (
+                self.ids, self.capacity, self.price, self.active,
+                self.occupancy, self.by_price)),
+            "load_seconds": self.load_seconds,
+            "queries": self.queries,
+            "fallbacks": self.fallbacks,
+            "refreshes": self.refreshes,
+            "pending": len(self.dirty),
+        }
+
+
+def _empty(columns: int):
+    return tuple(np.empty(0, np.int64) for _ in range(columns))
+
+
+def create_index() -> Optional[AvailabilityIndex]:
+    """
+    Cria o índice se AVAILABILITY_ENGINE for "numpy".
+    Returns:
+        Instância de AvailabilityIndex ou None (caminho SQL).
+    """
+    if settings.AVAILABILITY_ENGINE != "numpy":
+        return None
+    if np is None:
+        raise RuntimeError("AVAILABILITY_ENGINE=numpy requires numpy")
+    index_ = AvailabilityIndex(settings.AVAILABILITY_HORIZON_DAYS)
+    cache.backend.add_listener(index_.on_invalidate)
+    return index_
+
+
+index = create_index()
+_reload_task: Optional[asyncio.Task] = None
+
+
+async def _reload_periodically() -> None:
+    while True:
+        await asyncio.sleep(settings.AVAILABILITY_RELOAD_SECONDS)
+        try:
+            await index.load()
+        except Exception:
+            logger.exception("availability index reload failed")
+
+
+async def start() -> None:
+    """
+    Carrega o índice e agenda as recargas completas, que avançam o
+    horizonte e incluem propriedades criadas por outros workers.
+    """
+    global _reload_task
+    if index is None:
+        return
+    await index.load()
+    if settings.AVAILABILITY_RELOAD_SECONDS > 0:
+        _reload_task = asyncio.create_task(_reload_periodically())
+
+
+async def close() -> None:
+    """Interrompe as recargas periódicas."""
+    global _reload_task
+    if _reload_task:
+        _reload_task.cancel()
+        try:
+            await _reload_task
+        except asyncio.CancelledError:
+            pass
+        _reload_task = None
+
+
+async def find_available(start_date: date, end_date: date,
+                         **filters) -> Optional[list[int]]:
+    """
+    Busca propriedades livres no índice, recarregando antes as pendentes.
+    Args:
+        start_date: Data inicial.
+        end_date: Data final.
+        filters: max_price, min_capacity, sort, after e limit.
+    Returns:
+        IDs das propriedades livres, ou None para usar o caminho SQL.
+    """
+    if index is None:
+        return None
+    await index.refresh()
+    ids = index.find(start_date, end_date, **filters)
+    if ids is None:
+        index.fallbacks += 1
+    else:
+        index.queries += 1
+    return ids
+
+
+def booked(property_id: int, start_date: date, end_date: date) -> None:
+    """Gancho das escritas: marca as noites da reserva como ocupadas."""
+    if index is not None:
+        index.mark(property_id, start_date, end_date, True)
+
+
+def released(property_id: int, start_date: date, end_date: date) -> None:
+    """Gancho das escritas: libera as noites de uma reserva removida."""
+    if index is not None:
+        index.mark(property_id, start_date, end_date, False)
+
+
+def changed(property_ids) -> None:
+    """Gancho das escritas: propriedades criadas ou alteradas."""
+    if index is not None:
+        index.dirty.update(property_ids)
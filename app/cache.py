@@ -0,0 +1,492 @@
+"""
+Camada de cache da aplicação.
+AsyncTTLCache é o cache em memória do processo (TTL, LRU e single-flight).
+Os backends (memória ou Redis) guardam valores sob chaves versionadas e
+propagam invalidações entre workers; EntityCache combina os dois para
+cachear entidades por ID.
+"""
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # dependência opcional, apenas para CACHE_BACKEND=redis
+    aioredis = None
+
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncTTLCache:
+    """
+    Cache LRU limitado com TTL, seguro para uso concorrente no event loop.
+    As operações sobre o dicionário não fazem await, então são atômicas
+    entre corrotinas.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self._stale: set = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.coalesced = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+
+    def get(self, key: Hashable) -> tuple[bool, Any]:
+        """
+        Busca um valor válido no cache.
+        Args:
+            key: Chave do item.
+        Returns:
+            Tupla (encontrado, valor).
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            return False, None
+        self._data.move_to_end(key)
+        return True, value
+
+    def set(self, key: Hashable, value: Any,
+            ttl: Optional[float] = None) -> None:
+        """
+        Armazena um valor, descartando os menos usados se exceder o limite.
+        Args:
+            key: Chave do item.
+            value: Valor a armazenar.
+            ttl: Validade deste item em segundos (padrão: a do cache).
+        """
+        ttl = self.ttl if ttl is None else ttl
+        if not self.enabled or ttl <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        Remove um item e descarta o resultado de carregamentos em andamento.
+        Args:
+            key: Chave do item.
+        """
+        self._data.pop(key, None)
+        if key in self._inflight:
+            self._stale.add(key)
+
+    def invalidate_where(self, match: Callable[[Hashable], bool]) -> None:
+        """
+        Remove os itens cujas chaves satisfazem match, inclusive os que
+        estão sendo carregados.
+        Args:
+            match: Função que recebe a chave e indica se deve ser removida.
+        """
+        for key in [key for key in self._data if match(key)]:
+            del self._data[key]
+        self._stale.update(key for key in self._inflight if match(key))
+
+    def clear(self) -> None:
+        """Remove todos os itens do cache."""
+        self._data.clear()
+        self._stale.update(self._inflight)
+
+    async def get_or_load(
+            self,
+            key: Hashable,
+            loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Retorna o valor em cache ou o carrega com loader.
+        Valores None não são armazenados.
+        Args:
+            key: Chave do item.
+            loader: Corrotina que busca o valor na origem.
+        Returns:
+            Valor em cache ou carregado.
+        """
+        found, value = self.get(key)
+        if found:
+            self.hits += 1
+            return value
+        self.misses += 1
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await loader()
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Evita aviso de exceção não consumida quando não há espera
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            if value is not None and key not in self._stale:
+                self.set(key, value)
+            return value
+        finally:
+            del self._inflight[key]
+            self._stale.discard(key)
+
+    def stats(self) -> dict:
+        """
+        Retorna os contadores de uso do cache.
+        Returns:
+            Dicionário com tamanho, acertos, faltas e descartes.
+        """
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "coalesced": self.coalesced,
+        }
+
+
+class CacheBackend(ABC):
+    """
+    Interface dos backends de cache compartilhado.
+    Cada nome (ex.: "property:42") tem uma versão; invalidar o nome
+    incrementa a versão, tornando obsoletas todas as chaves da versão
+    anterior, e notifica os ouvintes de todos os workers.
+    """
+    name = "base"
+
+    def __init__(self):
+        self._listeners: list[Callable[[str], None]] = []
+
+    def add_listener(self, listener: Callable[[str], None]) -> None:
+        """Registra uma função chamada com o nome invalidado."""
+        self._listeners.append(listener)
+
+    def _notify(self, name: str) -> None:
+        for listener in self._listeners:
+            listener(name)
+
+    async def start(self) -> None:
+        """Inicia recursos de segundo plano (ex.: assinatura pub/sub)."""
+
+    async def close(self) -> None:
+        """Libera os recursos do backend."""
+
+    @abstractmethod
+    async def get_version(self, name: str) -> int:
+        """Retorna a versão atual de um nome (0 se nunca invalidado)."""
+
+    @abstractmethod
+    async def bump_version(self, name: str) -> int:
+        """Incrementa a versão de um nome e notifica os workers."""
+
+    @abstractmethod
+    async def get(self, key: str, decode: Callable[[str], Any]) -> Any:
+        """Retorna o valor da chave, ou None se ausente ou expirado."""
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: float,
+                  encode: Callable[[Any], str]) -> None:
+        """Armazena o valor da chave por ttl segundos."""
+
+    def stats(self) -> Optional[dict]:
+        return None
+
+
+class MemoryBackend(CacheBackend):
+    """
+    Backend em memória do processo: cada worker tem sua própria cópia.
+    Adequado para um único worker ou para desenvolvimento.
+    """
+    name = "memory"
+
+    def __init__(self, maxsize: int, ttl: float):
+        super().__init__()
+        self._values = AsyncTTLCache(maxsize=maxsize, ttl=ttl)
+        self._versions: dict[str, int] = {}
+
+    async def get_version(self, name: str) -> int:
+        return self._versions.get(name, 0)
+
+    async def bump_version(self, name: str) -> int:
+        version = self._versions.get(name, 0) + 1
+        self._versions[name] = version
+        self._notify(name)
+        return version
+
+    async def get(self, key: str, decode: Callable[[str], Any]) -> Any:
+        found, value = self._values.get(key)
+        if found:
+            self._values.hits += 1
+        else:
+            self._values.misses += 1
+        return value
+
+    async def set(self, key: str, value: Any, ttl: float,
+                  encode: Callable[[Any], str]) -> None:
+        self._values.set(key, value, ttl)
+
+    def stats(self) -> dict:
+        return self._values.stats()
+
+
+class RedisBackend(CacheBackend):
+    """
+    Backend compartilhado via protocolo Redis.
+    Versões ficam em "<nome>:version" e as invalidações são publicadas no
+    canal INVALIDATION_CHANNEL, que todos os workers assinam.
+    """
+    name = "redis"
+    INVALIDATION_CHANNEL = "cache:invalidate"
+
+    def __init__(self, client):
+        super().__init__()
+        self.client = client
+        self._listener_task: Optional[asyncio.Task] = None
+        self._pubsub = None
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisBackend":
+        if aioredis is None:
+            raise RuntimeError("CACHE_BACKEND=redis requires the redis package")
+        return cls(aioredis.from_url(url, decode_responses=True))
+
+    async def start(self) -> None:
+        self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(self.INVALIDATION_CHANNEL)
+        self._listener_task = asyncio.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("cache invalidation listener failed")
+                await asyncio.sleep(1.0)
+                continue
+            if message and message.get("type") == "message":
+                self._notify(message["data"])
+
+    async def close(self) -> None:
+        if self._listener_task:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+        if self._pubsub:
+            await self._pubsub.aclose()
+        await self.client.aclose()
+
+    async def get_version(self, name: str) -> int:
+        return int(await self.client.get(f"{name}:version") or 0)
+
+    async def bump_version(self, name: str) -> int:
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.incr(f"{name}:version")
+            pipe.publish(self.INVALIDATION_CHANNEL, name)
+            version, _ = await pipe.execute()
+        return version
+
+    async def get(self, key: str, decode: Callable[[str], Any]) -> Any:
+        raw = await self.client.get(key)
+        return decode(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any, ttl: float,
+                  encode: Callable[[Any], str]) -> None:
+        await self.client.set(key, encode(value), px=int(ttl * 1000))
+
+
+async def _publish_invalidation(backend_: CacheBackend, name: str) -> None:
+    """
+    Incrementa a versão de um nome e notifica os workers.
+    Falhas do backend são registradas e ignoradas: a escrita no banco já
+    foi confirmada e o TTL limita o tempo de dado desatualizado.
+    """
+    try:
+        await backend_.bump_version(name)
+    except Exception:
+        logger.exception("cache invalidation failed for %s", name)
+
+
+class EntityCache:
+    """
+    Cache de entidades por ID sobre um backend, com chaves versionadas.
+    Com backend compartilhado mantém também uma cópia local de vida curta,
+    descartada quando outro worker publica uma invalidação.
+    """
+
+    def __init__(
+            self,
+            namespace: str,
+            backend: CacheBackend,
+            ttl: float,
+            encode: Callable[[Any], str],
+            decode: Callable[[str], Any],
+            local_size: int = 0,
+            local_ttl: float = 0):
+        self.namespace = namespace
+        self.backend = backend
+        self.ttl = ttl
+        self.encode = encode
+        self.decode = decode
+        # Com tamanho 0 a cópia local só agrupa as consultas concorrentes
+        self.local = AsyncTTLCache(maxsize=local_size, ttl=local_ttl)
+        self.shared_hits = 0
+        self.loads = 0
+        backend.add_listener(self._on_invalidate)
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def _name(self, ident) -> str:
+        return f"{self.namespace}:{ident}"
+
+    def _invalidate_local(self, ident: str) -> None:
+        # A cópia local guarda (ID, variante): descarta todas as variantes
+        self.local.invalidate_where(lambda key: key[0] == ident)
+
+    def _on_invalidate(self, name: str) -> None:
+        namespace, _, ident = name.partition(":")
+        if namespace == self.namespace:
+            self._invalidate_local(ident)
+
+    async def get_or_load(
+            self,
+            ident,
+            loader: Callable[[], Awaitable[Any]],
+            variant: str = "") -> Any:
+        """
+        Retorna a entidade do cache ou a carrega com loader.
+        Args:
+            ident: ID da entidade (as invalidações são por ID).
+            loader: Corrotina que busca o valor na origem.
+            variant: Sufixo para vários valores por ID (ex.: intervalo).
+        Returns:
+            Valor em cache ou carregado.
+        """
+        if not self.enabled:
+            return await loader()
+
+        async def load_shared():
+            name = self._name(ident)
+            try:
+                version = await self.backend.get_version(name)
+                key = f"{name}:v{version}:{variant}"
+                value = await self.backend.get(key, self.decode)
+            except Exception:
+                # Cache indisponível não pode derrubar a leitura
+                logger.exception("cache read failed for %s", name)
+                return await loader()
+            if value is not None:
+                self.shared_hits += 1
+                return value
+            self.loads += 1
+            value = await loader()
+            if value is not None:
+                # Se houve invalidação no meio, a chave já está obsoleta
+                try:
+                    await self.backend.set(key, value, self.ttl, self.encode)
+                except Exception:
+                    logger.exception("cache write failed for %s", name)
+            return value
+
+        return await self.local.get_or_load((str(ident), variant),
+                                            load_shared)
+
+    async def invalidate(self, ident) -> None:
+        """
+        Invalida todas as variantes de uma entidade em todos os workers.
+        Args:
+            ident: ID da entidade.
+        """
+        self._invalidate_local(str(ident))
+        await _publish_invalidation(self.backend, self._name(ident))
+
+    def stats(self) -> dict:
+        """
+        Retorna os contadores da cópia local e do backend.
+        Returns:
+            Dicionário de estatísticas.
+        """
+        return {
+            "backend": self.backend.name,
+            "local": self.local.stats(),
+            "shared": self.backend.stats(),
+            "shared_hits": self.shared_hits,
+            "loads": self.loads,
+        }
+
+
+def create_backend() -> CacheBackend:
+    """
+    Cria o backend de cache configurado em CACHE_BACKEND.
+    Returns:
+        Instância de MemoryBackend ou RedisBackend.
+    """
+    if settings.CACHE_BACKEND == "redis":
+        return RedisBackend.from_url(settings.REDIS_URL)
+    return MemoryBackend(
+        maxsize=settings.CACHE_MEMORY_SIZE,
+        ttl=settings.CACHE_TTL_SECONDS,
+    )
+
+
+backend = create_backend()
+
+
+async def invalidate(namespace: str, ident) -> None:
+    """
+    Publica a invalidação de uma entidade para todos os workers.
+    Args:
+        namespace: Tipo da entidade (ex.: "property", "availability").
+        ident: ID da entidade.
+    """
+    await _publish_invalidation(backend, f"{namespace}:{ident}")
+
+
+def entity_cache(namespace: str, schema) -> EntityCache:
+    """
+    Cria um EntityCache para um schema Pydantic no backend configurado.
+    Com backend compartilhado, mantém também uma cópia local de vida curta.
+    Args:
+        namespace: Tipo da entidade.
+        schema: Classe Pydantic usada para (de)serializar os valores.
+    Returns:
+        Instância de EntityCache.
+    """
+    shared = backend.name != "memory"
+    return EntityCache(
+        namespace,
+        backend,
+        ttl=settings.CACHE_TTL_SECONDS,
+        encode=lambda value: value.model_dump_json(),
+        decode=schema.model_validate_json,
+        local_size=settings.CACHE_LOCAL_SIZE if shared else 0,
+        local_ttl=settings.CACHE_LOCAL_TTL_SECONDS,
+    )
@@ -0,0 +1,109 @@
+"""
+Compressão das respostas (Content-Encoding) conforme o Accept-Encoding.
+Usa Brotli quando o pacote brotli está instalado e o cliente aceita "br";
+senão, gzip. Respostas menores que COMPRESSION_MINIMUM_SIZE, streams de
+eventos e respostas já codificadas passam sem compressão. Respostas
+comprimidas recebem um ETag próprio da codificação.
+"""
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .http_cache import encoded_etag
+
+try:
+    import brotli
+except ImportError:  # dependência opcional, sem ela só há gzip
+    brotli = None
+
+
+def accepted_encodings(header: str) -> set[str]:
+    """
+    Codificações aceitas pelo cliente no cabeçalho Accept-Encoding.
+    Args:
+        header: Valor do cabeçalho.
+    Returns:
+        Conjunto de codificações, sem as recusadas com q=0.
+    """
+    encodings = set()
+    for item in header.lower().split(","):
+        name, _, params = item.partition(";")
+        quality = params.strip().removeprefix("q=")
+        try:
+            if not name.strip() or (params and float(quality) == 0):
+                continue
+        except ValueError:
+            continue
+        encodings.add(name.strip())
+    return encodings
+
+
+class BrotliResponder(IdentityResponder):
+    """
+    Responder que comprime o corpo com Brotli, inclusive em streaming.
+    """
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int,
+                 quality: int = 4) -> None:
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        body = self.compressor.process(body)
+        if more_body:
+            return body + self.compressor.flush()
+        return body + self.compressor.finish()
+
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI que escolhe entre Brotli, gzip ou nenhuma compressão
+    para cada requisição.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024,
+                 gzip_level: int = 6, brotli_quality: int = 4) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive,
+                       send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        encodings = accepted_encodings(
+            request_headers.get("accept-encoding", ""))
+        responder: ASGIApp
+        if brotli is not None and "br" in encodings:
+            responder = BrotliResponder(self.app, self.minimum_size,
+                                        quality=self.brotli_quality)
+        elif "gzip" in encodings:
+            responder = GZipResponder(self.app, self.minimum_size,
+                                      compresslevel=self.gzip_level)
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+
+        async def send_with_etag(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                etag = headers.get("etag")
+                encoding = getattr(responder, "content_encoding", "identity")
+                if etag and message["status"] == 304:
+                    # Repete a variante que o cliente tem guardada
+                    encoded = encoded_etag(etag, encoding)
+                    sent = request_headers.get("if-none-match", "")
+                    if encoded.removeprefix("W/") in (
+                            tag.strip().removeprefix("W/")
+                            for tag in sent.split(",")):
+                        headers["etag"] = encoded
+                elif (etag and not responder.content_encoding_set
+                      and headers.get("content-encoding") == encoding):
+                    headers["etag"] = encoded_etag(etag, encoding)
+            await send(message)
+
+        await responder(scope, receive, send_with_etag)
@@ -2,26 +2,238 @@
 Configuração do banco de dados da aplicação.
 Define engine, sessão assíncrona, base declarativa e função utilitária para acesso ao banco.
 """
+import time
+from fastapi import Request, Response
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
-import os
-from dotenv import load_dotenv
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from . import metrics
+from .settings import settings
 
 
 class Base(DeclarativeBase):
     pass
 
 
-load_dotenv()
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Pool de conexões que mede o tempo de espera por uma conexão livre.
+    Só conta como espera o checkout que encontra o pool esgotado (nenhuma
+    conexão ociosa e o overflow no limite); o checkout imediato e a
+    abertura de conexões novas ficam de fora.
+    """
 
-DATABASE_URL = os.getenv("DATABASE_URL")
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics_name = "primary"
+        self.wait_count = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
 
-engine = create_async_engine(DATABASE_URL, echo=True, future=True)
+    def _must_wait(self) -> bool:
+        # Mesma condição em que o QueuePool bloqueia na fila
+        return (self.checkedin() == 0 and self._max_overflow > -1
+                and self.overflow() >= self._max_overflow)
+
+    def _do_get(self):
+        if not self._must_wait():
+            return super()._do_get()
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - start
+            self.wait_count += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            metrics.record_pool_wait(self.metrics_name, waited)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics_name = self.metrics_name
+        return pool
+
+
+def _connect_args() -> dict:
+    """
+    Argumentos repassados ao asyncpg na abertura de cada conexão.
+    Returns:
+        Dicionário com cache de prepared statements e server_settings.
+    """
+    server_settings = {}
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        server_settings["statement_timeout"] = str(
+            settings.DB_STATEMENT_TIMEOUT_MS)
+    return {
+        "prepared_statement_cache_size":
+            settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+        "server_settings": server_settings,
+    }
+
+
+def _create_engine(url: str, name: str):
+    """
+    Cria uma engine assíncrona com as configurações de pool do Settings.
+    Args:
+        url: URL de conexão com o banco.
+        name: Rótulo da engine nas métricas (primary, read).
+    Returns:
+        Engine assíncrona.
+    """
+    engine_ = create_async_engine(
+        url,
+        echo=settings.DB_ECHO,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=_connect_args(),
+    )
+    if settings.METRICS_ENABLED:
+        engine_.pool.metrics_name = name
+        metrics.instrument(engine_, name)
+    return engine_
+
+
+engine = _create_engine(settings.DATABASE_URL, "primary")
 AsyncSessionLocal = sessionmaker(
     engine, expire_on_commit=False, class_=AsyncSession)
 
+# Réplica de leitura; sem READ_DATABASE_URL as leituras usam o primário
+read_engine = (
+    _create_engine(settings.READ_DATABASE_URL, "read")
+    if settings.READ_DATABASE_URL else engine
+)
+ReadSessionLocal = sessionmaker(
+    read_engine, expire_on_commit=False, class_=AsyncSession)
+
+# Cookie que fixa as leituras do cliente no primário após uma escrita
+PRIMARY_PIN_COOKIE = "db_primary_pin"
+
+# Métodos que não escrevem: não fixam o cliente no primário
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def pool_stats(engine_=None) -> dict:
+    """
+    Retorna o estado atual do pool de conexões de uma engine.
+    Args:
+        engine_: Engine a consultar (padrão: primário).
+    Returns:
+        Dicionário com conexões em uso, ociosas, overflow e tempo de espera.
+    """
+    pool = (engine_ or engine).pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "wait_count": pool.wait_count,
+        "wait_seconds_total": pool.wait_seconds_total,
+        "wait_seconds_max": pool.wait_seconds_max,
+    }
+
 
 async def get_db():
+    """
+    Sessão no banco primário, usada pelas rotas de escrita.
+    A fixação das leituras seguintes no primário fica com
+    PrimaryPinMiddleware.
+    """
     async with AsyncSessionLocal() as session:
         yield session
+
+
+def primary_pin_enabled() -> bool:
+    """
+    Indica se há réplica de leitura e fixação configurada.
+    Returns:
+        True se as escritas devem fixar o cliente no primário.
+    """
+    return read_engine is not engine and settings.READ_YOUR_WRITES_SECONDS > 0
+
+
+def _primary_pin_cookie() -> str:
+    response = Response()
+    response.set_cookie(
+        PRIMARY_PIN_COOKIE,
+        "1",
+        max_age=settings.READ_YOUR_WRITES_SECONDS,
+        httponly=True,
+        samesite="lax",
+    )
+    return response.headers["set-cookie"]
+
+
+class PrimaryPinMiddleware:
+    """
+    Middleware ASGI que, após uma escrita bem-sucedida (método diferente
+    de GET/HEAD/OPTIONS com resposta 2xx), marca o cliente para ler do
+    primário pelos próximos READ_YOUR_WRITES_SECONDS, garantindo que ele
+    veja a própria escrita. Vale também para rotas que retornam o próprio
+    Response (ex.: repetições com Idempotency-Key); escritas recusadas não
+    fixam o cliente.
+    Nas leituras cacheáveis (com Cache-Control) acrescenta Vary: Cookie,
+    e o cliente fixado recebe "private, no-store": a cópia do CDN pode
+    ser anterior à escrita dele.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not primary_pin_enabled():
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] in SAFE_METHODS:
+            pinned = PRIMARY_PIN_COOKIE in HTTPConnection(scope).cookies
+
+            async def send_read(message):
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    if "cache-control" in headers:
+                        headers.add_vary_header("Cookie")
+                        if pinned:
+                            headers["cache-control"] = "private, no-store"
+                await send(message)
+
+            await self.app(scope, receive, send_read)
+            return
+
+        async def send_with_pin(message):
+            if (message["type"] == "http.response.start"
+                    and 200 <= message["status"] < 300):
+                MutableHeaders(scope=message).append(
+                    "set-cookie", _primary_pin_cookie())
+            await send(message)
+
+        await self.app(scope, receive, send_with_pin)
+
+
+def read_session_factory(request: Request):
+    """
+    Fábrica de sessões de leitura para a requisição: réplica, ou primário
+    se o cliente escreveu recentemente (cookie de fixação ainda válido).
+    Args:
+        request: Requisição atual.
+    Returns:
+        sessionmaker da réplica ou do primário.
+    """
+    if PRIMARY_PIN_COOKIE in request.cookies:
+        return AsyncSessionLocal
+    return ReadSessionLocal
+
+
+async def get_read_db(request: Request):
+    """
+    Sessão para rotas de leitura (ver read_session_factory).
+    """
+    async with read_session_factory(request)() as session:
+        yield session
@@ -0,0 +1,129 @@
+"""
+Cache HTTP das leituras: ETag, Last-Modified, respostas 304 e
+Cache-Control por rota (políticas em settings, para o CDN).
+O ETag é forte e calculado a partir da versão das propriedades, sem
+serializar o corpo: uma requisição condicional que casa com o ETag recebe
+304 sem corpo. Corpos comprimidos recebem o ETag com o sufixo da
+codificação (ver encoded_etag), ignorado na comparação.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request, Response
+
+# Codificações cujo sufixo encoded_etag acrescenta
+ENCODINGS = ("gzip", "br")
+
+
+def make_etag(*parts) -> str:
+    """
+    Monta um ETag forte a partir das partes que identificam a
+    representação (ex.: IDs e versões).
+    Args:
+        parts: Valores que mudam sempre que o corpo muda.
+    Returns:
+        ETag entre aspas.
+    """
+    digest = hashlib.blake2b(
+        "\x1f".join(map(str, parts)).encode(), digest_size=16)
+    return f'"{digest.hexdigest()}"'
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """
+    ETag de uma representação comprimida: cada Content-Encoding tem corpo
+    diferente e não pode repetir o ETag forte da resposta sem compressão.
+    Args:
+        etag: ETag da resposta sem compressão.
+        encoding: Content-Encoding aplicado (ex.: "gzip", "br").
+    Returns:
+        ETag com o sufixo da codificação (ex.: "abc-gzip").
+    """
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def _strip_encoding(tag: str) -> str:
+    # W/"x" e "x-gzip" identificam o mesmo recurso que "x"
+    tag = tag.strip().removeprefix("W/")
+    for encoding in ENCODINGS:
+        suffix = f'-{encoding}"'
+        if tag.endswith(suffix):
+            return tag[:-len(suffix)] + '"'
+    return tag
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # If-None-Match usa comparação fraca
+    if header.strip() == "*":
+        return True
+    return any(_strip_encoding(tag) == etag for tag in header.split(","))
+
+
+def is_not_modified(request: Request, etag: str,
+                    last_modified: datetime | None = None) -> bool:
+    """
+    Avalia If-None-Match e, na ausência dele, If-Modified-Since.
+    Args:
+        request: Requisição recebida.
+        etag: ETag atual do recurso.
+        last_modified: Data da última alteração do recurso (opcional).
+    Returns:
+        True se o cliente já tem a representação atual.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # A data HTTP tem resolução de segundos
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def cache_headers(etag: str, cache_control: str,
+                  last_modified: datetime | None = None) -> dict:
+    """
+    Cabeçalhos de validação e de cache de uma resposta.
+    Args:
+        etag: ETag do recurso.
+        cache_control: Política Cache-Control da rota.
+        last_modified: Data da última alteração (opcional).
+    Returns:
+        Dicionário de cabeçalhos.
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(
+            last_modified.astimezone(timezone.utc), usegmt=True)
+    return headers
+
+
+def not_modified(headers: dict) -> Response:
+    """
+    Resposta 304, repetindo os cabeçalhos de validação e de cache.
+    Args:
+        headers: Cabeçalhos montados por cache_headers.
+    Returns:
+        Resposta sem corpo.
+    """
+    return Response(status_code=304, headers=headers)
+
+
+def cache_control(policy: str):
+    """
+    Dependência que aplica a política Cache-Control à resposta da rota.
+    Para rotas que retornam o próprio Response, use cache_headers.
+    Args:
+        policy: Valor do cabeçalho Cache-Control.
+    Returns:
+        Função de dependência do FastAPI.
+    """
+    def apply(response: Response) -> None:
+        response.headers["Cache-Control"] = policy
+    return apply
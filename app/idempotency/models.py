@@ -0,0 +1,53 @@
+"""
+Modelo ORM das chaves de idempotência.
+Guarda, por chave enviada no cabeçalho Idempotency-Key, o hash do pedido
+e a resposta já serializada, para que as repetições sejam respondidas sem
+refazer a escrita.
+"""
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import (
+    DateTime, Index, LargeBinary, SmallInteger, String, func)
+from sqlalchemy.orm import mapped_column, Mapped
+from ..db import Base
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        # Limpeza das chaves expiradas
+        Index("ix_idempotency_keys_created_at", "created_at"),
+    )
+
+    # Rota de escrita a que a chave pertence (ex.: "POST /reservations/")
+    scope: Mapped[str] = mapped_column(
+        String(50),
+        primary_key=True
+    )
+
+    key: Mapped[str] = mapped_column(
+        String(255),
+        primary_key=True
+    )
+
+    # SHA-256 do corpo do pedido (32 bytes)
+    request_hash: Mapped[bytes] = mapped_column(
+        LargeBinary,
+        nullable=False
+    )
+
+    # Nulo enquanto o primeiro pedido está em andamento
+    status_code: Mapped[Optional[int]] = mapped_column(
+        SmallInteger
+    )
+
+    # Corpo JSON da resposta, exatamente como foi enviado
+    response: Mapped[Optional[bytes]] = mapped_column(
+        LargeBinary
+    )
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now()
+    )
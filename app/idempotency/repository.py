@@ -0,0 +1,142 @@
+"""
+Funções de acesso às chaves de idempotência.
+As funções fazem commit (a reserva da chave precisa ficar visível para os
+outros pedidos antes de a escrita protegida começar), exceto
+store_response, que grava a resposta na transação da própria escrita.
+"""
+from datetime import timedelta
+from sqlalchemy import delete, func, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from ..settings import settings
+from . import models
+
+keys = models.IdempotencyKey.__table__
+
+
+def _older_than(seconds: float):
+    """Condição: chave criada há mais de seconds segundos."""
+    return keys.c.created_at < func.now() - timedelta(seconds=seconds)
+
+
+async def get_key(db: AsyncSession, scope: str, key: str):
+    """
+    Busca uma chave ainda não expirada.
+    Args:
+        db: Sessão assíncrona do banco de dados.
+        scope: Rota de escrita.
+        key: Valor do cabeçalho Idempotency-Key.
+    Returns:
+        Linha (request_hash, status_code, response) ou None.
+    """
+    result = await db.execute(
+        select(keys.c.request_hash, keys.c.status_code, keys.c.response)
+        .where(
+            keys.c.scope == scope,
+            keys.c.key == key,
+            ~_older_than(settings.IDEMPOTENCY_TTL_SECONDS),
+        )
+    )
+    return result.first()
+
+
+async def claim_key(db: AsyncSession, scope: str, key: str,
+                    request_hash: bytes) -> bool:
+    """
+    Reserva a chave para o pedido atual (status_code nulo = em andamento).
+    Uma chave expirada, ou reservada há mais de IDEMPOTENCY_LOCK_SECONDS
+    sem resposta (pedido interrompido), é reaproveitada.
+    Args:
+        db: Sessão assíncrona do banco de dados.
+        scope: Rota de escrita.
+        key: Valor do cabeçalho Idempotency-Key.
+        request_hash: SHA-256 do corpo do pedido.
+    Returns:
+        True se a chave ficou com este pedido.
+    """
+    statement = insert(keys).values(
+        scope=scope, key=key, request_hash=request_hash)
+    statement = statement.on_conflict_do_update(
+        index_elements=[keys.c.scope, keys.c.key],
+        set_={
+            "request_hash": statement.excluded.request_hash,
+            "status_code": None,
+            "response": None,
+            "created_at": func.now(),
+        },
+        where=_older_than(settings.IDEMPOTENCY_TTL_SECONDS) | (
+            keys.c.status_code.is_(None)
+            & _older_than(settings.IDEMPOTENCY_LOCK_SECONDS)),
+    ).returning(keys.c.key)
+    result = await db.execute(statement)
+    claimed = result.first() is not None
+    await db.commit()
+    return claimed
+
+
+async def store_response(db: AsyncSession, scope: str, key: str,
+                         request_hash: bytes, status_code: int,
+                         response: bytes) -> bool:
+    """
+    Grava a resposta do pedido que reservou a chave, sem fazer commit: a
+    resposta é confirmada junto com a escrita protegida.
+    Só atualiza uma chave ainda em andamento e com o mesmo corpo, para
+    não sobrescrever a resposta já gravada por outro pedido.
+    Args:
+        db: Sessão assíncrona do banco de dados.
+        scope: Rota de escrita.
+        key: Valor do cabeçalho Idempotency-Key.
+        request_hash: SHA-256 do corpo do pedido.
+        status_code: Status HTTP da resposta.
+        response: Corpo JSON da resposta.
+    Returns:
+        True se a resposta foi gravada.
+    """
+    result = await db.execute(
+        update(keys)
+        .where(
+            keys.c.scope == scope,
+            keys.c.key == key,
+            keys.c.status_code.is_(None),
+            keys.c.request_hash == request_hash,
+        )
+        .values(status_code=status_code, response=response)
+    )
+    return result.rowcount == 1
+
+
+async def release_key(db: AsyncSession, scope: str, key: str,
+                      request_hash: bytes) -> None:
+    """
+    Libera uma chave em andamento cujo pedido falhou, para que a
+    repetição seja executada de novo.
+    Args:
+        db: Sessão assíncrona do banco de dados.
+        scope: Rota de escrita.
+        key: Valor do cabeçalho Idempotency-Key.
+        request_hash: SHA-256 do corpo do pedido.
+    """
+    await db.execute(
+        delete(keys).where(
+            keys.c.scope == scope,
+            keys.c.key == key,
+            keys.c.status_code.is_(None),
+            keys.c.request_hash == request_hash,
+        )
+    )
+    await db.commit()
+
+
+async def purge_expired(db: AsyncSession) -> int:
+    """
+    Remove as chaves mais antigas que IDEMPOTENCY_TTL_SECONDS.
+    Args:
+        db: Sessão assíncrona do banco de dados.
+    Returns:
+        Número de chaves removidas.
+    """
+    result = await db.execute(
+        delete(keys).where(_older_than(settings.IDEMPOTENCY_TTL_SECONDS)))
+    await db.commit()
+    return result.rowcount
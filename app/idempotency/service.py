@@ -0,0 +1,101 @@
+"""
+Execução idempotente das rotas de criação.
+Com o cabeçalho Idempotency-Key, a primeira execução grava a resposta e
+as repetições com a mesma chave e o mesmo corpo recebem essa resposta sem
+passar de novo pela escrita (consultas, verificações e INSERT). Só
+respostas de sucesso são guardadas: um pedido recusado pode ser repetido
+com a mesma chave.
+A resposta é gravada na mesma transação da escrita (a operação recebe o
+gancho before_commit e o chama antes do commit): ou as duas ficam, ou
+nenhuma, e uma repetição nunca refaz uma escrita já confirmada.
+"""
+import hashlib
+from typing import Awaitable, Callable
+from fastapi import HTTPException, Response
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import repository
+
+# Cabeçalho das respostas servidas a partir da chave
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+# Gancho chamado pela escrita com o resultado, antes do commit
+BeforeCommit = Callable[[object], Awaitable[None]]
+
+
+class KeyTakenOverError(Exception):
+    """
+    A chave deixou de pertencer ao pedido durante a escrita (reservada
+    por outro pedido após IDEMPOTENCY_LOCK_SECONDS).
+    """
+
+
+async def run_idempotent(db: AsyncSession,
+                         scope: str,
+                         key: str | None,
+                         payload: BaseModel,
+                         response_model: type[BaseModel],
+                         operation: Callable[[BeforeCommit | None],
+                                             Awaitable]):
+    """
+    Executa a operação uma única vez por chave de idempotência.
+    Args:
+        db: Sessão assíncrona do banco de dados.
+        scope: Rota de escrita (ex.: "POST /reservations/").
+        key: Valor do cabeçalho Idempotency-Key (opcional).
+        payload: Corpo do pedido, comparado nas repetições.
+        response_model: Schema da resposta de sucesso.
+        operation: Executa a escrita e retorna o resultado; recebe o
+            gancho before_commit (None sem chave), que deve chamar com o
+            resultado antes do commit.
+    Returns:
+        Resultado da operação (sem chave) ou resposta JSON gravada.
+    Raises:
+        HTTPException: 422 se a chave já foi usada com outro corpo; 409 se
+            o primeiro pedido com a chave ainda está em andamento.
+    """
+    if not key:
+        return await operation(None)
+
+    request_hash = hashlib.sha256(
+        payload.model_dump_json().encode()).digest()
+    stored = await repository.get_key(db, scope, key)
+    if stored is None:
+        if await repository.claim_key(db, scope, key, request_hash):
+            body = None
+
+            async def before_commit(result) -> None:
+                nonlocal body
+                body = response_model.model_validate(
+                    result, from_attributes=True).model_dump_json().encode()
+                if not await repository.store_response(
+                        db, scope, key, request_hash, 200, body):
+                    raise KeyTakenOverError()
+
+            try:
+                await operation(before_commit)
+            except KeyTakenOverError:
+                await db.rollback()
+                raise HTTPException(
+                    status_code=409,
+                    detail="A request with this Idempotency-Key is in "
+                           "progress")
+            except Exception:
+                await db.rollback()
+                await repository.release_key(db, scope, key, request_hash)
+                raise
+            return Response(body, media_type="application/json")
+        # Outro pedido reservou a chave entre a consulta e o INSERT
+        stored = await repository.get_key(db, scope, key)
+
+    if stored is not None and stored.request_hash != request_hash:
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key already used with a different request")
+    if stored is None or stored.status_code is None:
+        raise HTTPException(
+            status_code=409,
+            detail="A request with this Idempotency-Key is in progress")
+    return Response(stored.response, status_code=stored.status_code,
+                    media_type="application/json",
+                    headers={REPLAYED_HEADER: "true"})
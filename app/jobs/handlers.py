@@ -0,0 +1,54 @@
+"""
+Handlers dos jobs em segundo plano, registrados por tipo.
+Cada handler recebe uma sessão própria e o payload do job e retorna um
+dicionário gravado como resultado. Erros levantados disparam nova
+tentativa com backoff. O schema do payload de cada tipo fica em PAYLOADS
+e é validado ao enfileirar.
+"""
+from datetime import date
+from typing import Awaitable, Callable
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..reservations import repository as reservations_repo
+from . import schemas
+
+Handler = Callable[[AsyncSession, dict], Awaitable[dict | None]]
+
+HANDLERS: dict[str, Handler] = {}
+
+PAYLOADS: dict[str, type[BaseModel]] = {}
+
+
+def handler(kind: str, payload: type[BaseModel]):
+    """
+    Registra a função decorada como handler do tipo de job, com o schema
+    do seu payload.
+    """
+    def register(function: Handler) -> Handler:
+        HANDLERS[kind] = function
+        PAYLOADS[kind] = payload
+        return function
+    return register
+
+
+@handler("calendar.rebuild", schemas.CalendarRebuildPayload)
+async def rebuild_calendar(db: AsyncSession, payload: dict):
+    """
+    Reconstrói o calendário de ocupação.
+    Payload: {"property_id": int} (opcional; sem ele, todas).
+    """
+    nights = await reservations_repo.rebuild_calendar(
+        db, payload.get("property_id"))
+    return {"nights": nights}
+
+
+@handler("reservations.recompute_totals", schemas.RecomputeTotalsPayload)
+async def recompute_totals(db: AsyncSession, payload: dict):
+    """
+    Recalcula o valor total das reservas futuras de uma propriedade com o
+    preço atual da diária (ex.: após alteração de preço).
+    Payload: {"property_id": int}.
+    """
+    updated = await reservations_repo.recompute_total_values(
+        db, payload["property_id"], date.today())
+    return {"updated": updated}
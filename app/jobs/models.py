@@ -0,0 +1,90 @@
+"""
+Modelos ORM da fila de jobs em segundo plano.
+Define a entidade Job, consumida pelo worker (python -m app.worker).
+"""
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import DateTime, Index, Integer, String, Text, func, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import mapped_column, Mapped
+from ..db import Base
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Próximos jobs prontos para execução, na ordem de run_at
+        Index(
+            "ix_jobs_queued_run_at",
+            "run_at", "job_id",
+            postgresql_where=text("status = 'queued'"),
+        ),
+        Index("ix_jobs_status_kind", "status", "kind"),
+    )
+
+    job_id: Mapped[int] = mapped_column(
+        Integer,
+        primary_key=True,
+        autoincrement=True
+    )
+
+    kind: Mapped[str] = mapped_column(
+        String(100),
+        nullable=False
+    )
+
+    payload: Mapped[dict] = mapped_column(
+        JSONB,
+        nullable=False,
+        server_default=text("'{}'::jsonb")
+    )
+
+    status: Mapped[str] = mapped_column(
+        String(20),
+        nullable=False,
+        server_default=QUEUED
+    )
+
+    attempts: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False,
+        server_default="0"
+    )
+
+    max_attempts: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False
+    )
+
+    run_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now()
+    )
+
+    locked_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True)
+    )
+
+    last_error: Mapped[Optional[str]] = mapped_column(
+        Text
+    )
+
+    result: Mapped[Optional[dict]] = mapped_column(
+        JSONB
+    )
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now()
+    )
+
+    finished_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True)
+    )
@@ -0,0 +1,226 @@
+"""
+Funções de acesso à fila de jobs.
+A fila é a própria tabela jobs: os workers disputam os jobs prontos com
+SELECT ... FOR UPDATE SKIP LOCKED, sem bloquear uns aos outros.
+"""
+import random
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import func, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from ..settings import settings
+from . import models
+
+
+def backoff_seconds(attempts: int) -> float:
+    """
+    Espera antes da próxima tentativa: exponencial, limitada e com jitter
+    para que falhas simultâneas não voltem todas ao mesmo tempo.
+    Args:
+        attempts: Tentativas já feitas (a partir de 1).
+    Returns:
+        Segundos até a próxima tentativa.
+    """
+    delay = min(settings.JOB_BACKOFF_SECONDS * 2 ** (attempts - 1),
+                settings.JOB_BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.5, 1.0)
+
+
+async def enqueue(
+        db: AsyncSession,
+        kind: str,
+        payload: Optional[dict] = None,
+        run_at: Optional[datetime] = None,
+        max_attempts: Optional[int] = None,
+        commit: bool = True):
+    """
+    Coloca um job na fila.
+    Args:
+        db: Sessão assíncrona do banco de dados.
+        kind: Tipo do job (ver app.jobs.handlers).
+        payload: Parâmetros do job.
+        run_at: Executar a partir deste instante (padrão: agora).
+        max_attempts: Tentativas antes de marcar como falho.
+        commit: False para deixar o job na transação de quem chama, que
+            faz o commit junto com a escrita que originou o job.
+    Returns:
+        Job criado.
+    """
+    values = {
+        "kind": kind,
+        "payload": payload or {},
+        "max_attempts": max_attempts or settings.JOB_MAX_ATTEMPTS,
+    }
+    if run_at is not None:
+        values["run_at"] = run_at
+    # Os defaults do servidor (status, run_at, created_at) voltam no
+    # RETURNING do próprio INSERT
+    result = await db.execute(
+        insert(models.Job).values(**values).returning(models.Job))
+    job = result.scalar_one()
+    if commit:
+        await db.commit()
+    return job
+
+
+async def claim(db: AsyncSession):
+    """
+    Reserva o próximo job pronto para este worker.
+    O SKIP LOCKED faz cada worker pular os jobs já reservados por outros,
+    então vários workers consomem a fila em paralelo sem conflito.
+    Args:
+        db: Sessão assíncrona do banco de dados.
+    Returns:
+        Job reservado (status running) ou None se a fila estiver vazia.
+    """
+    jobs = models.Job.__table__
+    next_job = (
+        select(jobs.c.job_id)
+        .where(jobs.c.status == models.QUEUED,
+               jobs.c.run_at <= func.now())
+        .order_by(jobs.c.run_at, jobs.c.job_id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        update(jobs)
+        .where(jobs.c.job_id == next_job)
+        .values(status=models.RUNNING,
+                attempts=jobs.c.attempts + 1,
+                locked_at=func.now())
+        .returning(*jobs.c)
+    )
+    row = result.mappings().first()
+    await db.commit()
+    return row
+
+
+def _owned_by(job_id: int, attempts: int):
+    """
+    Condição: o job ainda está em execução pela tentativa informada. Se
+    requeue_stale o devolveu à fila e outro worker o reservou, attempts
+    mudou e o resultado atrasado da tentativa antiga é descartado.
+    """
+    jobs = models.Job.__table__
+    return ((jobs.c.job_id == job_id)
+            & (jobs.c.status == models.RUNNING)
+            & (jobs.c.attempts == attempts))
+
+
+async def complete(db: AsyncSession, job_id: int, attempts: int,
+                   result: Optional[dict] = None) -> bool:
+    """
+    Marca um job como concluído.
+    Args:
+        db: Sessão assíncrona do banco de dados.
+        job_id: ID do job.
+        attempts: Tentativa que executou o job (valor retornado por claim).
+        result: Resultado retornado pelo handler.
+    Returns:
+        False se a tentativa não é mais a dona do job (nada é alterado).
+    """
+    jobs = models.Job.__table__
+    updated = await db.execute(
+        update(jobs)
+        .where(_owned_by(job_id, attempts))
+        .values(status=models.SUCCEEDED, result=result, last_error=None,
+                locked_at=None, finished_at=func.now())
+    )
+    await db.commit()
+    return updated.rowcount == 1
+
+
+async def fail(db: AsyncSession, job_id: int, attempts: int,
+               max_attempts: int, error: str) -> Optional[str]:
+    """
+    Registra a falha de um job: volta para a fila com backoff ou, sem
+    tentativas restantes, fica como falho.
+    Args:
+        db: Sessão assíncrona do banco de dados.
+        job_id: ID do job.
+        attempts: Tentativas feitas, incluindo esta.
+        max_attempts: Limite de tentativas do job.
+        error: Descrição do erro.
+    Returns:
+        Novo status do job, ou None se a tentativa não é mais a dona do
+        job (nada é alterado).
+    """
+    jobs = models.Job.__table__
+    if attempts < max_attempts:
+        values = {
+            "status": models.QUEUED,
+            "run_at": func.now() + timedelta(
+                seconds=backoff_seconds(attempts)),
+        }
+    else:
+        values = {"status": models.FAILED, "finished_at": func.now()}
+    updated = await db.execute(
+        update(jobs)
+        .where(_owned_by(job_id, attempts))
+        .values(last_error=error, locked_at=None, **values)
+    )
+    await db.commit()
+    return values["status"] if updated.rowcount == 1 else None
+
+
+async def requeue_stale(db: AsyncSession) -> int:
+    """
+    Devolve à fila os jobs em execução há mais de JOB_LOCK_TIMEOUT_SECONDS,
+    deixados para trás por um worker que parou no meio.
+    Args:
+        db: Sessão assíncrona do banco de dados.
+    Returns:
+        Número de jobs devolvidos.
+    """
+    jobs = models.Job.__table__
+    timeout = timedelta(seconds=settings.JOB_LOCK_TIMEOUT_SECONDS)
+    result = await db.execute(
+        update(jobs)
+        .where(jobs.c.status == models.RUNNING,
+               jobs.c.locked_at < func.now() - timeout)
+        .values(status=models.QUEUED, locked_at=None, run_at=func.now(),
+                last_error="worker lock expired")
+    )
+    await db.commit()
+    return result.rowcount
+
+
+async def get_job(db: AsyncSession, job_id: int):
+    """
+    Busca um job pelo ID.
+    Args:
+        db: Sessão assíncrona do banco de dados.
+        job_id: ID do job.
+    Returns:
+        Instância do job ou None.
+    """
+    result = await db.execute(
+        select(models.Job).filter(models.Job.job_id == job_id))
+    return result.scalars().first()
+
+
+async def list_jobs(
+        db: AsyncSession,
+        status: Optional[str] = None,
+        kind: Optional[str] = None,
+        limit: int = 50):
+    """
+    Lista os jobs mais recentes, com filtros opcionais.
+    Args:
+        db: Sessão assíncrona do banco de dados.
+        status: Status do job (opcional).
+        kind: Tipo do job (opcional).
+        limit: Número máximo de registros.
+    Returns:
+        Lista de jobs, do mais recente para o mais antigo.
+    """
+    query = select(models.Job)
+    if status:
+        query = query.filter(models.Job.status == status)
+    if kind:
+        query = query.filter(models.Job.kind == kind)
+    result = await db.execute(
+        query.order_by(models.Job.job_id.desc()).limit(limit))
+    return result.scalars().all()
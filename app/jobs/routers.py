@@ -0,0 +1,56 @@
+"""
+Rotas da API para jobs em segundo plano.
+Permite enfileirar operações pesadas e acompanhar o status de execução.
+"""
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..db import get_db
+from . import schemas, service
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+@router.post("/", response_model=schemas.JobResponse, status_code=202)
+async def enqueue_job(job_in: schemas.JobCreate,
+                      db: AsyncSession = Depends(get_db)):
+    """
+    Endpoint para colocar um job na fila do worker.
+    Args:
+        job_in: Tipo, payload e agendamento do job.
+        db: Sessão do banco de dados.
+    Returns:
+        Job criado, com status queued.
+    """
+    return await service.enqueue_job_service(db, job_in)
+
+
+@router.get("/", response_model=list[schemas.JobResponse])
+async def list_jobs(status: schemas.JobStatus | None = None,
+                    kind: str | None = None,
+                    limit: int = Query(50, ge=1, le=500),
+                    db: AsyncSession = Depends(get_db)):
+    """
+    Endpoint para listar os jobs mais recentes.
+    Lê do primário: o status muda a todo momento.
+    Args:
+        status: Status do job (opcional).
+        kind: Tipo do job (opcional).
+        limit: Número máximo de registros.
+        db: Sessão do banco de dados.
+    Returns:
+        Lista de jobs.
+    """
+    return await service.list_jobs_service(db, status, kind, limit)
+
+
+@router.get("/{job_id}", response_model=schemas.JobResponse)
+async def get_job(job_id: int, db: AsyncSession = Depends(get_db)):
+    """
+    Endpoint para consultar o status de um job.
+    Args:
+        job_id: ID do job.
+        db: Sessão do banco de dados.
+    Returns:
+        Job encontrado.
+    """
+    return await service.get_job_service(db, job_id)
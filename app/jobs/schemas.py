@@ -0,0 +1,59 @@
+"""
+Schemas Pydantic para validação e transferência de dados dos jobs.
+Define os modelos usados nas operações da API de jobs.
+"""
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Literal, Optional
+
+JobStatus = Literal["queued", "running", "succeeded", "failed"]
+
+
+class JobCreate(BaseModel):
+    """
+    Schema usado no POST /jobs.
+    kind deve ser um tipo registrado em app.jobs.handlers.
+    """
+    kind: str = Field(..., max_length=100)
+    payload: dict = Field(default_factory=dict)
+    run_at: Optional[datetime] = None
+    max_attempts: Optional[int] = Field(None, ge=1, le=100)
+
+
+class CalendarRebuildPayload(BaseModel):
+    """
+    Payload do job calendar.rebuild; sem property_id, todas as
+    propriedades.
+    """
+    model_config = ConfigDict(extra="forbid")
+
+    property_id: Optional[int] = Field(None, ge=1)
+
+
+class RecomputeTotalsPayload(BaseModel):
+    """
+    Payload do job reservations.recompute_totals.
+    """
+    model_config = ConfigDict(extra="forbid")
+
+    property_id: int = Field(..., ge=1)
+
+
+class JobResponse(BaseModel):
+    """
+    Schema de retorno de um job.
+    """
+    job_id: int
+    kind: str
+    payload: dict
+    status: JobStatus
+    attempts: int
+    max_attempts: int
+    run_at: datetime
+    last_error: Optional[str] = None
+    result: Optional[dict] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
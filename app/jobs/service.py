@@ -0,0 +1,70 @@
+"""
+Serviços e regras de negócio para jobs em segundo plano.
+Orquestra operações entre repositórios e schemas, aplicando validações.
+"""
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import repository, schemas
+from .handlers import HANDLERS, PAYLOADS
+
+
+async def enqueue_job_service(db: AsyncSession, job_in: schemas.JobCreate):
+    """
+    Serviço para colocar um job na fila.
+    Args:
+        db: Sessão assíncrona do banco de dados.
+        job_in: Tipo, payload e agendamento do job.
+    Returns:
+        Job criado, exceção 400 para tipo desconhecido ou 422 para payload
+        inválido.
+    """
+    if job_in.kind not in HANDLERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown job kind, use one of: {', '.join(sorted(HANDLERS))}")
+    # Payload inválido falharia no worker em todas as tentativas
+    try:
+        payload = PAYLOADS[job_in.kind].model_validate(job_in.payload)
+    except ValidationError as exc:
+        raise HTTPException(status_code=422, detail=[
+            {**error, "loc": ["body", "payload", *error["loc"]]}
+            for error in exc.errors(include_url=False, include_context=False)])
+    return await repository.enqueue(
+        db,
+        job_in.kind,
+        payload.model_dump(exclude_unset=True),
+        run_at=job_in.run_at,
+        max_attempts=job_in.max_attempts,
+    )
+
+
+async def list_jobs_service(db: AsyncSession, status: str | None = None,
+                            kind: str | None = None, limit: int = 50):
+    """
+    Serviço para listar os jobs mais recentes.
+    Args:
+        db: Sessão assíncrona do banco de dados.
+        status: Status do job (opcional).
+        kind: Tipo do job (opcional).
+        limit: Número máximo de registros.
+    Returns:
+        Lista de jobs.
+    """
+    return await repository.list_jobs(db, status=status, kind=kind,
+                                      limit=limit)
+
+
+async def get_job_service(db: AsyncSession, job_id: int):
+    """
+    Serviço para consultar um job pelo ID.
+    Args:
+        db: Sessão assíncrona do banco de dados.
+        job_id: ID do job.
+    Returns:
+        Job encontrado ou exceção 404.
+    """
+    job = await repository.get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -3,11 +3,47 @@ from fastapi import FastAPI
 Arquivo principal da aplicação FastAPI.
 Responsável por inicializar a API, registrar os routers de propriedades e reservas.
 """
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from . import availability, cache, compression, db, metrics
+from .responses import DefaultJSONResponse
+from .jobs import routers as jobs_router
+from .monitoring import routers as monitoring_router
+from .settings import settings
 from .properties import routers as properties_router
 from .reservations import routers as reservations_router
 
-app = FastAPI(title="Seazone API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Assina as invalidações de cache publicadas pelos outros workers
+    await cache.backend.start()
+    # Com AVAILABILITY_ENGINE=numpy, carrega o índice de disponibilidade
+    await availability.start()
+    yield
+    await availability.close()
+    await cache.backend.close()
+
+
+app = FastAPI(title="Seazone API", lifespan=lifespan,
+              default_response_class=DefaultJSONResponse)
+
+# Após escritas bem-sucedidas, fixa as leituras do cliente no primário
+app.add_middleware(db.PrimaryPinMiddleware)
+
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(compression.CompressionMiddleware,
+                       minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+                       gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+                       brotli_quality=settings.COMPRESSION_BROTLI_QUALITY)
+
+# Adicionado por último, mede também o tempo de compressão
+if settings.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware,
+                       server_timing=settings.METRICS_SERVER_TIMING)
 
 app.include_router(properties_router.router)
 app.include_router(reservations_router.router)
+app.include_router(jobs_router.router)
+app.include_router(monitoring_router.router)
+app.include_router(monitoring_router.metrics_router)
@@ -0,0 +1,350 @@
+"""
+Métricas da aplicação no formato de exposição do Prometheus.
+MetricsMiddleware mede a latência de cada requisição por rota; os eventos
+before/after_cursor_execute do SQLAlchemy contam as consultas e o tempo no
+banco de cada requisição, e o pool instrumentado informa a espera por
+conexão. Tudo fica em memória, por processo: com vários workers, o
+Prometheus coleta cada um separadamente.
+"""
+import logging
+import time
+from bisect import bisect_left
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# Tamanho máximo do SQL guardado em cada amostra de consulta lenta
+SLOW_QUERY_MAX_CHARS = 2000
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return (str(value).replace("\\", "\\\\").replace("\n", "\\n")
+            .replace('"', '\\"'))
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"'
+             for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    Contador monotônico, com uma série por combinação de rótulos.
+    """
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._series: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        self._series[labels] = self._series.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._series.get(labels, 0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}",
+                 f"# TYPE {self.name} counter"]
+        series = self._series or ({(): 0} if not self.labelnames else {})
+        for labels, value in series.items():
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} "
+                         f"{_number(value)}")
+        return lines
+
+
+class Histogram:
+    """
+    Histograma com limites fixos, com uma série por combinação de rótulos.
+    Cada série guarda a contagem não acumulada por faixa; o acúmulo exigido
+    pelo formato é feito só na exposição.
+    """
+
+    def __init__(self, name: str, documentation: str, buckets: tuple,
+                 labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self.labelnames = labelnames
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            # Contagens por faixa (+Inf no fim), soma e total
+            series = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            self._series[labels] = series
+        series[bisect_left(self.buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def count(self, *labels) -> int:
+        series = self._series.get(labels)
+        return series[-1] if series else 0
+
+    def sum(self, *labels) -> float:
+        series = self._series.get(labels)
+        return series[-2] if series else 0.0
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}",
+                 f"# TYPE {self.name} histogram"]
+        for labels, series in self._series.items():
+            cumulative = 0
+            bounds = [_number(bound) for bound in self.buckets] + ["+Inf"]
+            for bound, hits in zip(bounds, series):
+                cumulative += hits
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket"
+                             f"{_labels(self.labelnames, labels, le)} "
+                             f"{cumulative}")
+            suffix = _labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{suffix} {_number(series[-2])}")
+            lines.append(f"{self.name}_count{suffix} {series[-1]}")
+        return lines
+
+
+class RequestStats:
+    """
+    Acumuladores de uma requisição em andamento.
+    """
+    __slots__ = ("scope", "queries", "db_seconds", "pool_wait_seconds")
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+
+    @property
+    def route(self) -> str:
+        """
+        Modelo de caminho da rota atendida (ex.: /properties/{property_id}),
+        para que os rótulos não cresçam com cada ID; "unmatched" sem rota.
+        """
+        if self.scope is None:
+            return ""
+        route = self.scope.get("route")
+        if route is not None:
+            return route.path
+        if "endpoint" in self.scope:
+            return self.scope["path"]
+        return "unmatched"
+
+    def server_timing(self, elapsed: float) -> str:
+        """
+        Valor do cabeçalho Server-Timing (durações em milissegundos).
+        Args:
+            elapsed: Tempo desde o início da requisição, em segundos.
+        """
+        return (f"app;dur={elapsed * 1000:.1f}, "
+                f"db;dur={self.db_seconds * 1000:.1f};"
+                f'desc="{self.queries} queries", '
+                f"pool;dur={self.pool_wait_seconds * 1000:.1f}")
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar(
+    "request_stats", default=None)
+
+request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Latência das requisições HTTP por rota.",
+    LATENCY_BUCKETS, ("method", "route", "status"))
+request_queries = Histogram(
+    "http_request_db_queries",
+    "Consultas ao banco por requisição.",
+    QUERY_COUNT_BUCKETS, ("method", "route"))
+request_db_time = Histogram(
+    "http_request_db_seconds",
+    "Tempo gasto no banco por requisição.",
+    LATENCY_BUCKETS, ("method", "route"))
+query_duration = Histogram(
+    "db_query_duration_seconds",
+    "Duração de cada consulta ao banco.",
+    LATENCY_BUCKETS)
+pool_wait = Histogram(
+    "db_pool_wait_seconds",
+    "Espera por uma conexão livre com o pool esgotado.",
+    POOL_WAIT_BUCKETS, ("engine",))
+slow_queries_total = Counter(
+    "db_slow_queries_total",
+    "Consultas acima de METRICS_SLOW_QUERY_MS.")
+
+REGISTRY = (request_duration, request_queries, request_db_time,
+            query_duration, pool_wait, slow_queries_total)
+
+slow_queries: deque = deque(maxlen=settings.METRICS_SLOW_QUERY_SAMPLES)
+
+# Engines instrumentadas, expostas como gauges do pool
+_engines: dict[str, object] = {}
+
+
+def current() -> Optional[RequestStats]:
+    """Acumuladores da requisição atual, ou None fora de uma requisição."""
+    return _current.get()
+
+
+def record_query(statement: str, seconds: float) -> None:
+    """
+    Registra uma consulta executada e guarda uma amostra se for lenta.
+    Args:
+        statement: SQL executado.
+        seconds: Duração da execução.
+    """
+    query_duration.observe(seconds)
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += seconds
+    if seconds * 1000 >= settings.METRICS_SLOW_QUERY_MS:
+        slow_queries_total.inc()
+        route = stats.route if stats is not None else ""
+        slow_queries.append({
+            "at": datetime.now(timezone.utc),
+            "duration_ms": round(seconds * 1000, 3),
+            "route": route,
+            "statement": statement[:SLOW_QUERY_MAX_CHARS],
+        })
+        logger.warning("slow query (%.1f ms) on %s: %s", seconds * 1000,
+                       route or "-", " ".join(statement.split())[:200])
+
+
+def record_pool_wait(engine_name: str, seconds: float) -> None:
+    """
+    Registra a espera por uma conexão do pool.
+    Args:
+        engine_name: Rótulo da engine (primary, read).
+        seconds: Tempo de espera.
+    """
+    pool_wait.observe(seconds, engine_name)
+    stats = _current.get()
+    if stats is not None:
+        stats.pool_wait_seconds += seconds
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    started = conn.info["query_started_at"].pop()
+    record_query(statement, time.perf_counter() - started)
+
+
+def _handle_error(exception_context):
+    # after_cursor_execute não roda quando a consulta falha
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started_at"):
+        conn.info["query_started_at"].pop()
+
+
+def instrument(engine, name: str) -> None:
+    """
+    Registra os eventos de medição das consultas de uma engine.
+    Args:
+        engine: Engine assíncrona.
+        name: Rótulo da engine nas métricas do pool.
+    """
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+    _engines[name] = engine
+
+
+def _pool_lines() -> list[str]:
+    gauges = (
+        ("db_pool_size", "Conexões permanentes do pool.",
+         lambda pool: pool.size()),
+        ("db_pool_checked_out", "Conexões em uso.",
+         lambda pool: pool.checkedout()),
+        ("db_pool_idle", "Conexões ociosas.",
+         lambda pool: pool.checkedin()),
+        ("db_pool_overflow", "Conexões além de pool_size.",
+         lambda pool: max(pool.overflow(), 0)),
+    )
+    lines = []
+    for metric, documentation, read in gauges:
+        lines += [f"# HELP {metric} {documentation}",
+                  f"# TYPE {metric} gauge"]
+        for name, engine in _engines.items():
+            lines.append(f'{metric}{{engine="{name}"}} {read(engine.pool)}')
+    return lines
+
+
+def render() -> str:
+    """
+    Gera o texto de exposição de todas as métricas do processo.
+    Returns:
+        Métricas no formato texto do Prometheus.
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines += metric.render()
+    lines += _pool_lines()
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mede cada requisição HTTP e, opcionalmente,
+    devolve o cabeçalho Server-Timing com o tempo total, o tempo no banco
+    e a espera por conexão.
+    """
+
+    def __init__(self, app, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats(scope)
+        token = _current.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", stats.server_timing(
+                        time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            method, route = scope["method"], stats.route
+            request_duration.observe(time.perf_counter() - started,
+                                     method, route, str(status))
+            request_queries.observe(stats.queries, method, route)
+            request_db_time.observe(stats.db_seconds, method, route)
@@ -0,0 +1,79 @@
+"""
+Rotas da API para monitoramento da aplicação.
+Expõe o estado dos pools de conexões com o banco de dados, dos caches e
+do índice de disponibilidade, além das métricas no formato Prometheus.
+"""
+from fastapi import APIRouter, Response
+from .. import availability, metrics
+from ..db import pool_stats, read_engine
+from ..properties.repository import property_cache
+from . import schemas
+
+router = APIRouter(prefix="/monitoring", tags=["Monitoring"])
+# /metrics fica na raiz, onde o Prometheus procura por padrão
+metrics_router = APIRouter(tags=["Monitoring"])
+
+
+@metrics_router.get("/metrics", response_class=Response)
+async def get_metrics():
+    """
+    Endpoint de coleta do Prometheus.
+    Returns:
+        Latência por rota, consultas e tempo no banco por requisição,
+        espera por conexão e consultas lentas deste processo.
+    """
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@router.get("/pool", response_model=schemas.PoolStats)
+async def get_pool_stats():
+    """
+    Endpoint para consultar o estado do pool de conexões deste processo.
+    Returns:
+        Conexões em uso, ociosas, overflow e tempo de espera por conexão.
+    """
+    return pool_stats()
+
+
+@router.get("/pool/read", response_model=schemas.PoolStats)
+async def get_read_pool_stats():
+    """
+    Endpoint para consultar o pool de conexões de leitura deste processo.
+    Sem READ_DATABASE_URL é o mesmo pool do primário.
+    Returns:
+        Conexões em uso, ociosas, overflow e tempo de espera por conexão.
+    """
+    return pool_stats(read_engine)
+
+
+@router.get("/cache/properties", response_model=schemas.EntityCacheStats)
+async def get_property_cache_stats():
+    """
+    Endpoint para consultar os contadores do cache de propriedades.
+    Returns:
+        Tamanho, acertos, faltas, descartes e consultas agrupadas.
+    """
+    return property_cache.stats()
+
+
+@router.get("/availability", response_model=schemas.AvailabilityStats)
+async def get_availability_stats():
+    """
+    Endpoint para consultar o índice de disponibilidade em memória.
+    Returns:
+        Tamanho, horizonte e contadores, ou enabled=false no caminho SQL.
+    """
+    if availability.index is None:
+        return {"enabled": False}
+    return availability.index.stats()
+
+
+@router.get("/queries/slow", response_model=list[schemas.SlowQuery])
+async def get_slow_queries():
+    """
+    Endpoint para consultar as últimas consultas acima de
+    METRICS_SLOW_QUERY_MS neste processo.
+    Returns:
+        Amostras da mais recente para a mais antiga.
+    """
+    return list(reversed(metrics.slow_queries))
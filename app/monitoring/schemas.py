@@ -0,0 +1,78 @@
+"""
+Schemas Pydantic dos endpoints de monitoramento.
+"""
+from datetime import date, datetime
+from pydantic import BaseModel
+from typing import Optional
+
+
+class PoolStats(BaseModel):
+    """
+    Estado do pool de conexões com o banco de dados.
+    Esperas (checkouts com o pool esgotado) acumuladas desde o início do
+    processo.
+    """
+    size: int
+    checked_out: int
+    idle: int
+    overflow: int
+    max_overflow: int
+    wait_count: int
+    wait_seconds_total: float
+    wait_seconds_max: float
+
+
+class CacheStats(BaseModel):
+    """
+    Contadores de uso de um cache em memória do processo.
+    """
+    size: int
+    maxsize: int
+    ttl_seconds: float
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    coalesced: int
+
+
+class EntityCacheStats(BaseModel):
+    """
+    Contadores de um cache de entidades.
+    local é a cópia do processo; shared é o backend em memória (vazio no
+    Redis); loads conta as leituras que chegaram ao banco.
+    """
+    backend: str
+    local: CacheStats
+    shared: Optional[CacheStats] = None
+    shared_hits: int
+    loads: int
+
+
+class AvailabilityStats(BaseModel):
+    """
+    Estado do índice de disponibilidade em memória deste processo.
+    fallbacks conta as buscas fora do horizonte, respondidas via SQL.
+    """
+    enabled: bool
+    loaded: bool = False
+    properties: int = 0
+    origin: Optional[date] = None
+    horizon_days: int = 0
+    memory_bytes: int = 0
+    load_seconds: float = 0.0
+    queries: int = 0
+    fallbacks: int = 0
+    refreshes: int = 0
+    pending: int = 0
+
+
+class SlowQuery(BaseModel):
+    """
+    Amostra de uma consulta lenta; route vazio fora de requisições HTTP
+    (ex.: worker de jobs).
+    """
+    at: datetime
+    duration_ms: float
+    route: str
+    statement: str
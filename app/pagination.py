@@ -0,0 +1,39 @@
+"""
+Utilitários de paginação por cursor (keyset).
+O cursor é opaco para o cliente: uma lista JSON com os valores da chave de
+ordenação do último item da página, codificada em base64 url-safe.
+"""
+import base64
+import json
+
+
+def encode_cursor(*values) -> str:
+    """
+    Codifica os valores da chave de ordenação em um cursor opaco.
+    Args:
+        values: Valores da chave do último item retornado.
+    Returns:
+        Cursor em base64 url-safe, sem padding.
+    """
+    raw = json.dumps(list(values), separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    """
+    Decodifica um cursor gerado por encode_cursor.
+    Args:
+        cursor: Cursor recebido do cliente.
+    Returns:
+        Lista com os valores da chave de ordenação.
+    Raises:
+        ValueError: Se o cursor for inválido.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except ValueError as exc:
+        raise ValueError("Invalid cursor") from exc
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
@@ -0,0 +1,139 @@
+"""
+Leitura incremental de arquivos para importação em lote de propriedades.
+Converte o corpo da requisição (NDJSON ou CSV com cabeçalho) em registros,
+sem carregar o arquivo inteiro em memória.
+"""
+import codecs
+import csv
+import json
+from typing import AsyncIterator
+
+# Limite de uma linha e de um registro CSV: sem ele, uma linha enorme ou
+# uma aspa sem par acumularia o resto do arquivo em memória
+MAX_RECORD_LENGTH = 64 * 1024
+
+
+async def _decode(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    async for chunk in stream:
+        yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
+
+
+async def iter_lines(stream: AsyncIterator[bytes],
+                     max_length: int = MAX_RECORD_LENGTH
+                     ) -> AsyncIterator[str | None]:
+    """
+    Divide um fluxo de bytes UTF-8 em linhas.
+    Cada trecho decodificado é percorrido uma única vez; linhas maiores
+    que max_length são descartadas até a próxima quebra de linha.
+    Args:
+        stream: Fluxo do corpo da requisição.
+        max_length: Tamanho máximo de uma linha, em caracteres.
+    Returns:
+        Iterador assíncrono de linhas, sem o terminador, com None no lugar
+        das linhas descartadas.
+    """
+    parts = []
+    length = 0
+    skipping = False
+    async for text in _decode(stream):
+        start = 0
+        while True:
+            end = text.find("\n", start)
+            piece = text[start:] if end < 0 else text[start:end]
+            length += len(piece)
+            if length > max_length:
+                parts, skipping = [], True
+            elif piece:
+                parts.append(piece)
+            if end < 0:
+                break
+            yield None if skipping else "".join(parts).rstrip("\r")
+            parts, length, skipping = [], 0, False
+            start = end + 1
+    if length:
+        yield None if skipping else "".join(parts).rstrip("\r")
+
+
+async def iter_ndjson(lines: AsyncIterator[str | None]):
+    """
+    Converte linhas NDJSON em registros; linhas vazias são ignoradas.
+    Args:
+        lines: Iterador de linhas (None para as descartadas por
+            iter_lines).
+    Returns:
+        Iterador de tuplas (número da linha, registro ou mensagem de erro).
+    """
+    number = 0
+    async for line in lines:
+        number += 1
+        if line is None:
+            yield number, "line too long"
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield number, f"invalid JSON: {exc.msg}"
+            continue
+        if not isinstance(record, dict):
+            yield number, "invalid JSON: expected an object"
+            continue
+        yield number, record
+
+
+async def iter_csv(lines: AsyncIterator[str | None],
+                   max_length: int = MAX_RECORD_LENGTH):
+    """
+    Converte linhas CSV em registros usando a primeira linha como cabeçalho.
+    Campos entre aspas podem conter quebras de linha: as linhas são
+    acumuladas enquanto houver aspas abertas, contando as aspas de cada
+    linha uma única vez. Registros maiores que max_length (ex.: depois de
+    uma aspa sem par) são descartados e reportados.
+    Args:
+        lines: Iterador de linhas (None para as descartadas por
+            iter_lines).
+        max_length: Tamanho máximo de um registro, em caracteres.
+    Returns:
+        Iterador de tuplas (número do registro, registro ou mensagem de erro).
+    """
+    header = None
+    number = 0
+    pending = []
+    length = 0
+    quoted = False
+    async for line in lines:
+        if line is not None:
+            pending.append(line)
+            length += len(line) + 1
+            if line.count('"') % 2:
+                quoted = not quoted
+        if line is None or length > max_length:
+            # Linha descartada ou registro grande demais: perde o registro
+            pending, length, quoted = [], 0, False
+            if header is None:
+                yield 0, "header too long"
+                return
+            number += 1
+            yield number, "record too long"
+            continue
+        if quoted:
+            continue
+        text = "\n".join(pending)
+        pending, length = [], 0
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        number += 1
+        if len(values) != len(header):
+            yield number, (f"expected {len(header)} columns, "
+                           f"got {len(values)}")
+            continue
+        yield number, dict(zip(header, values))
+    if pending:
+        yield number + 1, "unterminated quoted field"
@@ -2,13 +2,45 @@
 Modelos ORM relacionados à tabela de propriedades.
 Define a estrutura da entidade Properties para persistência no banco de dados.
 """
-from sqlalchemy import Integer, String, Numeric
-from sqlalchemy.orm import mapped_column, Mapped, relationship
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import (
+    Computed, DateTime, Index, Integer, String, Numeric, func)
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import mapped_column, Mapped, query_expression, relationship
 from ..db import Base
 
+# Configuração de busca textual (português sem acentos) criada na migração
+SEARCH_CONFIG = "pt_unaccent"
+
+SEARCH_VECTOR = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', title), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', address_neighborhood || ' ' "
+    f"|| address_city || ' ' || address_state), 'B') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', address_street), 'C')"
+)
+
+
+def _trigram_index(column: str) -> Index:
+    return Index(
+        f"ix_properties_{column}_trgm",
+        column,
+        postgresql_using="gin",
+        postgresql_ops={column: "gin_trgm_ops"},
+    )
+
 
 class Properties(Base):
     __tablename__ = "properties"
+    __table_args__ = (
+        Index("ix_properties_price_id", "price_per_night", "property_id"),
+        Index("ix_properties_search_vector", "search_vector",
+              postgresql_using="gin"),
+        _trigram_index("address_street"),
+        _trigram_index("address_neighborhood"),
+        _trigram_index("address_city"),
+        _trigram_index("address_state"),
+    )
 
     property_id: Mapped[int] = mapped_column(
         Integer,
@@ -66,5 +98,34 @@ class Properties(Base):
         nullable=False
     )
 
+    # Incrementada a cada alteração: base do ETag das leituras
+    version: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False,
+        server_default="1"
+    )
+
+    # Data da última alteração: Last-Modified das leituras
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now()
+    )
+
+    # Coluna gerada pelo banco; deferred para não trafegar nas consultas
+    search_vector: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR,
+        Computed(SEARCH_VECTOR, persisted=True),
+        deferred=True
+    )
+
+    # Relevância calculada apenas nas consultas de busca textual
+    search_rank: Mapped[Optional[float]] = query_expression()
+
+    # Janelas de estadia livres, calculadas apenas na busca por datas
+    # flexíveis (lista de {"start_date", "end_date"})
+    available_windows: Mapped[Optional[list]] = query_expression()
+
+    # Carregada só sob demanda, com selectinload (include=reservations)
     reservations: Mapped[list["Reservations"]] = relationship(
-        back_populates="property")
+        back_populates="property", order_by="Reservations.start_date")
@@ -3,57 +3,190 @@ Funções de acesso e manipulação de dados das propriedades.
 Implementa operações CRUD e consultas relacionadas à entidade Properties.
 """
 from datetime import date
+from decimal import Decimal
 from typing import Optional
+import asyncpg
 from ..reservations import models as reservation_models
+from sqlalchemy import (
+    Date, and_, bindparam, func, insert, literal_column, or_, text, tuple_,
+    update)
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
+from sqlalchemy.orm import selectinload, with_expression
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from .. import availability, cache
 from . import models, schemas
 
+# Cache de leituras por ID, invalidado nas escritas em todos os workers
+property_cache = cache.entity_cache("property", schemas.PropertyVersion)
+
+# Chaves de ordenação aceitas na paginação por cursor. A chave primária
+# entra sempre por último para desempatar e tornar a ordem total.
+SORT_KEYS = {
+    "property_id": (models.Properties.property_id,),
+    "price_per_night": (models.Properties.price_per_night,
+                        models.Properties.property_id),
+}
+
+# Colunas da listagem, na ordem dos campos de PropertyResponse
+LIST_COLUMNS = tuple(
+    models.Properties.__table__.c[name]
+    for name in schemas.PropertyRow.__annotations__
+    if name in models.Properties.__table__.c)
+
+
+def list_columns(fields: Optional[tuple] = None, sort: str = "property_id"):
+    """
+    Colunas da listagem projetadas nos campos pedidos em fields=.
+    A chave de ordenação (para o cursor) e o ID entram sempre.
+    Args:
+        fields: Campos pedidos (opcional; None para todos).
+        sort: Chave de ordenação da consulta (ver SORT_KEYS).
+    Returns:
+        Tupla de colunas, na ordem de LIST_COLUMNS.
+    """
+    if fields is None:
+        return LIST_COLUMNS
+    required = {column.key for column in SORT_KEYS[sort]} | {"property_id"}
+    return tuple(column for column in LIST_COLUMNS
+                 if column.key in fields or column.key in required)
+
 
 async def create_property(
         db: AsyncSession,
-        property_: schemas.PropertyCreate):
+        property_: schemas.PropertyCreate,
+        before_commit=None):
     """
     Cria uma nova propriedade no banco de dados.
     Args:
         db: Sessão assíncrona do banco de dados.
         property_: Dados da propriedade a ser criada.
+        before_commit: Corrotina chamada com a linha criada antes do
+            commit, na mesma transação (opcional).
     Returns:
-        Instância da propriedade criada.
-    """
-    db_property = models.Properties(
-        title=property_.title,
-        address_street=property_.address_street,
-        address_number=property_.address_number,
-        address_neighborhood=property_.address_neighborhood,
-        address_city=property_.address_city,
-        address_state=property_.address_state,
-        country=property_.country,
-        rooms=property_.rooms,
-        capacity=property_.capacity,
-        price_per_night=property_.price_per_night,
-    )
-    db.add(db_property)
+        Linha (LIST_COLUMNS) da propriedade criada, vinda do RETURNING do
+        próprio INSERT.
+    """
+    result = await db.execute(
+        insert(models.Properties)
+        .values(**property_.model_dump())
+        .returning(*LIST_COLUMNS))
+    row = result.one()
+    if before_commit is not None:
+        await before_commit(row)
     await db.commit()
-    await db.refresh(db_property)
-    return db_property
+    availability.changed([row.property_id])
+    return row
+
+
+# Colunas carregadas via COPY na importação em lote
+BULK_COLUMNS = (
+    "property_id",
+    "title",
+    "address_street",
+    "address_number",
+    "address_neighborhood",
+    "address_city",
+    "address_state",
+    "country",
+    "rooms",
+    "capacity",
+    "price_per_night",
+)
+
+# Erros de dados no COPY: recusados pelo PostgreSQL ou pela codificação
+# do asyncpg (ex.: inteiro fora do int32)
+BULK_ERRORS = (asyncpg.PostgresError, ArithmeticError, ValueError)
+
+
+async def bulk_insert_properties(
+        db: AsyncSession,
+        properties: list[schemas.PropertyCreate]) -> list[int | str]:
+    """
+    Insere várias propriedades com COPY, sem confirmar a transação.
+    Os IDs são reservados antes na sequência, já que COPY não tem
+    RETURNING. Se o banco recusar o bloco, ele é desfeito e as linhas são
+    copiadas uma a uma, cada uma no seu savepoint, para que só as
+    recusadas fiquem de fora.
+    Args:
+        db: Sessão assíncrona do banco de dados.
+        properties: Propriedades já validadas.
+    Returns:
+        ID criado ou mensagem de erro de cada propriedade, na mesma ordem
+        de properties.
+    """
+    if not properties:
+        return []
+    conn = await db.connection()
+    result = await conn.execute(
+        text(
+            "SELECT nextval(pg_get_serial_sequence("
+            "'properties', 'property_id')) "
+            "FROM generate_series(1, :count)"
+        ),
+        {"count": len(properties)},
+    )
+    ids = list(result.scalars())
+
+    records = [
+        (
+            property_id,
+            property_.title,
+            property_.address_street,
+            property_.address_number,
+            property_.address_neighborhood,
+            property_.address_city,
+            property_.address_state,
+            property_.country,
+            property_.rooms,
+            property_.capacity,
+            Decimal(str(property_.price_per_night)),
+        )
+        for property_id, property_ in zip(ids, properties)
+    ]
+
+    async def copy(records):
+        async with db.begin_nested():
+            # O SAVEPOINT só é emitido quando a sessão entrega a conexão
+            conn = await db.connection()
+            raw = await conn.get_raw_connection()
+            await raw.driver_connection.copy_records_to_table(
+                models.Properties.__tablename__,
+                records=records,
+                columns=BULK_COLUMNS,
+            )
+
+    try:
+        await copy(records)
+        return ids
+    except BULK_ERRORS:
+        pass
+    results = []
+    for property_id, record in zip(ids, records):
+        try:
+            await copy([record])
+        except BULK_ERRORS as exc:
+            results.append(str(exc).splitlines()[0])
+        else:
+            results.append(property_id)
+    return results
 
 
 async def get_properties(
         db: AsyncSession,
-        skip: int = 0,
+        after: Optional[list] = None,
         limit: int = 10):
     """
-    Retorna uma lista de propriedades com paginação.
+    Retorna uma lista de propriedades com paginação por keyset.
     Args:
         db: Sessão assíncrona do banco de dados.
-        skip: Número de registros a pular.
+        after: ID do último item da página anterior, como lista.
         limit: Número máximo de registros a retornar.
     Returns:
         Lista de propriedades.
     """
     result = await db.execute(
-        select(models.Properties).offset(skip).limit(limit))
+        _paginate(select(models.Properties), after=after, limit=limit))
     return result.scalars().all()
 
 
@@ -75,40 +208,79 @@ async def get_property_by_id(
     return result.scalars().first()
 
 
-async def get_available_properties(
-    db: AsyncSession,
-    start_date: date,
-    end_date: date
-):
+async def get_property_with_reservations(
+        db: AsyncSession,
+        property_id: int,
+        since: date):
     """
-    Retorna propriedades disponíveis para reserva em um intervalo de datas.
+    Busca uma propriedade com as reservas que terminam depois de since.
+    As reservas vêm por selectinload, em uma única consulta a mais, e só
+    com as colunas de ReservationWindow: o relacionamento nunca é lido
+    por lazy load, que sob AsyncSession falharia.
     Args:
         db: Sessão assíncrona do banco de dados.
-        start_date: Data inicial.
-        end_date: Data final.
+        property_id: ID da propriedade.
+        since: Reservas com end_date até essa data ficam de fora.
     Returns:
-        Lista de propriedades disponíveis.
+        Instância da propriedade, com reservations carregado, ou None.
     """
-    subquery = (
-        select(reservation_models.Reservations.property_id)
-        .filter(
-            reservation_models.Reservations.start_date < end_date,
-            reservation_models.Reservations.end_date > start_date
-        )
-        .distinct()
-    )
-
-    query = (
+    reservations = reservation_models.Reservations
+    result = await db.execute(
         select(models.Properties)
-        .filter(models.Properties.property_id.notin_(subquery))
+        .options(
+            selectinload(models.Properties.reservations.and_(
+                reservations.end_date > since))
+            .load_only(reservations.reservation_id, reservations.start_date,
+                       reservations.end_date))
+        .filter(models.Properties.property_id == property_id)
+        # Uma instância já na sessão teria a coleção sem o filtro
+        .execution_options(populate_existing=True)
     )
-
-    result = await db.execute(query)
-    return result.scalars().all()
+    return result.scalars().first()
 
 
-async def filter_properties(
+async def get_upcoming_reservations(
         db: AsyncSession,
+        property_ids: list[int],
+        since: date):
+    """
+    Busca as reservas que terminam depois de since de várias propriedades
+    em uma consulta (a mesma que o selectinload emitiria, sem hidratar
+    objetos ORM), para a listagem com include=reservations.
+    Args:
+        db: Sessão assíncrona do banco de dados.
+        property_ids: IDs das propriedades da página.
+        since: Reservas com end_date até essa data ficam de fora.
+    Returns:
+        Dicionário property_id -> lista de dicionários no formato de
+        schemas.ReservationWindowRow, por data de entrada.
+    """
+    if not property_ids:
+        return {}
+    reservations = reservation_models.Reservations
+    result = await db.execute(
+        select(
+            reservations.property_id,
+            reservations.reservation_id,
+            reservations.start_date,
+            reservations.end_date,
+        )
+        .filter(reservations.property_id.in_(property_ids),
+                reservations.end_date > since)
+        .order_by(reservations.property_id, reservations.start_date)
+    )
+    windows = {}
+    for row in result:
+        windows.setdefault(row.property_id, []).append({
+            "reservation_id": row.reservation_id,
+            "start_date": row.start_date,
+            "end_date": row.end_date,
+        })
+    return windows
+
+
+def _apply_filters(
+        query,
         street: Optional[str] = None,
         neighborhood: Optional[str] = None,
         city: Optional[str] = None,
@@ -116,16 +288,15 @@ async def filter_properties(
         max_price: Optional[float] = None,
         min_capacity: Optional[int] = None):
     """
-    Filtra propriedades por critérios como endereço, preço e capacidade.
+    Aplica à consulta os filtros de localização, preço e capacidade.
     Args:
-        db: Sessão assíncrona do banco de dados.
+        query: Consulta sobre Properties.
         street, neighborhood, city, state: Filtros de localização.
         max_price: Preço máximo por noite.
         min_capacity: Capacidade mínima.
     Returns:
-        Lista de propriedades filtradas.
+        Consulta filtrada.
     """
-    query = select(models.Properties)
     if street:
         query = query.filter(
             models.Properties.address_street.ilike(f"%{street}%"))
@@ -144,6 +315,351 @@ async def filter_properties(
     if min_capacity:
         query = query.filter(
             models.Properties.capacity >= min_capacity)
+    return query
+
+
+def _paginate(
+        query,
+        sort: str = "property_id",
+        after: Optional[list] = None,
+        limit: Optional[int] = None):
+    """
+    Aplica ordenação e paginação por keyset à consulta.
+    Args:
+        query: Consulta sobre Properties.
+        sort: Chave de ordenação (ver SORT_KEYS).
+        after: Valores da chave do último item da página anterior.
+        limit: Número máximo de registros a retornar.
+    Returns:
+        Consulta ordenada e paginada.
+    """
+    columns = SORT_KEYS[sort]
+    if after is not None:
+        query = query.filter(tuple_(*columns) > tuple_(*after))
+    query = query.order_by(*columns)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+async def get_properties_by_ids(
+        db: AsyncSession,
+        property_ids: list[int]):
+    """
+    Busca capacidade e preço de várias propriedades em uma consulta.
+    Args:
+        db: Sessão assíncrona do banco de dados.
+        property_ids: IDs das propriedades.
+    Returns:
+        Dicionário property_id -> linha (property_id, capacity,
+        price_per_night).
+    """
+    if not property_ids:
+        return {}
+    result = await db.execute(
+        select(
+            models.Properties.property_id,
+            models.Properties.capacity,
+            models.Properties.price_per_night,
+        ).filter(models.Properties.property_id.in_(set(property_ids)))
+    )
+    return {row.property_id: row for row in result}
+
+
+async def get_property_cached(
+        db: AsyncSession,
+        property_id: int):
+    """
+    Busca uma propriedade pelo ID passando pelo cache.
+    O valor em cache é um PropertyVersion desacoplado da sessão.
+    Args:
+        db: Sessão assíncrona do banco de dados.
+        property_id: ID da propriedade.
+    Returns:
+        Dados da propriedade ou None.
+    """
+    async def load():
+        db_property = await get_property_by_id(db, property_id)
+        if not db_property:
+            return None
+        return schemas.PropertyVersion.model_validate(db_property)
+
+    return await property_cache.get_or_load(property_id, load)
+
+
+async def _get_properties_in_order(db: AsyncSession, property_ids: list[int],
+                                   columns=LIST_COLUMNS):
+    """
+    Busca propriedades pelos IDs, preservando a ordem recebida.
+    Args:
+        db: Sessão assíncrona do banco de dados.
+        property_ids: IDs na ordem desejada.
+        columns: Colunas lidas (devem incluir property_id).
+    Returns:
+        Linhas das propriedades (IDs inexistentes são ignorados).
+    """
+    if not property_ids:
+        return []
+    result = await db.execute(
+        select(*columns)
+        .filter(models.Properties.property_id.in_(property_ids)))
+    by_id = {row.property_id: row for row in result}
+    return [by_id[property_id] for property_id in property_ids
+            if property_id in by_id]
+
+
+async def get_available_properties(
+    db: AsyncSession,
+    start_date: date,
+    end_date: date,
+    neighborhood: Optional[str] = None,
+    city: Optional[str] = None,
+    state: Optional[str] = None,
+    max_price: Optional[float] = None,
+    min_capacity: Optional[int] = None,
+    sort: str = "property_id",
+    after: Optional[list] = None,
+    limit: Optional[int] = None,
+    fields: Optional[tuple] = None
+):
+    """
+    Retorna propriedades disponíveis para reserva em um intervalo de datas.
+    Com AVAILABILITY_ENGINE=numpy e sem filtros de texto, os IDs vêm do
+    índice em memória e só as linhas da página são lidas do banco.
+    Senão, usa um anti-join (NOT EXISTS) no calendário de ocupação, uma
+    leitura por intervalo na chave (property_id, night), com paginação por
+    keyset para que cada página custe proporcional ao seu tamanho.
+    Args:
+        db: Sessão assíncrona do banco de dados.
+        start_date: Data inicial.
+        end_date: Data final.
+        neighborhood, city, state: Filtros de localização.
+        max_price: Preço máximo por noite.
+        min_capacity: Capacidade mínima.
+        sort: Chave de ordenação (ver SORT_KEYS).
+        after: Valores da chave do último item da página anterior.
+        limit: Número máximo de registros a retornar.
+        fields: Campos pedidos (opcional; ver list_columns).
+    Returns:
+        Linhas (tuplas com as colunas de list_columns) das propriedades
+        disponíveis, sem hidratar objetos ORM.
+    """
+    columns = list_columns(fields, sort)
+    if not (neighborhood or city or state):
+        property_ids = await availability.find_available(
+            start_date, end_date, max_price=max_price,
+            min_capacity=min_capacity, sort=sort, after=after, limit=limit)
+        if property_ids is not None:
+            return await _get_properties_in_order(db, property_ids, columns)
+
+    calendar = reservation_models.PropertyCalendar
+    booked = (
+        select(calendar.night)
+        .filter(
+            calendar.property_id == models.Properties.property_id,
+            calendar.night >= start_date,
+            calendar.night < end_date,
+        )
+        .exists()
+    )
+
+    query = _apply_filters(
+        select(*columns).filter(~booked),
+        neighborhood=neighborhood,
+        city=city,
+        state=state,
+        max_price=max_price,
+        min_capacity=min_capacity,
+    )
+    query = _paginate(query, sort=sort, after=after, limit=limit)
+
+    result = await db.execute(query)
+    return result.all()
+
+
+async def get_flexible_availability(
+    db: AsyncSession,
+    windows: list[tuple[date, date]],
+    neighborhood: Optional[str] = None,
+    city: Optional[str] = None,
+    state: Optional[str] = None,
+    max_price: Optional[float] = None,
+    min_capacity: Optional[int] = None,
+    sort: str = "property_id",
+    after: Optional[list] = None,
+    limit: Optional[int] = None
+):
+    """
+    Retorna as propriedades com pelo menos uma janela de estadia livre e,
+    para cada uma, todas as janelas livres entre as pedidas.
+    Resolve todas as janelas em uma única consulta: cada propriedade é
+    cruzada com um unnest das janelas, descartando as que têm noite ocupada
+    no calendário (leitura por intervalo na chave (property_id, night)).
+    A página é escolhida primeiro, pelo índice da ordenação, e as janelas
+    livres só são agregadas para as propriedades da página.
+    Args:
+        db: Sessão assíncrona do banco de dados.
+        windows: Janelas (start_date, end_date) candidatas.
+        neighborhood, city, state: Filtros de localização.
+        max_price: Preço máximo por noite.
+        min_capacity: Capacidade mínima.
+        sort: Chave de ordenação (ver SORT_KEYS).
+        after: Valores da chave do último item da página anterior.
+        limit: Número máximo de registros a retornar.
+    Returns:
+        Lista de propriedades com available_windows preenchido.
+    """
+    starts, ends = map(list, zip(*windows))
+    stay = func.unnest(
+        bindparam("starts", starts, type_=ARRAY(Date)),
+        bindparam("ends", ends, type_=ARRAY(Date)),
+    ).table_valued("start_date", "end_date").render_derived(name="stay")
+
+    calendar = reservation_models.PropertyCalendar
+    booked = (
+        select(calendar.night)
+        .filter(
+            calendar.property_id == models.Properties.property_id,
+            calendar.night >= stay.c.start_date,
+            calendar.night < stay.c.end_date,
+        )
+        # Propriedade e janela vêm das consultas externas
+        .correlate_except(calendar)
+        .exists()
+    )
+    available_windows = (
+        select(func.json_agg(aggregate_order_by(
+            func.json_build_object(
+                "start_date", stay.c.start_date,
+                "end_date", stay.c.end_date),
+            stay.c.start_date, stay.c.end_date)))
+        .filter(~booked)
+        .scalar_subquery()
+    )
+
+    query = _apply_filters(
+        select(models.Properties)
+        .options(with_expression(
+            models.Properties.available_windows, available_windows))
+        .filter(select(stay.c.start_date).filter(~booked).exists()),
+        neighborhood=neighborhood,
+        city=city,
+        state=state,
+        max_price=max_price,
+        min_capacity=min_capacity,
+    )
+    query = _paginate(query, sort=sort, after=after, limit=limit)
+
+    result = await db.execute(query)
+    return result.scalars().all()
+
+
+async def get_booked_nights(
+        db: AsyncSession,
+        property_id: int,
+        start_date: date,
+        end_date: date):
+    """
+    Retorna as noites ocupadas de uma propriedade no intervalo
+    [start_date, end_date), lidas do calendário de ocupação.
+    Args:
+        db: Sessão assíncrona do banco de dados.
+        property_id: ID da propriedade.
+        start_date: Data inicial.
+        end_date: Data final (exclusiva).
+    Returns:
+        Lista de datas ocupadas, em ordem.
+    """
+    calendar = reservation_models.PropertyCalendar
+    result = await db.execute(
+        select(calendar.night)
+        .filter(
+            calendar.property_id == property_id,
+            calendar.night >= start_date,
+            calendar.night < end_date,
+        )
+        .order_by(calendar.night)
+    )
+    return result.scalars().all()
+
+
+async def filter_properties(
+        db: AsyncSession,
+        street: Optional[str] = None,
+        neighborhood: Optional[str] = None,
+        city: Optional[str] = None,
+        state: Optional[str] = None,
+        max_price: Optional[float] = None,
+        min_capacity: Optional[int] = None,
+        sort: str = "property_id",
+        after: Optional[list] = None,
+        limit: Optional[int] = None,
+        fields: Optional[tuple] = None):
+    """
+    Filtra propriedades por critérios como endereço, preço e capacidade.
+    Args:
+        db: Sessão assíncrona do banco de dados.
+        street, neighborhood, city, state: Filtros de localização.
+        max_price: Preço máximo por noite.
+        min_capacity: Capacidade mínima.
+        sort: Chave de ordenação (ver SORT_KEYS).
+        after: Valores da chave do último item da página anterior.
+        limit: Número máximo de registros a retornar.
+        fields: Campos pedidos (opcional; ver list_columns).
+    Returns:
+        Linhas (tuplas com as colunas de list_columns e version) das
+        propriedades filtradas, sem hidratar objetos ORM.
+    """
+    query = _apply_filters(
+        select(*list_columns(fields, sort), models.Properties.version),
+        street=street,
+        neighborhood=neighborhood,
+        city=city,
+        state=state,
+        max_price=max_price,
+        min_capacity=min_capacity,
+    )
+    query = _paginate(query, sort=sort, after=after, limit=limit)
+
+    result = await db.execute(query)
+    return result.all()
+
+
+async def search_properties(
+        db: AsyncSession,
+        q: str,
+        after: Optional[list] = None,
+        limit: int = 10):
+    """
+    Busca textual nas propriedades por título e endereço, sem acentos.
+    Usa a coluna gerada search_vector (índice GIN) e ordena por relevância,
+    com paginação por keyset sobre (relevância, ID).
+    Args:
+        db: Sessão assíncrona do banco de dados.
+        q: Texto da busca (sintaxe de websearch_to_tsquery).
+        after: Relevância e ID do último item da página anterior.
+        limit: Número máximo de registros a retornar.
+    Returns:
+        Lista de propriedades com search_rank preenchido.
+    """
+    ts_query = func.websearch_to_tsquery(
+        literal_column(f"'{models.SEARCH_CONFIG}'::regconfig"), q)
+    rank = func.ts_rank_cd(models.Properties.search_vector, ts_query)
+
+    query = (
+        select(models.Properties)
+        .options(with_expression(models.Properties.search_rank, rank))
+        .filter(models.Properties.search_vector.op("@@")(ts_query))
+    )
+    if after is not None:
+        after_rank, after_id = after
+        query = query.filter(or_(
+            rank < after_rank,
+            and_(rank == after_rank,
+                 models.Properties.property_id > after_id)
+        ))
+    query = query.order_by(
+        rank.desc(), models.Properties.property_id).limit(limit)
 
     result = await db.execute(query)
     return result.scalars().all()
@@ -152,26 +668,42 @@ async def filter_properties(
 async def update_property(
         db: AsyncSession,
         property_id: int,
-        property_update: schemas.PropertyUpdate):
+        property_update: schemas.PropertyUpdate,
+        before_commit=None):
     """
     Atualiza os dados de uma propriedade existente.
     Args:
         db: Sessão assíncrona do banco de dados.
         property_id: ID da propriedade.
         property_update: Dados para atualização.
+        before_commit: Corrotina chamada com a linha atualizada antes do
+            commit, na mesma transação (opcional).
     Returns:
-        Instância da propriedade atualizada ou None.
+        Linha (LIST_COLUMNS) da propriedade atualizada ou None.
     """
-    db_property = await get_property_by_id(db, property_id)
-    if not db_property:
-        return None
-
-    for key, value in property_update.dict(exclude_unset=True).items():
-        setattr(db_property, key, value)
+    changes = property_update.model_dump(exclude_unset=True)
+    if not changes:
+        result = await db.execute(
+            select(*LIST_COLUMNS).filter(
+                models.Properties.property_id == property_id))
+        return result.first()
 
+    # UPDATE ... RETURNING: sem SELECT antes nem depois da escrita. A
+    # nova versão muda o ETag das leituras da propriedade e das listagens
+    result = await db.execute(
+        update(models.Properties)
+        .where(models.Properties.property_id == property_id)
+        .values(**changes,
+                version=models.Properties.version + 1,
+                updated_at=func.now())
+        .returning(*LIST_COLUMNS))
+    row = result.first()
+    if row and before_commit is not None:
+        await before_commit(row)
     await db.commit()
-    await db.refresh(db_property)
-    return db_property
+    if row:
+        await property_cache.invalidate(property_id)
+    return row
 
 
 async def delete_property(
@@ -191,4 +723,5 @@ async def delete_property(
 
     await db.delete(db_property)
     await db.commit()
+    await property_cache.invalidate(property_id)
     return db_property
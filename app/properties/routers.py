@@ -3,9 +3,14 @@ Rotas da API para operações relacionadas a propriedades.
 Define endpoints REST para criação, listagem e consulta de propriedades.
 """
 from datetime import date
-from fastapi import APIRouter, Depends
+from fastapi import (
+    APIRouter, Depends, Header, HTTPException, Query, Request, Response)
 from sqlalchemy.ext.asyncio import AsyncSession
-from ..db import get_db
+from .. import http_cache
+from ..db import get_db, get_read_db
+from ..idempotency import service as idempotency
+from ..responses import json_response
+from ..settings import settings
 from . import schemas, service
 
 router = APIRouter(prefix="/properties", tags=["Properties"])
@@ -13,91 +18,322 @@ router = APIRouter(prefix="/properties", tags=["Properties"])
 
 @router.post("/", response_model=schemas.PropertyResponse)
 async def create_property(property_in: schemas.PropertyCreate,
+                          idempotency_key: str | None = Header(
+                              None, max_length=255),
                           db: AsyncSession = Depends(get_db)):
     """
     Endpoint para criar uma nova propriedade.
     Args:
         property_in: Dados da propriedade.
+        idempotency_key: Cabeçalho Idempotency-Key (opcional); repetições
+            com a mesma chave recebem a resposta da primeira execução.
         db: Sessão do banco de dados.
     Returns:
         Propriedade criada.
     """
-    return await service.create_property_service(db, property_in)
+    return await idempotency.run_idempotent(
+        db, "POST /properties/", idempotency_key, property_in,
+        schemas.PropertyResponse,
+        lambda before_commit: service.create_property_service(
+            db, property_in, before_commit))
 
 
-@router.get("/", response_model=list[schemas.PropertyResponse])
+@router.post("/bulk", response_model=schemas.BulkImportResult)
+async def bulk_import_properties(request: Request,
+                                 file_format: str | None = Query(
+                                     None, alias="format",
+                                     pattern="^(ndjson|csv)$"),
+                                 db: AsyncSession = Depends(get_db)):
+    """
+    Endpoint para importar propriedades em lote.
+    O corpo é lido em streaming: NDJSON (um objeto por linha) ou CSV com
+    cabeçalho, conforme o parâmetro format ou o Content-Type.
+    Args:
+        request: Requisição com o arquivo no corpo.
+        file_format: "ndjson" ou "csv" (opcional).
+        db: Sessão do banco de dados.
+    Returns:
+        IDs criados e erros por linha.
+    """
+    if file_format is None:
+        content_type = request.headers.get("content-type", "")
+        if "csv" in content_type:
+            file_format = "csv"
+        elif "ndjson" in content_type or "jsonl" in content_type:
+            file_format = "ndjson"
+        else:
+            raise HTTPException(
+                status_code=415,
+                detail="Use text/csv or application/x-ndjson")
+    return await service.bulk_import_properties_service(
+        db, request.stream(), file_format)
+
+
+@router.get("/", response_model=schemas.PropertyPage)
 async def list_properties(
-    skip: int = 0,
-    limit: int = 10,
+    request: Request,
+    cursor: str | None = None,
+    limit: int = Query(10, ge=1, le=100),
+    sort: schemas.PropertySort = "property_id",
     neighborhood: str | None = None,
     city: str | None = None,
     state: str | None = None,
     max_price: float | None = None,
     min_capacity: int | None = None,
-    db: AsyncSession = Depends(get_db)
+    fields: str | None = None,
+    include: schemas.PropertyInclude | None = None,
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Endpoint para listar propriedades com filtros e paginação.
+    Responde 304 quando o If-None-Match casa com o ETag da página,
+    calculado pelos IDs e versões das propriedades (e, com
+    include=reservations, pelas reservas futuras).
     Args:
-        skip, limit: Paginação.
+        request: Requisição (cabeçalhos condicionais).
+        cursor, limit: Paginação por cursor (next_cursor da página anterior).
+        sort: Chave de ordenação.
         neighborhood, city, state: Filtros de localização.
         max_price: Preço máximo.
         min_capacity: Capacidade mínima.
+        fields: Campos de cada item, separados por vírgula (ex.:
+            fields=property_id,title,address_city,price_per_night).
+        include: "reservations" para trazer as reservas futuras.
         db: Sessão do banco de dados.
     Returns:
-        Lista de propriedades.
+        Página de propriedades.
     """
-    return await service.list_properties_service(
+    page = await service.list_properties_service(
         db,
-        skip=skip,
+        cursor=cursor,
         limit=limit,
+        sort=sort,
         neighborhood=neighborhood,
         city=city,
         state=state,
         max_price=max_price,
         min_capacity=min_capacity,
+        fields=fields,
+        include=include,
     )
+    # Reservas mudam sem alterar a versão da propriedade: entram no ETag
+    # e a página segue a política mais curta da disponibilidade
+    headers = http_cache.cache_headers(
+        http_cache.make_etag(
+            page["fields"], include, page["next_cursor"],
+            *(f"{property_id}:{version}"
+              for property_id, version in page["versions"]),
+            *(f"{window['reservation_id']}:{window['start_date']}:"
+              f"{window['end_date']}"
+              for item in page["items"]
+              for window in item.get("upcoming_reservations", ()))),
+        settings.HTTP_CACHE_AVAILABILITY if include
+        else settings.HTTP_CACHE_PROPERTY_LIST)
+    if http_cache.is_not_modified(request, headers["ETag"]):
+        return http_cache.not_modified(headers)
+    # Linhas já no formato da resposta: serializa sem o response_model
+    return json_response(schemas.property_row_page, page, headers=headers)
 
 
-@router.get("/availability")
+@router.get("/availability", response_model=schemas.PropertyPage)
 async def get_property_availability(
     start_date: date,
     end_date: date,
-    db: AsyncSession = Depends(get_db)
+    neighborhood: str | None = None,
+    city: str | None = None,
+    state: str | None = None,
+    max_price: float | None = None,
+    min_capacity: int | None = None,
+    cursor: str | None = None,
+    limit: int = Query(10, ge=1, le=100),
+    sort: schemas.PropertySort = "property_id",
+    fields: str | None = None,
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Endpoint para consultar propriedades disponíveis em um intervalo de datas.
     Args:
         start_date: Data inicial.
         end_date: Data final.
+        neighborhood, city, state: Filtros de localização.
+        max_price: Preço máximo.
+        min_capacity: Capacidade mínima.
+        cursor, limit: Paginação por cursor (next_cursor da página anterior).
+        sort: Chave de ordenação.
+        fields: Campos de cada item, separados por vírgula (opcional).
         db: Sessão do banco de dados.
     Returns:
-        Lista de propriedades disponíveis.
+        Página de propriedades disponíveis.
     """
-    return await service.list_available_properties_service(
+    page = await service.list_available_properties_service(
         db,
         start_date,
-        end_date
+        end_date,
+        neighborhood=neighborhood,
+        city=city,
+        state=state,
+        max_price=max_price,
+        min_capacity=min_capacity,
+        cursor=cursor,
+        limit=limit,
+        sort=sort,
+        fields=fields
     )
+    # Linhas já no formato da resposta: serializa sem o response_model
+    return json_response(
+        schemas.property_row_page, page,
+        headers={"Cache-Control": settings.HTTP_CACHE_AVAILABILITY})
 
 
-@router.get("/{property_id}", response_model=schemas.PropertyResponse)
-async def get_property(property_id: int, db: AsyncSession = Depends(get_db)):
+@router.get("/availability/flexible",
+            response_model=schemas.FlexibleAvailabilityPage,
+            dependencies=[Depends(http_cache.cache_control(
+                settings.HTTP_CACHE_AVAILABILITY))])
+async def get_flexible_availability(
+    start_date: date | None = None,
+    end_date: date | None = None,
+    nights: int | None = Query(None, ge=1),
+    window: list[str] | None = Query(None),
+    neighborhood: str | None = None,
+    city: str | None = None,
+    state: str | None = None,
+    max_price: float | None = None,
+    min_capacity: int | None = None,
+    cursor: str | None = None,
+    limit: int = Query(10, ge=1, le=100),
+    sort: schemas.PropertySort = "property_id",
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Endpoint de busca por datas flexíveis.
+    Informe start_date, end_date e nights (qualquer estadia de nights
+    noites dentro do intervalo) ou uma ou mais janelas explícitas em
+    window=AAAA-MM-DD/AAAA-MM-DD.
+    Args:
+        start_date, end_date, nights: Intervalo e duração da estadia.
+        window: Janelas explícitas (repetível).
+        neighborhood, city, state: Filtros de localização.
+        max_price: Preço máximo.
+        min_capacity: Capacidade mínima.
+        cursor, limit: Paginação por cursor (next_cursor da página anterior).
+        sort: Chave de ordenação.
+        db: Sessão do banco de dados.
+    Returns:
+        Página de propriedades com as janelas livres de cada uma.
+    """
+    return await service.list_flexible_availability_service(
+        db,
+        start_date=start_date,
+        end_date=end_date,
+        nights=nights,
+        windows=window,
+        neighborhood=neighborhood,
+        city=city,
+        state=state,
+        max_price=max_price,
+        min_capacity=min_capacity,
+        cursor=cursor,
+        limit=limit,
+        sort=sort
+    )
+
+
+@router.get("/search", response_model=schemas.PropertySearchPage,
+            dependencies=[Depends(http_cache.cache_control(
+                settings.HTTP_CACHE_PROPERTY_LIST))])
+async def search_properties(
+    q: str = Query(..., min_length=1, max_length=255),
+    cursor: str | None = None,
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Endpoint de busca textual por título e endereço das propriedades.
+    Args:
+        q: Texto da busca (ex.: "casa capao redondo").
+        cursor, limit: Paginação por cursor (next_cursor da página anterior).
+        db: Sessão do banco de dados.
+    Returns:
+        Página de propriedades ordenadas por relevância.
+    """
+    return await service.search_properties_service(
+        db,
+        q,
+        cursor=cursor,
+        limit=limit
+    )
+
+
+@router.get("/{property_id}/calendar",
+            response_model=schemas.PropertyCalendar,
+            dependencies=[Depends(http_cache.cache_control(
+                settings.HTTP_CACHE_AVAILABILITY))])
+async def get_property_calendar(
+    property_id: int,
+    start_date: date = Query(..., alias="from"),
+    end_date: date = Query(..., alias="to"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Endpoint para consultar a ocupação de uma propriedade noite a noite.
+    Args:
+        property_id: ID da propriedade.
+        start_date: Data inicial (parâmetro from).
+        end_date: Data final, exclusiva (parâmetro to).
+        db: Sessão do banco de dados.
+    Returns:
+        Calendário com a disponibilidade de cada noite.
+    """
+    return await service.get_property_calendar_service(
+        db, property_id, start_date, end_date)
+
+
+@router.get("/{property_id}", response_model=schemas.PropertyDetail,
+            response_model_exclude_none=True)
+async def get_property(property_id: int,
+                       request: Request,
+                       response: Response,
+                       include: schemas.PropertyInclude | None = None,
+                       db: AsyncSession = Depends(get_read_db)):
     """
     Endpoint para buscar uma propriedade pelo ID.
+    Responde 304 quando If-None-Match (ou If-Modified-Since) indica que o
+    cliente já tem a versão atual.
     Args:
         property_id: ID da propriedade.
+        request: Requisição (cabeçalhos condicionais).
+        response: Resposta, para os cabeçalhos de cache.
+        include: "reservations" para trazer as reservas futuras.
         db: Sessão do banco de dados.
     Returns:
         Propriedade encontrada.
     """
-    return await service.get_property_service(db, property_id)
+    property_ = await service.get_property_service(db, property_id, include)
+    if include:
+        # updated_at não acompanha as reservas: só o ETag valida
+        last_modified = None
+        headers = http_cache.cache_headers(
+            http_cache.make_etag(
+                property_.property_id, property_.version, include,
+                *(f"{window.reservation_id}:{window.start_date}:"
+                  f"{window.end_date}"
+                  for window in property_.upcoming_reservations)),
+            settings.HTTP_CACHE_AVAILABILITY)
+    else:
+        last_modified = property_.updated_at
+        headers = http_cache.cache_headers(
+            http_cache.make_etag(property_.property_id, property_.version),
+            settings.HTTP_CACHE_PROPERTY, last_modified)
+    if http_cache.is_not_modified(request, headers["ETag"], last_modified):
+        return http_cache.not_modified(headers)
+    response.headers.update(headers)
+    return property_
 
 
 @router.put("/{property_id}", response_model=schemas.PropertyResponse)
 async def update_property(property_id: int,
                           property_update: schemas.PropertyUpdate,
-                          db: AsyncSession = Depends(get_property)):
+                          db: AsyncSession = Depends(get_db)):
     """
     Endpoint para atualizar uma propriedade existente.
     Args:
@@ -107,7 +343,8 @@ async def update_property(property_id: int,
     Returns:
         Propriedade atualizada.
     """
-    return await service.update_property_service(db, property_id, get_db)
+    return await service.update_property_service(db, property_id,
+                                                 property_update)
 
 
 @router.delete("/{property_id}")
@@ -2,8 +2,21 @@
 Schemas Pydantic para validação e transferência de dados das propriedades.
 Define os modelos usados nas operações da API de propriedades.
 """
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from datetime import date, datetime
+from pydantic import BaseModel, Field, TypeAdapter
+from typing import List, Literal, Optional
+from typing_extensions import TypedDict
+
+# Chaves de ordenação aceitas na listagem paginada
+PropertySort = Literal["property_id", "price_per_night"]
+
+# Relacionamentos opcionais das leituras (parâmetro include)
+PropertyInclude = Literal["reservations"]
+
+# Limites das colunas Integer e Numeric(10, 2) de properties
+INT32_MIN = -2**31
+INT32_MAX = 2**31 - 1
+MAX_PRICE = 99_999_999.99
 
 
 class PropertyBase(BaseModel):
@@ -28,10 +41,11 @@ class PropertyCreate(PropertyBase):
     Schema usado no POST /properties.
     Define campos obrigatórios para criação de uma propriedade.
     """
-    title: str = Field(..., min_length=1)
-    address_street: str = Field(..., min_length=1)
-    price_per_night: float = Field(..., ge=0)
-    pass
+    title: str = Field(..., min_length=1, max_length=255)
+    address_street: str = Field(..., min_length=1, max_length=255)
+    rooms: int = Field(..., ge=INT32_MIN, le=INT32_MAX)
+    capacity: int = Field(..., ge=INT32_MIN, le=INT32_MAX)
+    price_per_night: float = Field(..., ge=0, le=MAX_PRICE)
 
 
 class PropertyUpdate(BaseModel):
@@ -61,3 +75,169 @@ class PropertyResponse(PropertyBase):
 
     class Config:
         from_attributes = True
+
+
+class ReservationWindow(BaseModel):
+    """
+    Schema resumido de uma reserva: ID e intervalo [start_date, end_date).
+    """
+    reservation_id: int
+    start_date: date
+    end_date: date
+
+    class Config:
+        from_attributes = True
+
+
+class PropertyDetail(PropertyResponse):
+    """
+    Schema de retorno da leitura de propriedades.
+    Com include=reservations, traz as reservas futuras (que terminam
+    depois de hoje); senão, o campo fica de fora da resposta.
+    """
+    upcoming_reservations: Optional[List[ReservationWindow]] = None
+
+
+class PropertyVersion(PropertyDetail):
+    """
+    PropertyDetail com os campos de controle de versão, usados nos
+    cabeçalhos ETag e Last-Modified. É o valor guardado no cache; os
+    campos extras não aparecem no corpo das respostas.
+    """
+    version: int
+    updated_at: datetime
+
+
+class PropertyPage(BaseModel):
+    """
+    Schema de retorno paginado de propriedades.
+    next_cursor é nulo na última página.
+    """
+    items: List[PropertyDetail]
+    next_cursor: Optional[str] = None
+
+
+class ReservationWindowRow(TypedDict):
+    """
+    Formato de ReservationWindow para serialização direta.
+    """
+    reservation_id: int
+    start_date: date
+    end_date: date
+
+
+class PropertyRow(TypedDict, total=False):
+    """
+    Formato de PropertyResponse para serialização direta de linhas do
+    banco na listagem (ver app.responses). Com fields=, só os campos
+    pedidos estão presentes.
+    """
+    title: str
+    address_street: str
+    address_number: str
+    address_neighborhood: str
+    address_city: str
+    address_state: str
+    country: str
+    rooms: int
+    capacity: int
+    price_per_night: float
+    property_id: int
+    reservation: List[int]
+    upcoming_reservations: List[ReservationWindowRow]
+
+
+# Campos aceitos em fields= nas listagens, na ordem da resposta; as
+# reservas futuras dependem de include=reservations
+PROPERTY_FIELDS = tuple(name for name in PropertyRow.__annotations__
+                        if name != "upcoming_reservations")
+
+
+class PropertyRowPage(TypedDict):
+    """
+    Formato de PropertyPage com itens em PropertyRow.
+    """
+    items: List[PropertyRow]
+    next_cursor: Optional[str]
+
+
+property_row_page = TypeAdapter(PropertyRowPage)
+
+
+class StayWindow(BaseModel):
+    """
+    Schema de uma janela de estadia [start_date, end_date).
+    """
+    start_date: date
+    end_date: date
+
+
+class FlexibleAvailabilityResult(PropertyResponse):
+    """
+    Schema de retorno da busca por datas flexíveis.
+    Inclui as janelas livres da propriedade, em ordem de data.
+    """
+    available_windows: List[StayWindow]
+
+
+class FlexibleAvailabilityPage(BaseModel):
+    """
+    Schema de retorno paginado da busca por datas flexíveis.
+    next_cursor é nulo na última página.
+    """
+    items: List[FlexibleAvailabilityResult]
+    next_cursor: Optional[str] = None
+
+
+class CalendarDay(BaseModel):
+    """
+    Schema de uma noite no calendário de ocupação.
+    """
+    night: date
+    available: bool
+
+
+class PropertyCalendar(BaseModel):
+    """
+    Schema de retorno do calendário de uma propriedade.
+    Uma entrada por noite do intervalo [start_date, end_date).
+    """
+    property_id: int
+    start_date: date
+    end_date: date
+    days: List[CalendarDay]
+
+
+class PropertySearchResult(PropertyResponse):
+    """
+    Schema de retorno da busca textual.
+    Inclui a relevância da propriedade para o texto buscado.
+    """
+    search_rank: float
+
+
+class PropertySearchPage(BaseModel):
+    """
+    Schema de retorno paginado da busca textual.
+    next_cursor é nulo na última página.
+    """
+    items: List[PropertySearchResult]
+    next_cursor: Optional[str] = None
+
+
+class BulkRowError(BaseModel):
+    """
+    Erro de validação de uma linha na importação em lote.
+    """
+    row: int
+    message: str
+
+
+class BulkImportResult(BaseModel):
+    """
+    Schema de retorno da importação em lote de propriedades.
+    property_ids segue a ordem das linhas válidas do arquivo.
+    """
+    created: int
+    property_ids: List[int]
+    errors: List[BulkRowError]
@@ -3,61 +3,238 @@ Serviços e regras de negócio para propriedades.
 Orquestra operações entre repositórios e schemas, aplicando validações e lógica de negócio.
 """
 from fastapi import HTTPException
-from datetime import date
+from datetime import date, timedelta
+from decimal import InvalidOperation
+from typing import AsyncIterator
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
-from . import repository, schemas
+from .. import availability
+from ..jobs import repository as jobs_repo
+from ..pagination import decode_cursor, encode_cursor
+from ..responses import parse_fields, row_dicts
+from . import bulk, repository, schemas
+
+# Linhas validadas e enviadas ao banco por vez na importação em lote
+BULK_CHUNK_SIZE = 5000
+
+# Maior intervalo aceito no calendário de uma propriedade (dois anos)
+MAX_CALENDAR_DAYS = 731
+
+# Máximo de janelas candidatas na busca por datas flexíveis
+MAX_FLEXIBLE_WINDOWS = 366
+
+
+def _cursor_values(cursor: str | None, sort: str):
+    """
+    Converte o cursor recebido nos valores da chave de ordenação.
+    Args:
+        cursor: Cursor opaco retornado em next_cursor (opcional).
+        sort: Chave de ordenação da consulta atual.
+    Returns:
+        Lista de valores da chave ou None para a primeira página.
+    """
+    if not cursor:
+        return None
+    columns = repository.SORT_KEYS[sort]
+    try:
+        key, *values = decode_cursor(cursor)
+        if key != sort or len(values) != len(columns):
+            raise ValueError("Invalid cursor")
+        return [column.type.python_type(value)
+                for column, value in zip(columns, values)]
+    except (TypeError, ValueError, InvalidOperation):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _fields(fields: str | None):
+    """
+    Valida o parâmetro fields= das listagens.
+    Args:
+        fields: Campos separados por vírgula (opcional).
+    Returns:
+        Tupla de campos de schemas.PROPERTY_FIELDS ou None para todos.
+    """
+    try:
+        return parse_fields(fields, schemas.PROPERTY_FIELDS)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+def _page(rows, sort: str, limit: int):
+    """
+    Monta a página de resposta a partir de limit + 1 registros.
+    Args:
+        rows: Registros retornados pelo repositório.
+        sort: Chave de ordenação usada na consulta.
+        limit: Tamanho da página.
+    Returns:
+        Dicionário com itens e cursor da próxima página.
+    """
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(
+            sort,
+            *(getattr(last, column.key)
+              for column in repository.SORT_KEYS[sort]))
+    return {"items": items, "next_cursor": next_cursor}
 
 
 async def create_property_service(
     db: AsyncSession, 
-    property_in: schemas.PropertyCreate
+    property_in: schemas.PropertyCreate,
+    before_commit=None
 ):
     """
     Serviço para criar uma nova propriedade.
     Args:
         db: Sessão assíncrona do banco de dados.
         property_in: Dados da propriedade a ser criada.
+        before_commit: Chamado com a propriedade criada antes do commit,
+            na mesma transação (opcional; ver app.idempotency).
     Returns:
         Instância da propriedade criada.
     """
-    return await repository.create_property(db, property_in)
+    return await repository.create_property(db, property_in, before_commit)
+
+
+async def bulk_import_properties_service(
+    db: AsyncSession,
+    stream: AsyncIterator[bytes],
+    file_format: str
+):
+    """
+    Serviço para importar propriedades em lote a partir de NDJSON ou CSV.
+    As linhas são validadas e inseridas em blocos dentro de uma única
+    transação; linhas inválidas são reportadas e não impedem as demais.
+    Args:
+        db: Sessão assíncrona do banco de dados.
+        stream: Corpo da requisição.
+        file_format: "ndjson" ou "csv".
+    Returns:
+        IDs criados e erros por linha.
+    """
+    lines = bulk.iter_lines(stream)
+    records = (bulk.iter_csv(lines) if file_format == "csv"
+               else bulk.iter_ndjson(lines))
+
+    property_ids = []
+    errors = []
+    chunk = []
+    rows = []
+
+    async def insert_chunk():
+        results = await repository.bulk_insert_properties(db, chunk)
+        for row, result in zip(rows, results):
+            if isinstance(result, str):
+                errors.append({"row": row, "message": result})
+            else:
+                property_ids.append(result)
+        chunk.clear()
+        rows.clear()
+
+    async for row, record in records:
+        if isinstance(record, str):
+            errors.append({"row": row, "message": record})
+            continue
+        try:
+            chunk.append(schemas.PropertyCreate.model_validate(record))
+        except ValidationError as exc:
+            errors.append({"row": row, "message": "; ".join(
+                f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+                for error in exc.errors())})
+            continue
+        rows.append(row)
+        if len(chunk) >= BULK_CHUNK_SIZE:
+            await insert_chunk()
+    await insert_chunk()
+    await db.commit()
+    availability.changed(property_ids)
+    # Erros do banco chegam por bloco: volta à ordem das linhas
+    errors.sort(key=lambda error: error["row"])
+
+    return {
+        "created": len(property_ids),
+        "property_ids": property_ids,
+        "errors": errors,
+    }
 
 
 async def list_properties_service(
     db: AsyncSession,
-    skip: int = 0,
+    cursor: str | None = None,
     limit: int = 10,
+    sort: str = "property_id",
     neighborhood: str | None = None,
     city: str | None = None,
     state: str | None = None,
     max_price: float | None = None,
-    min_capacity: int | None = None
+    min_capacity: int | None = None,
+    fields: str | None = None,
+    include: str | None = None
 ):
     """
     Serviço para listar propriedades filtrando por diversos critérios.
     Args:
         db: Sessão assíncrona do banco de dados.
-        skip, limit: Paginação.
+        cursor, limit: Paginação por cursor.
+        sort: Chave de ordenação.
         neighborhood, city, state: Filtros de localização.
         max_price: Preço máximo.
         min_capacity: Capacidade mínima.
+        fields: Campos da resposta, separados por vírgula (opcional).
+        include: "reservations" para trazer as reservas futuras de cada
+            propriedade, em uma consulta para a página inteira.
     Returns:
-        Lista de propriedades.
+        Página de propriedades (dicionários no formato de
+        schemas.PropertyRow), cursor da próxima página e, para o ETag,
+        os campos projetados e os pares (property_id, version) da página.
     """
-    return await repository.filter_properties(
+    projection = _fields(fields)
+    rows = await repository.filter_properties(
         db,
         neighborhood=neighborhood,
         city=city,
         state=state,
         max_price=max_price,
         min_capacity=min_capacity,
+        sort=sort,
+        after=_cursor_values(cursor, sort),
+        limit=limit + 1,
+        fields=projection,
     )
+    page = _page(rows, sort, limit)
+    page["fields"] = projection
+    page["versions"] = [(row.property_id, row.version)
+                        for row in page["items"]]
+    page["items"] = row_dicts(page["items"], projection, reservation=[])
+    if include == "reservations":
+        windows = await repository.get_upcoming_reservations(
+            db, [property_id for property_id, _ in page["versions"]],
+            date.today())
+        for item, (property_id, _) in zip(page["items"], page["versions"]):
+            item["upcoming_reservations"] = windows.get(property_id, [])
+            if "reservation" in item:
+                item["reservation"] = [
+                    window["reservation_id"]
+                    for window in item["upcoming_reservations"]]
+    return page
 
 
 async def list_available_properties_service(
     db: AsyncSession,
     start_date: date,
-    end_date: date
+    end_date: date,
+    neighborhood: str | None = None,
+    city: str | None = None,
+    state: str | None = None,
+    max_price: float | None = None,
+    min_capacity: int | None = None,
+    cursor: str | None = None,
+    limit: int = 10,
+    sort: str = "property_id",
+    fields: str | None = None
 ):
     """
     Serviço para listar propriedades disponíveis em um intervalo de datas.
@@ -65,39 +242,252 @@ async def list_available_properties_service(
         db: Sessão assíncrona do banco de dados.
         start_date: Data inicial.
         end_date: Data final.
+        neighborhood, city, state: Filtros de localização.
+        max_price: Preço máximo.
+        min_capacity: Capacidade mínima.
+        cursor, limit: Paginação por cursor.
+        sort: Chave de ordenação.
+        fields: Campos da resposta, separados por vírgula (opcional).
     Returns:
-        Lista de propriedades disponíveis.
+        Página de propriedades disponíveis (dicionários no formato de
+        schemas.PropertyRow) e cursor da próxima página.
     """
     if end_date <= start_date:
         raise HTTPException(
             status_code=400,
             detail="End date must be after start date"
         )
+    projection = _fields(fields)
 
+    # Busca um item a mais para saber se existe próxima página
     available_properties = await repository.get_available_properties(
         db,
         start_date=start_date,
-        end_date=end_date
+        end_date=end_date,
+        neighborhood=neighborhood,
+        city=city,
+        state=state,
+        max_price=max_price,
+        min_capacity=min_capacity,
+        sort=sort,
+        after=_cursor_values(cursor, sort),
+        limit=limit + 1,
+        fields=projection
     )
+    page = _page(available_properties, sort, limit)
+    page["items"] = row_dicts(page["items"], projection, reservation=[])
+    return page
 
-    return available_properties
+
+def _flexible_windows(start_date: date | None, end_date: date | None,
+                      nights: int | None, windows: list[str] | None):
+    """
+    Monta as janelas candidatas da busca por datas flexíveis.
+    Args:
+        start_date, end_date, nights: Intervalo e duração da estadia; gera
+            todo check-in com a estadia inteira dentro do intervalo.
+        windows: Ou uma lista explícita no formato "AAAA-MM-DD/AAAA-MM-DD".
+    Returns:
+        Lista de tuplas (start_date, end_date), sem repetições.
+    """
+    if windows:
+        if start_date or end_date or nights:
+            raise HTTPException(
+                status_code=400,
+                detail="Use either window or start_date/end_date/nights")
+        candidates = []
+        for window in windows:
+            try:
+                start, end = (date.fromisoformat(part)
+                              for part in window.split("/"))
+            except ValueError:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Invalid window {window!r}, "
+                           "expected YYYY-MM-DD/YYYY-MM-DD")
+            if end <= start:
+                raise HTTPException(
+                    status_code=400,
+                    detail="End date must be after start date")
+            candidates.append((start, end))
+    else:
+        if not (start_date and end_date and nights):
+            raise HTTPException(
+                status_code=400,
+                detail="start_date, end_date and nights are required")
+        last_start = (end_date - start_date).days - nights
+        if last_start < 0:
+            raise HTTPException(
+                status_code=400,
+                detail="Date range is shorter than the stay")
+        candidates = [
+            (start_date + timedelta(days=offset),
+             start_date + timedelta(days=offset + nights))
+            for offset in range(min(last_start + 1, MAX_FLEXIBLE_WINDOWS + 1))
+        ]
+    candidates = sorted(set(candidates))
+    if len(candidates) > MAX_FLEXIBLE_WINDOWS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_FLEXIBLE_WINDOWS} windows per search")
+    return candidates
 
 
-async def get_property_service(db: AsyncSession, property_id: int):
+async def list_flexible_availability_service(
+    db: AsyncSession,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    nights: int | None = None,
+    windows: list[str] | None = None,
+    neighborhood: str | None = None,
+    city: str | None = None,
+    state: str | None = None,
+    max_price: float | None = None,
+    min_capacity: int | None = None,
+    cursor: str | None = None,
+    limit: int = 10,
+    sort: str = "property_id"
+):
+    """
+    Serviço para buscar disponibilidade em várias janelas de datas de uma
+    vez (ex.: "3 noites quaisquer em dezembro").
+    Args:
+        db: Sessão assíncrona do banco de dados.
+        start_date, end_date, nights: Intervalo e duração da estadia.
+        windows: Ou janelas explícitas "AAAA-MM-DD/AAAA-MM-DD".
+        neighborhood, city, state: Filtros de localização.
+        max_price: Preço máximo.
+        min_capacity: Capacidade mínima.
+        cursor, limit: Paginação por cursor.
+        sort: Chave de ordenação.
+    Returns:
+        Página de propriedades com as janelas livres de cada uma.
+    """
+    candidates = _flexible_windows(start_date, end_date, nights, windows)
+
+    # Busca um item a mais para saber se existe próxima página
+    properties = await repository.get_flexible_availability(
+        db,
+        candidates,
+        neighborhood=neighborhood,
+        city=city,
+        state=state,
+        max_price=max_price,
+        min_capacity=min_capacity,
+        sort=sort,
+        after=_cursor_values(cursor, sort),
+        limit=limit + 1
+    )
+    return _page(properties, sort, limit)
+
+
+async def search_properties_service(
+    db: AsyncSession,
+    q: str,
+    cursor: str | None = None,
+    limit: int = 10
+):
+    """
+    Serviço para busca textual de propriedades ordenada por relevância.
+    Args:
+        db: Sessão assíncrona do banco de dados.
+        q: Texto da busca.
+        cursor, limit: Paginação por cursor.
+    Returns:
+        Página de propriedades encontradas e cursor da próxima página.
+    """
+    after = None
+    if cursor:
+        try:
+            key, rank, property_id = decode_cursor(cursor)
+            if key != "search_rank":
+                raise ValueError("Invalid cursor")
+            after = [float(rank), int(property_id)]
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    # Busca um item a mais para saber se existe próxima página
+    found = await repository.search_properties(
+        db, q, after=after, limit=limit + 1)
+
+    items = found[:limit]
+    next_cursor = None
+    if len(found) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(
+            "search_rank", last.search_rank, last.property_id)
+    return {"items": items, "next_cursor": next_cursor}
+
+
+async def get_property_service(db: AsyncSession, property_id: int,
+                               include: str | None = None):
     """
     Serviço para buscar uma propriedade pelo ID.
     Args:
         db: Sessão assíncrona do banco de dados.
         property_id: ID da propriedade.
+        include: "reservations" para trazer as reservas futuras; essa
+            leitura não passa pelo cache, que não acompanha as reservas.
     Returns:
         Instância da propriedade ou exceção 404.
     """
-    property_ = await repository.get_property_by_id(db, property_id)
+    if include == "reservations":
+        db_property = await repository.get_property_with_reservations(
+            db, property_id, date.today())
+        if not db_property:
+            raise HTTPException(status_code=404, detail="Property not found")
+        property_ = schemas.PropertyVersion.model_validate(db_property)
+        property_.upcoming_reservations = [
+            schemas.ReservationWindow.model_validate(reservation)
+            for reservation in db_property.reservations]
+        property_.reservation = [
+            window.reservation_id
+            for window in property_.upcoming_reservations]
+        return property_
+
+    property_ = await repository.get_property_cached(db, property_id)
     if not property_:
         raise HTTPException(status_code=404, detail="Property not found")
     return property_
 
 
+async def get_property_calendar_service(db: AsyncSession, property_id: int,
+                                        start_date: date, end_date: date):
+    """
+    Serviço para montar o calendário de ocupação de uma propriedade.
+    Args:
+        db: Sessão assíncrona do banco de dados.
+        property_id: ID da propriedade.
+        start_date: Data inicial.
+        end_date: Data final (exclusiva).
+    Returns:
+        Calendário com a disponibilidade de cada noite do intervalo.
+    """
+    if end_date <= start_date:
+        raise HTTPException(
+            status_code=400,
+            detail="End date must be after start date"
+        )
+    days = (end_date - start_date).days
+    if days > MAX_CALENDAR_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Calendar range is limited to {MAX_CALENDAR_DAYS} days"
+        )
+    await get_property_service(db, property_id)
+
+    booked = set(await repository.get_booked_nights(
+        db, property_id, start_date, end_date))
+    nights = (start_date + timedelta(days=offset) for offset in range(days))
+    return {
+        "property_id": property_id,
+        "start_date": start_date,
+        "end_date": end_date,
+        "days": [{"night": night, "available": night not in booked}
+                 for night in nights],
+    }
+
+
 async def update_property_service(db: AsyncSession, property_id: int,
                                   property_update: schemas.PropertyUpdate):
     """
@@ -109,8 +499,17 @@ async def update_property_service(db: AsyncSession, property_id: int,
     Returns:
         Instância atualizada ou exceção 404.
     """
+    before_commit = None
+    if "price_per_night" in property_update.model_fields_set:
+        # O recálculo das reservas futuras pode tocar muitas linhas: fica
+        # para o worker em vez de segurar a resposta. O job entra na
+        # transação do UPDATE, então não há preço novo sem recálculo
+        async def before_commit(row):
+            await jobs_repo.enqueue(db, "reservations.recompute_totals",
+                                    {"property_id": property_id},
+                                    commit=False)
     updated = await repository.update_property(db, property_id,
-                                               property_update)
+                                               property_update, before_commit)
     if not updated:
         raise HTTPException(status_code=404, detail="Property not found")
     return updated
@@ -0,0 +1,35 @@
+"""
+Comando para reconstruir o calendário de ocupação (property_calendar) a
+partir da tabela de reservas.
+Uso: python -m app.reservations.calendar [--property-id ID]
+"""
+import argparse
+import asyncio
+from ..db import AsyncSessionLocal
+from . import repository
+
+
+async def rebuild(property_id: int | None = None) -> int:
+    """
+    Reconstrói o calendário de uma propriedade ou de todas.
+    Args:
+        property_id: ID da propriedade (opcional).
+    Returns:
+        Número de noites gravadas.
+    """
+    async with AsyncSessionLocal() as db:
+        return await repository.rebuild_calendar(db, property_id)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Rebuild the property_calendar table from reservations.")
+    parser.add_argument("--property-id", type=int,
+                        help="rebuild only this property")
+    args = parser.parse_args(argv)
+    nights = asyncio.run(rebuild(args.property_id))
+    print(f"property_calendar rebuilt: {nights} nights")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Formatação das reservas exportadas em streaming.
+Cada lote de linhas vindo do cursor vira um único bloco de bytes NDJSON ou
+CSV, para manter o custo por linha baixo e a memória constante.
+"""
+import csv
+import io
+from .repository import EXPORT_COLUMNS
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def csv_header() -> bytes:
+    """
+    Linha de cabeçalho do CSV exportado.
+    Returns:
+        Nomes das colunas em CSV.
+    """
+    return (",".join(EXPORT_COLUMNS) + "\r\n").encode()
+
+
+def to_ndjson(rows) -> bytes:
+    """
+    Junta um lote de objetos JSON, já serializados pelo banco, em NDJSON.
+    Args:
+        rows: Linhas com uma única coluna de texto JSON.
+    Returns:
+        Bloco de bytes UTF-8.
+    """
+    return "".join([row[0] + "\n" for row in rows]).encode()
+
+
+def to_csv(rows) -> bytes:
+    """
+    Converte um lote de linhas em CSV, sem cabeçalho.
+    Args:
+        rows: Linhas com as colunas de EXPORT_COLUMNS, nessa ordem.
+    Returns:
+        Bloco de bytes UTF-8.
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode()
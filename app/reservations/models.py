@@ -3,13 +3,36 @@ Modelos ORM relacionados à tabela de reservas.
 Define a estrutura da entidade Reservations para persistência no banco de dados.
 """
 from datetime import date
-from sqlalchemy import Integer, String, Numeric, Date, ForeignKey
+from sqlalchemy import (
+    Integer, String, Numeric, Date, ForeignKey, Index, column, func)
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
 from sqlalchemy.orm import mapped_column, Mapped, relationship
 from ..db import Base
 
 
 class Reservations(Base):
     __tablename__ = "reservations"
+    __table_args__ = (
+        # Impede duas reservas com datas sobrepostas para a mesma propriedade.
+        # O intervalo é semiaberto [start_date, end_date), então o checkout
+        # de uma reserva pode coincidir com o check-in da próxima.
+        ExcludeConstraint(
+            (column("property_id"), "="),
+            (func.daterange(column("start_date"), column("end_date")), "&&"),
+            using="gist",
+            name="reservations_no_overlap",
+        ),
+        Index(
+            "ix_reservations_property_dates",
+            "property_id", "start_date", "end_date",
+        ),
+        Index(
+            "ix_reservations_daterange",
+            func.daterange(column("start_date"), column("end_date")),
+            postgresql_using="gist",
+        ),
+        Index("ix_reservations_client_email", "client_email"),
+    )
 
     reservation_id: Mapped[int] = mapped_column(
         Integer,
@@ -54,3 +77,34 @@ class Reservations(Base):
     property: Mapped["Properties"] = relationship(
         back_populates="reservations"
     )
+
+
+class PropertyCalendar(Base):
+    """
+    Calendário de ocupação: uma linha por noite reservada de cada
+    propriedade, mantida na mesma transação que grava a reserva.
+    Noite sem linha está livre; a chave primária (property_id, night)
+    torna consultas por intervalo uma leitura sequencial de índice.
+    """
+    __tablename__ = "property_calendar"
+    __table_args__ = (
+        # Noites ocupadas de todas as propriedades em um intervalo (busca
+        # de disponibilidade sem propriedade fixa)
+        Index("ix_property_calendar_night", "night", "property_id"),
+    )
+
+    property_id: Mapped[int] = mapped_column(
+        ForeignKey("properties.property_id"),
+        primary_key=True
+    )
+
+    night: Mapped[date] = mapped_column(
+        Date,
+        primary_key=True
+    )
+
+    reservation_id: Mapped[int] = mapped_column(
+        ForeignKey("reservations.reservation_id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
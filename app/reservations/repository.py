@@ -3,61 +3,423 @@ Funções de acesso e manipulação de dados das reservas.
 Implementa operações CRUD e consultas relacionadas à entidade Reservations.
 """
 from datetime import date
+from sqlalchemy import (
+    Text, cast, delete, func, insert, literal, text, update)
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from .. import availability, cache
 from . import models, schemas
-from datetime import date
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-from . import models, schemas
+from ..properties import models as property_models
+
+# SQLSTATE do PostgreSQL para violação de constraint EXCLUDE
+EXCLUSION_VIOLATION = "23P01"
+
+
+# Colunas da exportação, na ordem em que aparecem no arquivo
+EXPORT_COLUMNS = (
+    "reservation_id",
+    "client_name",
+    "client_email",
+    "start_date",
+    "end_date",
+    "guests_quantity",
+    "total_value",
+    "property_id",
+)
+
+# Colunas da listagem, na ordem dos campos de ReservationResponse
+LIST_COLUMNS = tuple(
+    models.Reservations.__table__.c[name]
+    for name in schemas.ReservationRow.__annotations__)
+
+
+def list_columns(fields: tuple | None = None):
+    """
+    Colunas da listagem projetadas nos campos pedidos em fields=.
+    Args:
+        fields: Campos pedidos (opcional; None para todos).
+    Returns:
+        Tupla de colunas, na ordem de LIST_COLUMNS.
+    """
+    if fields is None:
+        return LIST_COLUMNS
+    return tuple(column for column in LIST_COLUMNS if column.key in fields)
+
+
+# Expande reservas em noites ocupadas do calendário; intervalo semiaberto,
+# então a noite de end_date não é ocupada
+CALENDAR_NIGHTS = (
+    "INSERT INTO property_calendar (property_id, night, reservation_id) "
+    "SELECT r.property_id, night::date, r.reservation_id "
+    "FROM reservations r "
+    "CROSS JOIN generate_series(r.start_date, r.end_date - 1, "
+    "interval '1 day') AS night "
+)
+
+
+class ReservationOverlapError(Exception):
+    """
+    Levantada quando a reserva viola a constraint de sobreposição de datas.
+    """
+
+
+async def fill_calendar(db: AsyncSession, reservation_ids: list[int]):
+    """
+    Grava no calendário as noites ocupadas pelas reservas informadas.
+    Não faz commit: deve rodar na mesma transação que grava as reservas.
+    Args:
+        db: Sessão assíncrona do banco de dados.
+        reservation_ids: IDs das reservas.
+    """
+    if reservation_ids:
+        await db.execute(
+            text(CALENDAR_NIGHTS
+                 + "WHERE r.reservation_id = ANY(CAST(:ids AS integer[]))"),
+            {"ids": list(reservation_ids)},
+        )
+
+
+async def rebuild_calendar(
+        db: AsyncSession,
+        property_id: int | None = None) -> int:
+    """
+    Reconstrói o calendário a partir da tabela reservations.
+    A tabela reservations fica bloqueada para escrita até o commit: uma
+    reserva gravada entre o DELETE e o INSERT teria suas noites inseridas
+    duas vezes. Depois do commit, as propriedades afetadas são invalidadas
+    para que o índice de disponibilidade as recarregue.
+    Args:
+        db: Sessão assíncrona do banco de dados.
+        property_id: Reconstrói só esta propriedade (opcional).
+    Returns:
+        Número de noites gravadas.
+    """
+    calendar_filter = nights_filter = ""
+    params = {}
+    if property_id is not None:
+        calendar_filter = "WHERE property_id = :property_id "
+        nights_filter = "WHERE r.property_id = :property_id "
+        params = {"property_id": property_id}
+    await db.execute(text("LOCK TABLE reservations IN SHARE MODE"))
+    deleted = await db.execute(text(
+        "WITH deleted AS (DELETE FROM property_calendar " + calendar_filter
+        + "RETURNING property_id) SELECT DISTINCT property_id FROM deleted"),
+        params)
+    affected = set(deleted.scalars())
+    inserted = await db.execute(text(
+        "WITH inserted AS (" + CALENDAR_NIGHTS + nights_filter
+        + "RETURNING property_id) "
+        "SELECT property_id, count(*) FROM inserted GROUP BY property_id"),
+        params)
+    nights = 0
+    for row_property_id, count in inserted:
+        affected.add(row_property_id)
+        nights += count
+    await db.commit()
+    availability.changed(affected)
+    for affected_id in affected:
+        await cache.invalidate("availability", affected_id)
+    return nights
 
 
-async def create_reservation(
+def overlapping(start_date: date, end_date: date):
+    """
+    Condição de sobreposição entre as reservas e o intervalo informado.
+    Usa o operador && sobre daterange (intervalo semiaberto), a mesma
+    expressão da constraint reservations_no_overlap e do índice GiST
+    ix_reservations_daterange.
+    Args:
+        start_date: Data inicial.
+        end_date: Data final.
+    Returns:
+        Expressão SQLAlchemy para uso em filtros.
+    """
+    stay = func.daterange(models.Reservations.start_date,
+                          models.Reservations.end_date)
+    return stay.op("&&")(func.daterange(start_date, end_date))
+
+
+async def book_reservation(
         db: AsyncSession,
         reservation: schemas.ReservationCreate,
-        total_value: float):
+        before_commit=None):
     """
-    Cria uma nova reserva no banco de dados.
+    Cria uma reserva em um único comando INSERT ... SELECT ... RETURNING.
+    A propriedade é lida no próprio SELECT, que só retorna linha se ela
+    existir e comportar a quantidade de hóspedes; o valor total é calculado
+    pelo banco a partir do preço da diária. As noites do calendário são
+    gravadas pelo mesmo comando (CTE de escrita), e a linha de retorno
+    já é a resposta: não há SELECT depois do commit. A sobreposição de
+    datas é garantida pela constraint reservations_no_overlap.
     Args:
         db: Sessão assíncrona do banco de dados.
         reservation: Dados da reserva a ser criada.
-        total_value: Valor total da reserva.
+        before_commit: Corrotina chamada com a linha criada antes do
+            commit, na mesma transação (opcional).
+    Returns:
+        Linha da reserva criada ou None se a propriedade não existir ou
+        não comportar os hóspedes.
+    Raises:
+        ReservationOverlapError: Se as datas conflitarem com outra reserva.
+    """
+    nights = (reservation.end_date - reservation.start_date).days
+    properties = property_models.Properties.__table__
+    reservations = models.Reservations.__table__
+
+    source = (
+        select(
+            literal(reservation.client_name),
+            literal(reservation.client_email),
+            literal(reservation.start_date),
+            literal(reservation.end_date),
+            literal(reservation.guests_quantity),
+            properties.c.price_per_night * nights,
+            properties.c.property_id,
+        )
+        .where(
+            properties.c.property_id == reservation.property_id,
+            properties.c.capacity >= reservation.guests_quantity,
+        )
+    )
+    statement = (
+        insert(reservations)
+        .from_select(
+            [
+                "client_name",
+                "client_email",
+                "start_date",
+                "end_date",
+                "guests_quantity",
+                "total_value",
+                "property_id",
+            ],
+            source,
+        )
+        .returning(*LIST_COLUMNS)
+        .cte("new_reservation")
+    )
+    calendar = models.PropertyCalendar.__table__
+    nights = (
+        insert(calendar)
+        .from_select(
+            ["property_id", "night", "reservation_id"],
+            select(
+                statement.c.property_id,
+                statement.c.start_date + func.generate_series(
+                    0, statement.c.end_date - statement.c.start_date - 1),
+                statement.c.reservation_id,
+            ),
+        )
+        .cte("new_nights")
+    )
+
+    try:
+        result = await db.execute(select(statement).add_cte(nights))
+        row = result.mappings().first()
+        if row and before_commit is not None:
+            await before_commit(dict(row))
+        await db.commit()
+    except IntegrityError as exc:
+        await db.rollback()
+        if getattr(exc.orig, "sqlstate", None) == EXCLUSION_VIOLATION:
+            raise ReservationOverlapError() from exc
+        raise
+    if row:
+        availability.booked(row["property_id"], row["start_date"],
+                            row["end_date"])
+        await cache.invalidate("availability", row["property_id"])
+    return row
+
+
+async def find_overlapping(
+        db: AsyncSession,
+        stays: list[tuple[int, int, date, date]]) -> set[int]:
+    """
+    Verifica em uma única consulta quais estadias conflitam com reservas
+    existentes, cruzando um unnest dos pedidos com a tabela reservations.
+    Args:
+        db: Sessão assíncrona do banco de dados.
+        stays: Tuplas (índice, property_id, start_date, end_date).
     Returns:
-        Instância da reserva criada.
+        Conjunto de índices com sobreposição.
     """
+    if not stays:
+        return set()
+    indexes, property_ids, starts, ends = map(list, zip(*stays))
+    result = await db.execute(
+        text(
+            "SELECT stay.idx "
+            "FROM unnest(CAST(:indexes AS integer[]), "
+            "CAST(:property_ids AS integer[]), "
+            "CAST(:starts AS date[]), CAST(:ends AS date[])) "
+            "AS stay(idx, property_id, start_date, end_date) "
+            "WHERE EXISTS ("
+            "SELECT 1 FROM reservations "
+            "WHERE reservations.property_id = stay.property_id "
+            "AND daterange(reservations.start_date, reservations.end_date) "
+            "&& daterange(stay.start_date, stay.end_date))"
+        ),
+        {
+            "indexes": indexes,
+            "property_ids": property_ids,
+            "starts": starts,
+            "ends": ends,
+        },
+    )
+    return set(result.scalars())
 
-    db_reservation = models.Reservations(
-        client_name=reservation.client_name,
-        client_email=reservation.client_email,
-        start_date=reservation.start_date,
-        end_date=reservation.end_date,
-        guests_quantity=reservation.guests_quantity,
-        property_id=reservation.property_id,
-        total_value=total_value
+
+async def insert_reservations(
+        db: AsyncSession,
+        reservations: list[dict]):
+    """
+    Insere várias reservas em um único INSERT ... SELECT FROM unnest.
+    Args:
+        db: Sessão assíncrona do banco de dados.
+        reservations: Dicionários com as colunas da reserva e total_value.
+    Returns:
+        Linhas criadas (reservation_id, property_id, start_date,
+        end_date).
+    Raises:
+        ReservationOverlapError: Se alguma reserva conflitar com outra
+            criada concorrentemente; nada é inserido.
+    """
+    if not reservations:
+        return []
+    columns = {
+        name: [reservation[name] for reservation in reservations]
+        for name in ("client_name", "client_email", "start_date",
+                     "end_date", "guests_quantity", "total_value",
+                     "property_id")
+    }
+    statement = text(
+        "INSERT INTO reservations (client_name, client_email, start_date, "
+        "end_date, guests_quantity, total_value, property_id) "
+        "SELECT * FROM unnest(CAST(:client_name AS varchar[]), "
+        "CAST(:client_email AS varchar[]), CAST(:start_date AS date[]), "
+        "CAST(:end_date AS date[]), CAST(:guests_quantity AS integer[]), "
+        "CAST(:total_value AS numeric[]), CAST(:property_id AS integer[])) "
+        "RETURNING reservation_id, property_id, start_date, end_date"
     )
+    try:
+        result = await db.execute(statement, columns)
+        rows = result.mappings().all()
+        await fill_calendar(db, [row["reservation_id"] for row in rows])
+        await db.commit()
+    except IntegrityError as exc:
+        await db.rollback()
+        if getattr(exc.orig, "sqlstate", None) == EXCLUSION_VIOLATION:
+            raise ReservationOverlapError() from exc
+        raise
+    for row in rows:
+        availability.booked(row["property_id"], row["start_date"],
+                            row["end_date"])
+    for property_id in set(columns["property_id"]):
+        await cache.invalidate("availability", property_id)
+    return rows
+
 
-    db.add(db_reservation)
+async def recompute_total_values(
+        db: AsyncSession,
+        property_id: int,
+        from_date: date) -> int:
+    """
+    Recalcula total_value das reservas de uma propriedade que começam a
+    partir de from_date, com o preço atual da diária. Reservas já
+    iniciadas mantêm o valor cobrado.
+    Args:
+        db: Sessão assíncrona do banco de dados.
+        property_id: ID da propriedade.
+        from_date: Primeira data de check-in afetada.
+    Returns:
+        Número de reservas atualizadas.
+    """
+    reservations = models.Reservations.__table__
+    properties = property_models.Properties.__table__
+    result = await db.execute(
+        update(reservations)
+        .where(
+            reservations.c.property_id == properties.c.property_id,
+            reservations.c.property_id == property_id,
+            reservations.c.start_date >= from_date,
+        )
+        .values(total_value=properties.c.price_per_night * (
+            reservations.c.end_date - reservations.c.start_date))
+    )
     await db.commit()
-    await db.refresh(db_reservation)
-    return db_reservation
+    return result.rowcount
 
 
 async def get_reservations(
         db: AsyncSession,
         skip: int = 0,
-        limit: int = 10):
+        limit: int = 10,
+        fields: tuple | None = None):
     """
     Retorna uma lista de reservas com paginação.
     Args:
         db: Sessão assíncrona do banco de dados.
         skip: Número de registros a pular.
         limit: Número máximo de registros a retornar.
+        fields: Campos pedidos (opcional; ver list_columns).
     Returns:
-        Lista de reservas.
+        Linhas (tuplas com as colunas de list_columns) das reservas.
     """
     result = await db.execute(
-        select(models.Reservations).offset(skip).limit(limit))
-    return result.scalars().all()
+        select(*list_columns(fields)).offset(skip).limit(limit))
+    return result.all()
+
+
+async def stream_reservations(
+        db: AsyncSession,
+        property_id: int | None = None,
+        client_email: str | None = None,
+        date_from: date | None = None,
+        date_to: date | None = None,
+        as_json: bool = False,
+        batch_size: int = 5000):
+    """
+    Percorre as reservas filtradas com um cursor do lado do servidor,
+    sem carregar o resultado inteiro em memória.
+    Args:
+        db: Sessão assíncrona do banco de dados.
+        property_id: ID da propriedade (opcional).
+        client_email: E-mail do cliente (opcional).
+        date_from, date_to: Reservas que ocupam alguma noite do intervalo
+            [date_from, date_to) (opcionais).
+        as_json: Se True, cada linha traz um único texto com o objeto JSON
+            da reserva, serializado pelo próprio PostgreSQL (row_to_json).
+        batch_size: Linhas buscadas por vez no cursor.
+    Returns:
+        Iterador assíncrono de listas de linhas com as colunas de
+        EXPORT_COLUMNS, ordenadas por ID.
+    """
+    reservations = models.Reservations.__table__
+    query = select(*(reservations.c[name] for name in EXPORT_COLUMNS))
+    if property_id is not None:
+        query = query.where(reservations.c.property_id == property_id)
+    if client_email:
+        query = query.where(reservations.c.client_email == client_email)
+    if date_from and date_to:
+        query = query.where(overlapping(date_from, date_to))
+    elif date_from:
+        query = query.where(reservations.c.end_date > date_from)
+    elif date_to:
+        query = query.where(reservations.c.start_date < date_to)
+
+    if as_json:
+        reservation = query.subquery("reservation")
+        query = select(
+            cast(func.row_to_json(reservation.table_valued()), Text)
+        ).order_by(reservation.c.reservation_id)
+    else:
+        query = query.order_by(reservations.c.reservation_id)
+
+    result = await db.stream(
+        query.execution_options(yield_per=batch_size))
+    async for rows in result.partitions():
+        yield rows
 
 
 async def get_reservation_by_id(
@@ -80,39 +442,43 @@ async def get_reservation_by_id(
 
 async def get_reservation_by_email(
         db: AsyncSession,
-        email: str):
+        email: str,
+        fields: tuple | None = None):
     """
     Busca reservas pelo e-mail do cliente.
     Args:
         db: Sessão assíncrona do banco de dados.
         email: E-mail do cliente.
+        fields: Campos pedidos (opcional; ver list_columns).
     Returns:
-        Lista de reservas.
+        Linhas (tuplas com as colunas de list_columns) das reservas.
     """
     result = await db.execute(
-        select(models.Reservations).filter(
+        select(*list_columns(fields)).filter(
             models.Reservations.client_email == email)
     )
-    return result.scalars().all()
+    return result.all()
 
 
 async def get_reservation_by_property(
         db: AsyncSession,
-        property_id: int):
+        property_id: int,
+        fields: tuple | None = None):
     """
     Busca reservas por ID da propriedade.
     Args:
         db: Sessão assíncrona do banco de dados.
         property_id: ID da propriedade.
+        fields: Campos pedidos (opcional; ver list_columns).
     Returns:
-        Lista de reservas.
+        Linhas (tuplas com as colunas de list_columns) das reservas.
     """
     result = await db.execute(
-        select(models.Reservations).filter(
+        select(*list_columns(fields)).filter(
             models.Reservations.property_id == property_id
         )
     )
-    return result.scalars().all()
+    return result.all()
 
 
 async def check_overlap(
@@ -133,8 +499,7 @@ async def check_overlap(
     result = await db.execute(
         select(models.Reservations).filter(
             models.Reservations.property_id == property_id,
-            models.Reservations.end_date >= start_date,
-            models.Reservations.start_date <= end_date
+            overlapping(start_date, end_date)
         )
     )
     return result.scalars().first()
@@ -157,11 +522,25 @@ async def update_reservation(
     if not db_reservation:
         return None
 
-    for key, value in reservation_update.dict(exclude_unset=True).items():
+    old_dates = (db_reservation.start_date, db_reservation.end_date)
+    changes = reservation_update.dict(exclude_unset=True)
+    for key, value in changes.items():
         setattr(db_reservation, key, value)
 
+    if "start_date" in changes or "end_date" in changes:
+        calendar = models.PropertyCalendar.__table__
+        await db.flush()
+        await db.execute(delete(calendar).where(
+            calendar.c.reservation_id == reservation_id))
+        await fill_calendar(db, [reservation_id])
     await db.commit()
-    await db.refresh(db_reservation)
+    if (db_reservation.start_date, db_reservation.end_date) != old_dates:
+        availability.released(db_reservation.property_id, *old_dates)
+        availability.booked(db_reservation.property_id,
+                            db_reservation.start_date,
+                            db_reservation.end_date)
+    await cache.invalidate("availability", db_reservation.property_id)
+    # expire_on_commit=False: o objeto já tem os valores gravados
     return db_reservation
 
 
@@ -169,7 +548,8 @@ async def delete_reservation(
         db: AsyncSession,
         reservation_id: int):
     """
-    Remove uma reserva do banco de dados.
+    Remove uma reserva do banco de dados. As noites do calendário saem
+    junto, pelo ON DELETE CASCADE, na mesma transação.
     Args:
         db: Sessão assíncrona do banco de dados.
         reservation_id: ID da reserva.
@@ -182,4 +562,7 @@ async def delete_reservation(
 
     await db.delete(db_reservation)
     await db.commit()
+    availability.released(db_reservation.property_id,
+                          db_reservation.start_date, db_reservation.end_date)
+    await cache.invalidate("availability", db_reservation.property_id)
     return db_reservation
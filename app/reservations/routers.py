@@ -1,45 +1,106 @@
-from fastapi import APIRouter, Depends
+from datetime import date
+from fastapi import APIRouter, Depends, Header, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from ..db import get_db
-from . import schemas, service
+from ..db import get_db, get_read_db, read_session_factory
+from ..idempotency import service as idempotency
+from ..responses import json_response
+from . import export, schemas, service
 
 router = APIRouter(prefix="/reservations", tags=["Reservations"])
 
 
 @router.post("/", response_model=schemas.ReservationResponse)
 async def create_reservation(reservation_in: schemas.ReservationCreate,
+                             idempotency_key: str | None = Header(
+                                 None, max_length=255),
                              db: AsyncSession = Depends(get_db)):
     """
     Endpoint para criar uma nova reserva.
     Args:
         reservation_in: Dados da reserva.
+        idempotency_key: Cabeçalho Idempotency-Key (opcional); repetições
+            com a mesma chave recebem a resposta da primeira execução.
         db: Sessão do banco de dados.
     Returns:
         Reserva criada.
     """
-    return await service.create_reservation_service(db, reservation_in)
+    return await idempotency.run_idempotent(
+        db, "POST /reservations/", idempotency_key, reservation_in,
+        schemas.ReservationResponse,
+        lambda before_commit: service.create_reservation_service(
+            db, reservation_in, before_commit))
+
+
+@router.post("/batch", response_model=schemas.ReservationBatchResult)
+async def create_reservations_batch(batch: schemas.ReservationBatch,
+                                    db: AsyncSession = Depends(get_db)):
+    """
+    Endpoint para criar várias reservas de uma vez (ex.: channel managers).
+    Args:
+        batch: Reservas e opção all_or_nothing.
+        db: Sessão do banco de dados.
+    Returns:
+        Resultado por item: aceito (com ID) ou recusado (com motivo).
+    """
+    return await service.create_reservations_batch_service(db, batch)
 
 
 @router.get("/", response_model=list[schemas.ReservationResponse])
 async def list_reservations(client_email: str | None = None,
                             property_id: int | None = None,
-                            db: AsyncSession = Depends(get_db)):
+                            fields: str | None = None,
+                            db: AsyncSession = Depends(get_read_db)):
     """
     Endpoint para listar reservas com filtros por e-mail ou propriedade.
     Args:
         client_email: E-mail do cliente (opcional).
         property_id: ID da propriedade (opcional).
+        fields: Campos de cada reserva, separados por vírgula (opcional).
         db: Sessão do banco de dados.
     Returns:
         Lista de reservas.
     """
-    return await service.list_reservations_service(db, client_email,
-                                                   property_id)
+    # Linhas já no formato da resposta: serializa sem o response_model
+    return json_response(schemas.reservation_rows,
+                         await service.list_reservations_service(
+                             db, client_email, property_id, fields))
+
+
+@router.get("/export")
+async def export_reservations(session_factory=Depends(read_session_factory),
+                              file_format: str = Query(
+                                  "ndjson", alias="format",
+                                  pattern="^(ndjson|csv)$"),
+                              property_id: int | None = None,
+                              client_email: str | None = None,
+                              date_from: date | None = None,
+                              date_to: date | None = None):
+    """
+    Endpoint para exportar todas as reservas filtradas, em streaming.
+    Args:
+        session_factory: Réplica ou primário, conforme a requisição.
+        file_format: "ndjson" (padrão) ou "csv".
+        property_id: ID da propriedade (opcional).
+        client_email: E-mail do cliente (opcional).
+        date_from, date_to: Reservas que ocupam alguma noite do intervalo.
+    Returns:
+        Arquivo NDJSON ou CSV com uma reserva por linha.
+    """
+    body = service.export_reservations_service(
+        session_factory, file_format, property_id,
+        client_email, date_from, date_to)
+    return StreamingResponse(
+        body,
+        media_type=export.MEDIA_TYPES[file_format],
+        headers={"Content-Disposition":
+                 f'attachment; filename="reservations.{file_format}"'},
+    )
 
 
 @router.get("/{reservation_id}", response_model=schemas.ReservationResponse)
 async def get_reservation(reservation_id: int,
-                          db: AsyncSession = Depends(get_db)):
+                          db: AsyncSession = Depends(get_read_db)):
     """
     Endpoint para buscar uma reserva pelo ID.
     Args:
@@ -1,6 +1,7 @@
 from datetime import date
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field, TypeAdapter
+from typing import List, Literal, Optional
+from typing_extensions import TypedDict
 
 
 class ReservationBase(BaseModel):
@@ -46,3 +47,54 @@ class ReservationResponse(ReservationBase):
 
     class Config:
         from_attributes = True
+
+
+class ReservationRow(TypedDict, total=False):
+    """
+    Formato de ReservationResponse para serialização direta de linhas do
+    banco na listagem (ver app.responses). Com fields=, só os campos
+    pedidos estão presentes.
+    """
+    client_name: str
+    client_email: str
+    start_date: date
+    end_date: date
+    guests_quantity: int
+    property_id: int
+    reservation_id: int
+    total_value: Optional[float]
+
+
+# Campos aceitos em fields= na listagem, na ordem da resposta
+RESERVATION_FIELDS = tuple(ReservationRow.__annotations__)
+
+reservation_rows = TypeAdapter(List[ReservationRow])
+
+
+class ReservationBatch(BaseModel):
+    """
+    Schema usado no POST /reservations/batch.
+    Com all_or_nothing, nenhuma reserva é criada se alguma for recusada.
+    """
+    items: List[ReservationCreate] = Field(..., min_length=1,
+                                           max_length=5000)
+    all_or_nothing: bool = False
+
+
+class ReservationBatchItem(BaseModel):
+    """
+    Resultado de um item do lote, na mesma posição do pedido.
+    """
+    index: int
+    status: Literal["accepted", "rejected"]
+    reservation_id: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class ReservationBatchResult(BaseModel):
+    """
+    Schema de retorno da criação de reservas em lote.
+    """
+    accepted: int
+    rejected: int
+    results: List[ReservationBatchItem]
@@ -2,81 +2,239 @@
 Serviços e regras de negócio para reservas.
 Orquestra operações entre repositórios e schemas, aplicando validações e lógica de negócio.
 """
+import bisect
+from collections import defaultdict
+from datetime import date
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from . import repository, schemas
+from . import export, repository, schemas
 from ..properties import repository as properties_repo
+from ..responses import parse_fields, row_dicts
+
+NOT_AVAILABLE = "Property not available for these dates"
+
+# Tentativas do lote quando uma reserva concorrente ocupa as mesmas datas
+BATCH_INSERT_ATTEMPTS = 3
 
 
 async def create_reservation_service(db: AsyncSession,
-                                     reservation_in: schemas.ReservationCreate
-                                     ):
+                                     reservation_in: schemas.ReservationCreate,
+                                     before_commit=None):
     """
     Serviço para criar uma nova reserva.
     Args:
         db: Sessão assíncrona do banco de dados.
         reservation_in: Dados da reserva a ser criada.
+        before_commit: Chamado com a reserva criada antes do commit, na
+            mesma transação (opcional; ver app.idempotency).
     Returns:
         Dados da reserva criada ou exceção HTTP.
     """
-    property_ = await properties_repo.get_property_by_id(
-        db,
-        reservation_in.property_id)
-    if not property_:
-        raise HTTPException(status_code=404, detail="Property not found")
-
-    if reservation_in.guests_quantity > property_.capacity:
-        raise HTTPException(status_code=400, detail="Guests exceed capacity")
-
     if reservation_in.end_date <= reservation_in.start_date:
         raise HTTPException(status_code=400,
                             detail="End date must be after start date")
 
-    overlap = await repository.check_overlap(db,
-                                             reservation_in.property_id,
-                                             reservation_in.start_date,
-                                             reservation_in.end_date)
-    if overlap:
-        raise HTTPException(status_code=400,
-                            detail="Property not available for these dates")
+    try:
+        new_reservation = await repository.book_reservation(
+            db, reservation_in, before_commit)
+    except repository.ReservationOverlapError:
+        raise HTTPException(status_code=400, detail=NOT_AVAILABLE)
+
+    if not new_reservation:
+        # Nenhuma linha inserida: descobre o motivo apenas no caminho de erro
+        property_ = await properties_repo.get_property_by_id(
+            db,
+            reservation_in.property_id)
+        if not property_:
+            raise HTTPException(status_code=404, detail="Property not found")
+        raise HTTPException(status_code=400, detail="Guests exceed capacity")
+
+    return dict(new_reservation)
 
-    nights = (reservation_in.end_date - reservation_in.start_date).days
-    total_price = float(property_.price_per_night) * nights
 
-    new_reservation = await repository.create_reservation(
-        db,
-        reservation_in,
-        total_value=total_price)
+def _overlaps_booked(booked: list, start_date, end_date) -> bool:
+    """
+    Verifica sobreposição com intervalos já aceitos, ordenados e disjuntos.
+    Basta comparar com os vizinhos da posição de inserção.
+    """
+    position = bisect.bisect_left(booked, (start_date, end_date))
+    if position > 0 and booked[position - 1][1] > start_date:
+        return True
+    if position < len(booked) and booked[position][0] < end_date:
+        return True
+    return False
+
+
+async def create_reservations_batch_service(
+        db: AsyncSession,
+        batch: schemas.ReservationBatch):
+    """
+    Serviço para criar várias reservas de uma vez.
+    Carrega as propriedades em uma consulta, valida datas e capacidade em
+    memória, verifica sobreposição com o banco em uma consulta única e
+    dentro do próprio lote (vale o item que vem primeiro), e insere os
+    aceitos em um único comando.
+    Args:
+        db: Sessão assíncrona do banco de dados.
+        batch: Reservas do lote e opção all_or_nothing.
+    Returns:
+        Resultado por item, na ordem do pedido.
+    """
+    items = batch.items
+    properties = await properties_repo.get_properties_by_ids(
+        db, [item.property_id for item in items])
 
+    invalid = {}
+    for index, item in enumerate(items):
+        property_ = properties.get(item.property_id)
+        if item.end_date <= item.start_date:
+            invalid[index] = "End date must be after start date"
+        elif not property_:
+            invalid[index] = "Property not found"
+        elif item.guests_quantity > property_.capacity:
+            invalid[index] = "Guests exceed capacity"
+
+    for _ in range(BATCH_INSERT_ATTEMPTS):
+        reasons = dict(invalid)
+        candidates = [index for index in range(len(items))
+                      if index not in reasons]
+        conflicts = await repository.find_overlapping(db, [
+            (index, items[index].property_id,
+             items[index].start_date, items[index].end_date)
+            for index in candidates
+        ])
+
+        booked = defaultdict(list)
+        for index in candidates:
+            item = items[index]
+            stays = booked[item.property_id]
+            if (index in conflicts
+                    or _overlaps_booked(stays, item.start_date,
+                                        item.end_date)):
+                reasons[index] = NOT_AVAILABLE
+            else:
+                bisect.insort(stays, (item.start_date, item.end_date))
+
+        accepted = [index for index in candidates if index not in reasons]
+        if batch.all_or_nothing and reasons:
+            created = {}
+            break
+
+        rows = []
+        for index in accepted:
+            item = items[index]
+            nights = (item.end_date - item.start_date).days
+            rows.append({
+                **item.model_dump(),
+                "total_value":
+                    properties[item.property_id].price_per_night * nights,
+            })
+        try:
+            inserted = await repository.insert_reservations(db, rows)
+        except repository.ReservationOverlapError:
+            # Reserva concorrente entre a verificação e o INSERT: refaz
+            continue
+        # Reservas aceitas da mesma propriedade não se sobrepõem, então
+        # (property_id, start_date) identifica cada uma
+        created = {(row["property_id"], row["start_date"]):
+                   row["reservation_id"] for row in inserted}
+        break
+    else:
+        raise HTTPException(
+            status_code=409,
+            detail="Batch conflicted with concurrent reservations, retry")
+
+    results = []
+    for index, item in enumerate(items):
+        reservation_id = created.get((item.property_id, item.start_date))
+        if index in reasons:
+            results.append({"index": index, "status": "rejected",
+                            "detail": reasons[index]})
+        elif reservation_id is None:
+            results.append({"index": index, "status": "rejected",
+                            "detail": "Batch rejected: all_or_nothing"})
+        else:
+            results.append({"index": index, "status": "accepted",
+                            "reservation_id": reservation_id})
+
+    accepted_count = sum(
+        1 for result in results if result["status"] == "accepted")
     return {
-        "reservation_id": new_reservation.reservation_id,
-        "property_id": new_reservation.property_id,
-        "client_name": new_reservation.client_name,
-        "client_email": new_reservation.client_email,
-        "start_date": new_reservation.start_date,
-        "end_date": new_reservation.end_date,
-        "guests_quantity": new_reservation.guests_quantity,
-        "total_value": new_reservation.total_value,
+        "accepted": accepted_count,
+        "rejected": len(results) - accepted_count,
+        "results": results,
     }
 
 
 async def list_reservations_service(db: AsyncSession,
                                     client_email: str | None = None,
-                                    property_id: int | None = None):
+                                    property_id: int | None = None,
+                                    fields: str | None = None):
     """
     Serviço para listar reservas filtrando por e-mail ou propriedade.
     Args:
         db: Sessão assíncrona do banco de dados.
         client_email: E-mail do cliente (opcional).
         property_id: ID da propriedade (opcional).
+        fields: Campos da resposta, separados por vírgula (opcional).
     Returns:
-        Lista de reservas.
+        Lista de reservas (dicionários no formato de
+        schemas.ReservationRow).
     """
+    try:
+        projection = parse_fields(fields, schemas.RESERVATION_FIELDS)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
     if client_email:
-        return await repository.get_reservation_by_email(db, client_email)
-    if property_id:
-        return await repository.get_reservation_by_property(db, property_id)
-    return await repository.get_reservations(db)
+        rows = await repository.get_reservation_by_email(
+            db, client_email, fields=projection)
+    elif property_id:
+        rows = await repository.get_reservation_by_property(
+            db, property_id, fields=projection)
+    else:
+        rows = await repository.get_reservations(db, fields=projection)
+    return row_dicts(rows)
+
+
+async def _export_stream(session_factory, file_format: str, filters: dict):
+    async with session_factory() as db:
+        if file_format == "csv":
+            yield export.csv_header()
+        as_json = file_format == "ndjson"
+        to_bytes = export.to_ndjson if as_json else export.to_csv
+        async for rows in repository.stream_reservations(
+                db, as_json=as_json, **filters):
+            yield to_bytes(rows)
+
+
+def export_reservations_service(session_factory,
+                                file_format: str,
+                                property_id: int | None = None,
+                                client_email: str | None = None,
+                                date_from: date | None = None,
+                                date_to: date | None = None):
+    """
+    Serviço para exportar reservas em streaming (NDJSON ou CSV).
+    A sessão é aberta pelo próprio gerador, pois a resposta continua sendo
+    enviada depois que a rota retorna.
+    Args:
+        session_factory: sessionmaker usado na leitura.
+        file_format: "ndjson" ou "csv".
+        property_id: ID da propriedade (opcional).
+        client_email: E-mail do cliente (opcional).
+        date_from, date_to: Intervalo de datas ocupadas (opcionais).
+    Returns:
+        Iterador assíncrono de blocos de bytes.
+    """
+    if date_from and date_to and date_to <= date_from:
+        raise HTTPException(status_code=400,
+                            detail="date_to must be after date_from")
+    return _export_stream(session_factory, file_format, {
+        "property_id": property_id,
+        "client_email": client_email,
+        "date_from": date_from,
+        "date_to": date_to,
+    })
 
 
 async def get_reservation_service(db: AsyncSession, reservation_id: int):
@@ -0,0 +1,82 @@
+"""
+Classes e utilitários de resposta JSON.
+Com orjson instalado, as rotas usam ORJSONResponse por padrão. As
+listagens grandes pulam o response_model: as linhas do banco (tuplas, sem
+hidratar objetos ORM) viram dicionários e são serializadas direto em bytes
+por um TypeAdapter do Pydantic, sem jsonable_encoder nem validação.
+O parâmetro fields= das listagens projeta as colunas pedidas: só elas são
+lidas do banco e aparecem no corpo.
+"""
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from pydantic import TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # dependência opcional, apenas acelera as demais rotas
+    orjson = None
+
+DefaultJSONResponse = ORJSONResponse if orjson is not None else JSONResponse
+
+
+def parse_fields(fields: str | None, allowed) -> tuple[str, ...] | None:
+    """
+    Interpreta o parâmetro fields= (nomes separados por vírgula).
+    Args:
+        fields: Valor recebido na query string (opcional).
+        allowed: Campos aceitos, na ordem da resposta.
+    Returns:
+        Campos pedidos na ordem de allowed, ou None para todos.
+    Raises:
+        ValueError: Se algum campo não existir.
+    """
+    if not fields:
+        return None
+    names = {name.strip() for name in fields.split(",")} - {""}
+    unknown = names.difference(allowed)
+    if unknown:
+        raise ValueError(
+            f"Unknown fields: {', '.join(sorted(unknown))}. "
+            f"Allowed: {', '.join(allowed)}")
+    return tuple(name for name in allowed if name in names) or None
+
+
+def row_dicts(rows, fields=None, **constants) -> list[dict]:
+    """
+    Converte linhas do SQLAlchemy (Row) em dicionários.
+    Args:
+        rows: Linhas de uma mesma consulta.
+        fields: Campos mantidos (opcional); as demais colunas da linha,
+            lidas só para o cursor ou o ETag, ficam de fora.
+        constants: Campos fixos acrescentados a todas as linhas.
+    Returns:
+        Lista de dicionários coluna -> valor.
+    """
+    if not rows:
+        return []
+    keys = rows[0]._fields
+    if fields is None:
+        return [dict(zip(keys, row), **constants) for row in rows]
+    positions = [keys.index(name) for name in fields if name in keys]
+    names = [keys[position] for position in positions]
+    constants = {name: value for name, value in constants.items()
+                 if name in fields}
+    return [dict(zip(names, map(row.__getitem__, positions)), **constants)
+            for row in rows]
+
+
+def json_response(adapter: TypeAdapter, content,
+                  status_code: int = 200,
+                  headers: dict | None = None) -> Response:
+    """
+    Serializa o conteúdo com o TypeAdapter e o devolve como JSON.
+    O conteúdo não é validado: deve já estar no formato do adapter.
+    Args:
+        adapter: TypeAdapter do formato de resposta.
+        content: Dicionários/listas no formato do adapter.
+        status_code: Status HTTP.
+        headers: Cabeçalhos adicionais (opcional).
+    Returns:
+        Resposta com o corpo JSON já serializado.
+    """
+    return Response(adapter.dump_json(content), status_code=status_code,
+                    headers=headers, media_type="application/json")
@@ -10,6 +10,73 @@ class Settings(BaseSettings):
     DATABASE_URL: str
     DATABASE_KEY: str = ""
     SYNC_DATABASE_URL: str
+    # Réplica para rotas de leitura (vazio = usa DATABASE_URL)
+    READ_DATABASE_URL: str = ""
+    # Após uma escrita, o cliente lê do primário por este tempo
+    READ_YOUR_WRITES_SECONDS: int = 5
+
+    # Pool de conexões e driver
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 100
+    DB_ECHO: bool = False
+
+    # Cache: "memory" (por processo) ou "redis" (compartilhado)
+    CACHE_BACKEND: str = "memory"
+    REDIS_URL: str = "redis://localhost:6379/0"
+    CACHE_TTL_SECONDS: float = 60.0
+    CACHE_MEMORY_SIZE: int = 10000
+    # Cópia local de vida curta quando o backend é compartilhado
+    CACHE_LOCAL_SIZE: int = 1000
+    CACHE_LOCAL_TTL_SECONDS: float = 5.0
+
+    # Disponibilidade: "sql" ou "numpy" (índice em memória por worker).
+    # Com vários workers, use CACHE_BACKEND=redis para que as escritas de
+    # um worker cheguem aos outros antes da próxima recarga completa.
+    AVAILABILITY_ENGINE: str = "sql"
+    AVAILABILITY_HORIZON_DAYS: int = 731
+    AVAILABILITY_RELOAD_SECONDS: float = 3600.0
+
+    # Métricas em GET /metrics (formato Prometheus), por processo
+    METRICS_ENABLED: bool = True
+    # Cabeçalho Server-Timing nas respostas (tempo total, banco e pool)
+    METRICS_SERVER_TIMING: bool = False
+    METRICS_SLOW_QUERY_MS: float = 200.0
+    METRICS_SLOW_QUERY_SAMPLES: int = 100
+
+    # Worker de jobs em segundo plano (python -m app.worker)
+    JOB_CONCURRENCY: int = 4
+    JOB_POLL_SECONDS: float = 1.0
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_BACKOFF_SECONDS: float = 5.0
+    JOB_BACKOFF_MAX_SECONDS: float = 600.0
+    # Job em execução há mais tempo que isso volta para a fila
+    JOB_LOCK_TIMEOUT_SECONDS: int = 900
+
+    # Cache-Control das leituras do catálogo. s-maxage vale para o CDN;
+    # max-age=0 faz o navegador revalidar (304 barato via ETag)
+    HTTP_CACHE_PROPERTY: str = (
+        "public, max-age=0, s-maxage=60, stale-while-revalidate=30")
+    HTTP_CACHE_PROPERTY_LIST: str = (
+        "public, max-age=0, s-maxage=30, stale-while-revalidate=30")
+    HTTP_CACHE_AVAILABILITY: str = "public, max-age=0, s-maxage=10"
+
+    # Chaves Idempotency-Key das rotas de criação: validade da resposta
+    # gravada e tempo após o qual uma chave sem resposta (pedido
+    # interrompido) pode ser reaproveitada
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_LOCK_SECONDS: int = 60
+
+    # Compressão das respostas (Brotli se o pacote brotli estiver
+    # instalado, senão gzip); corpos menores que o limite vão sem compressão
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
 
     model_config = {
         "env_file": ".env",
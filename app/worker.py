@@ -0,0 +1,149 @@
+"""
+Worker dos jobs em segundo plano.
+Consome a fila da tabela jobs com vários laços concorrentes; pode rodar em
+quantos processos/máquinas forem necessários, pois cada job é reservado
+com FOR UPDATE SKIP LOCKED.
+
+Uso:
+    python -m app.worker
+    python -m app.worker --concurrency 8
+"""
+import argparse
+import asyncio
+import logging
+import signal
+import traceback
+from .db import AsyncSessionLocal, engine
+from .idempotency import repository as idempotency_repo
+from .jobs import repository
+from .jobs.handlers import HANDLERS
+from .settings import settings
+
+logger = logging.getLogger("app.worker")
+
+
+async def run_job(job) -> str:
+    """
+    Executa um job já reservado e registra o resultado.
+    Args:
+        job: Linha do job retornada por repository.claim.
+    Returns:
+        Status final do job, ou None se a tentativa perdeu o job para
+        outra (lock expirado).
+    """
+    handler = HANDLERS.get(job["kind"])
+    async with AsyncSessionLocal() as db:
+        try:
+            if handler is None:
+                raise LookupError(f"no handler for job kind {job['kind']!r}")
+            result = await handler(db, job["payload"])
+        except Exception:
+            await db.rollback()
+            error = traceback.format_exc(limit=5)
+            status = await repository.fail(
+                db, job["job_id"], job["attempts"], job["max_attempts"],
+                error)
+            logger.warning("job %s (%s) failed, attempt %s/%s: %s",
+                           job["job_id"], job["kind"], job["attempts"],
+                           job["max_attempts"], error.splitlines()[-1])
+            return status
+        completed = await repository.complete(
+            db, job["job_id"], job["attempts"], result)
+    if not completed:
+        # O lock expirou e o job foi reservado de novo: vale a outra
+        # tentativa
+        logger.warning("job %s (%s) attempt %s lost its lock",
+                       job["job_id"], job["kind"], job["attempts"])
+        return None
+    logger.info("job %s (%s) succeeded", job["job_id"], job["kind"])
+    return "succeeded"
+
+
+async def consume(stop: asyncio.Event) -> None:
+    """
+    Laço de consumo: reserva e executa jobs até stop ser sinalizado,
+    esperando JOB_POLL_SECONDS quando a fila está vazia.
+    Args:
+        stop: Evento de parada do worker.
+    """
+    while not stop.is_set():
+        try:
+            async with AsyncSessionLocal() as db:
+                job = await repository.claim(db)
+        except Exception:
+            logger.exception("could not claim a job")
+            job = None
+        if job is not None:
+            try:
+                await run_job(job)
+            except Exception:
+                # Erro ao registrar o resultado (ex.: conexão perdida): o
+                # job volta à fila por requeue_stale
+                logger.exception("could not finish job %s", job["job_id"])
+            continue
+        try:
+            await asyncio.wait_for(stop.wait(), settings.JOB_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def reap(stop: asyncio.Event) -> None:
+    """
+    Devolve periodicamente à fila os jobs presos em running por workers
+    que pararam no meio da execução, e remove as chaves de idempotência
+    expiradas.
+    Args:
+        stop: Evento de parada do worker.
+    """
+    interval = max(settings.JOB_LOCK_TIMEOUT_SECONDS / 4, 1)
+    while not stop.is_set():
+        try:
+            async with AsyncSessionLocal() as db:
+                requeued = await repository.requeue_stale(db)
+            if requeued:
+                logger.warning("requeued %s stale jobs", requeued)
+        except Exception:
+            logger.exception("could not requeue stale jobs")
+        try:
+            async with AsyncSessionLocal() as db:
+                purged = await idempotency_repo.purge_expired(db)
+            if purged:
+                logger.info("purged %s expired idempotency keys", purged)
+        except Exception:
+            logger.exception("could not purge idempotency keys")
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def main(concurrency: int) -> None:
+    """
+    Inicia os laços de consumo e para de forma ordenada em SIGINT/SIGTERM:
+    os jobs em andamento terminam antes de o processo sair.
+    Args:
+        concurrency: Número de jobs executados ao mesmo tempo.
+    """
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    logger.info("worker started with concurrency %s", concurrency)
+    try:
+        await asyncio.gather(
+            reap(stop), *(consume(stop) for _ in range(concurrency)))
+    finally:
+        await engine.dispose()
+    logger.info("worker stopped")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Executa os jobs em segundo plano da fila jobs.")
+    parser.add_argument("--concurrency", type=int,
+                        default=settings.JOB_CONCURRENCY,
+                        help="jobs executados ao mesmo tempo")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO,
+                        format="%(asctime)s %(levelname)s %(message)s")
+    asyncio.run(main(max(args.concurrency, 1)))
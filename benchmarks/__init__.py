@@ -0,0 +1,6 @@
+"""
+Benchmarks dos caminhos críticos de reserva e busca.
+seed gera a massa de dados, load dispara os cenários de carga contra a API
+e report resume latências e vazão; bench_services.py é a suíte de
+micro-benchmarks (pytest-benchmark) das funções de serviço.
+"""
@@ -0,0 +1,216 @@
+"""
+Micro-benchmarks (pytest-benchmark) das funções de serviço.
+As funções puras rodam sem banco; as de banco usam uma massa gerada por
+benchmarks.seed dentro de uma transação desfeita ao final, então o banco
+não é alterado. Tamanho da massa configurável por BENCH_PROPERTIES e
+BENCH_RESERVATIONS.
+
+O arquivo não segue o padrão test_*.py para ficar fora do pytest comum;
+rode-o explicitamente. A linha de base fica em JSON em benchmarks/results:
+    pytest benchmarks/bench_services.py \\
+        --benchmark-storage=benchmarks/results --benchmark-save=baseline
+    pytest benchmarks/bench_services.py \\
+        --benchmark-storage=benchmarks/results --benchmark-compare \\
+        --benchmark-compare-fail=median:20%
+"""
+import asyncio
+import itertools
+import os
+import random
+from collections import namedtuple
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+try:
+    from app.db import engine
+    from app.pagination import decode_cursor, encode_cursor
+    from app.properties import models as properties_models
+    from app.properties import repository as properties_repo
+    from app.properties import schemas as properties_schemas
+    from app.properties import service as properties_service
+    from app.responses import json_response, row_dicts
+    from app.reservations import export
+    from app.reservations import service as reservations_service
+    from app.reservations.schemas import ReservationCreate
+    from benchmarks import seed
+except Exception as exc:  # banco não configurado no ambiente
+    pytest.skip(f"database not configured: {exc}", allow_module_level=True)
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from sqlalchemy.ext.asyncio import AsyncSession
+
+BENCH_PROPERTIES = int(os.getenv("BENCH_PROPERTIES", "2000"))
+BENCH_RESERVATIONS = int(os.getenv("BENCH_RESERVATIONS", "20000"))
+TODAY = date.today()
+
+
+# Funções puras
+
+def test_flexible_windows(benchmark):
+    windows = benchmark(properties_service._flexible_windows,
+                        TODAY, TODAY + timedelta(days=90), 5, None)
+    assert len(windows) == 86
+
+
+def test_cursor_roundtrip(benchmark):
+    def roundtrip():
+        return decode_cursor(encode_cursor(Decimal("350.00"), 123456))
+    assert benchmark(roundtrip)[1] == 123456
+
+
+def test_overlaps_booked(benchmark):
+    booked = [(TODAY + timedelta(days=3 * n),
+               TODAY + timedelta(days=3 * n + 2)) for n in range(10000)]
+    probe = (TODAY + timedelta(days=15002), TODAY + timedelta(days=15003))
+    assert not benchmark(reservations_service._overlaps_booked, booked,
+                         *probe)
+
+
+def test_export_csv(benchmark):
+    rows = [(n, "Cliente", "cliente@example.com", TODAY,
+             TODAY + timedelta(days=3), 2, Decimal("750.00"), n % 100)
+            for n in range(5000)]
+    assert benchmark(export.to_csv, rows)
+
+
+# Serialização de uma página de 500 propriedades: caminho do
+# response_model (objetos ORM validados e jsonable_encoder) contra o das
+# linhas serializadas por TypeAdapter. Custo por linha = média / 500.
+
+PAGE_ROWS = 500
+
+
+def _property_values(n):
+    return ("Casa", "Rua A", str(n), "Centro", "São Paulo", "SP", "BRA",
+            2, 4, Decimal("350.00"), n)
+
+
+def test_serialize_property_page_response_model(benchmark, run):
+    properties = [properties_models.Properties(**dict(zip(
+        (column.key for column in properties_repo.LIST_COLUMNS),
+        _property_values(n)))) for n in range(PAGE_ROWS)]
+    field = create_model_field("response", properties_schemas.PropertyPage)
+
+    async def serialize():
+        content = await serialize_response(
+            field=field,
+            response_content={"items": properties, "next_cursor": None})
+        return JSONResponse(content).body
+    assert benchmark(run, serialize)
+
+
+def test_serialize_property_page_rows(benchmark):
+    row = namedtuple("Row", (column.key
+                             for column in properties_repo.LIST_COLUMNS))
+    rows = [row(*_property_values(n)) for n in range(PAGE_ROWS)]
+
+    def serialize():
+        page = {"items": row_dicts(rows, reservation=[]),
+                "next_cursor": None}
+        return json_response(properties_schemas.property_row_page,
+                             page).body
+    assert benchmark(serialize)
+
+
+# Funções de banco
+
+@pytest.fixture(scope="module")
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.run_until_complete(engine.dispose())
+    loop.close()
+
+
+@pytest.fixture(scope="module")
+def seeded(loop):
+    try:
+        conn = loop.run_until_complete(engine.connect())
+    except (OSError, ConnectionError) as exc:
+        pytest.skip(f"database unavailable: {exc}")
+    trans = loop.run_until_complete(conn.begin())
+    session = AsyncSession(bind=conn, expire_on_commit=False,
+                           join_transaction_mode="create_savepoint")
+    try:
+        counts = loop.run_until_complete(seed.seed(
+            conn, BENCH_PROPERTIES, BENCH_RESERVATIONS, today=TODAY))
+        yield session, counts
+    finally:
+        loop.run_until_complete(session.close())
+        loop.run_until_complete(trans.rollback())
+        loop.run_until_complete(conn.close())
+
+
+@pytest.fixture
+def run(loop):
+    """Executa a corrotina criada por factory no loop do módulo."""
+    def runner(factory):
+        return loop.run_until_complete(factory())
+    return runner
+
+
+def test_get_property(benchmark, seeded, run):
+    session, counts = seeded
+    ids = itertools.cycle(counts["property_ids"][:100])
+    result = benchmark(run, lambda: properties_service.get_property_service(
+        session, next(ids)))
+    assert result is not None
+
+
+def test_list_properties_filtered(benchmark, seeded, run):
+    session, _ = seeded
+    page = benchmark(run, lambda: properties_service.list_properties_service(
+        session, city="São Paulo", max_price=400, min_capacity=2,
+        sort="price_per_night", limit=20))
+    assert page["items"]
+
+
+def test_list_available_properties(benchmark, seeded, run):
+    session, _ = seeded
+    rng = random.Random(42)
+
+    def search():
+        start = TODAY + timedelta(days=rng.randint(1, 180))
+        return properties_service.list_available_properties_service(
+            session, start, start + timedelta(days=rng.randint(2, 7)),
+            city="Rio de Janeiro", limit=20)
+    assert benchmark(run, search)["items"]
+
+
+def test_flexible_availability(benchmark, seeded, run):
+    session, _ = seeded
+    start = TODAY + timedelta(days=30)
+    page = benchmark(
+        run, lambda: properties_service.list_flexible_availability_service(
+            session, start_date=start, end_date=start + timedelta(days=30),
+            nights=4, city="Florianópolis", limit=20))
+    assert page["items"]
+
+
+def test_create_reservation(benchmark, seeded, run):
+    session, counts = seeded
+    # Cada rodada reserva datas novas, sempre sem conflito, depois do fim
+    # da janela gerada pelo seed
+    ids = counts["property_ids"]
+    starts = itertools.count()
+
+    def book():
+        n = next(starts)
+        start = TODAY + timedelta(days=seed.HORIZON_DAYS + 1 + 2 * (
+            n // len(ids)))
+        return reservations_service.create_reservation_service(
+            session, ReservationCreate(
+                property_id=ids[n % len(ids)],
+                client_name="Bench",
+                client_email="bench@example.com",
+                start_date=start,
+                end_date=start + timedelta(days=2),
+                guests_quantity=1,
+            ))
+    assert benchmark(run, book)["reservation_id"]
@@ -0,0 +1,227 @@
+"""
+Cenários de carga contra uma instância da API em execução.
+Cada cenário roda por --duration segundos com --concurrency clientes
+simultâneos, e o resultado é resumido por benchmarks.report.
+
+Cenários:
+    book          criação de reservas disputando poucas propriedades e
+                  datas próximas (400 por indisponibilidade é esperado)
+    create        criação de propriedades
+    availability  busca de disponibilidade com datas e filtros variados
+    listing       listagem filtrada, às vezes seguindo o cursor
+    get           consulta de propriedade pelo ID
+
+Os cenários book e create gravam de verdade: use com a massa de
+benchmarks.seed, não com dados de produção.
+
+Uso:
+    python -m benchmarks.load --scenario availability --concurrency 32
+    python -m benchmarks.load --duration 60 --json resultado.json
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import date, timedelta
+import httpx
+from .report import Recorder, format_table, write_json
+
+# Propriedades amostradas da API para compor as requisições
+SAMPLE_SIZE = 1000
+
+# Mesmo prefixo de benchmarks.seed.TITLE_PREFIX, para que o --reset do
+# seed remova as propriedades criadas no cenário create
+TITLE_PREFIX = "Bench "
+
+
+class Context:
+    """
+    Dados compartilhados entre os clientes: amostra de propriedades e as
+    propriedades disputadas no cenário book.
+    """
+
+    def __init__(self, properties: list[dict], hot: int):
+        self.properties = properties
+        self.ids = [item["property_id"] for item in properties]
+        self.cities = sorted({item["address_city"] for item in properties})
+        self.hot = properties[:hot]
+        self.today = date.today()
+
+
+async def book(client: httpx.AsyncClient, rng: random.Random,
+               ctx: Context) -> httpx.Response:
+    target = rng.choice(ctx.hot)
+    start = ctx.today + timedelta(days=rng.randint(1, 60))
+    return await client.post("/reservations/", json={
+        "property_id": target["property_id"],
+        "client_name": "Load Test",
+        "client_email": f"load{rng.randint(1, 1000)}@example.com",
+        "start_date": start.isoformat(),
+        "end_date": (start + timedelta(days=rng.randint(1, 5))).isoformat(),
+        "guests_quantity": 1,
+    })
+
+
+async def create(client: httpx.AsyncClient, rng: random.Random,
+                 ctx: Context) -> httpx.Response:
+    template = rng.choice(ctx.properties)
+    return await client.post("/properties/", json={
+        **{key: template[key] for key in (
+            "address_street", "address_number", "address_neighborhood",
+            "address_city", "address_state", "country", "rooms",
+            "capacity")},
+        "title": f"{TITLE_PREFIX}Load {rng.randint(1, 10 ** 6)}",
+        "price_per_night": rng.randint(80, 900),
+    })
+
+
+async def availability(client: httpx.AsyncClient, rng: random.Random,
+                       ctx: Context) -> httpx.Response:
+    start = ctx.today + timedelta(days=rng.randint(1, 180))
+    params = {
+        "start_date": start.isoformat(),
+        "end_date": (start + timedelta(days=rng.randint(2, 7))).isoformat(),
+        "sort": rng.choice(("property_id", "price_per_night")),
+    }
+    if rng.random() < 0.5:
+        params["city"] = rng.choice(ctx.cities)
+    if rng.random() < 0.3:
+        params["min_capacity"] = rng.randint(2, 6)
+    return await client.get("/properties/availability", params=params)
+
+
+async def listing(client: httpx.AsyncClient, rng: random.Random,
+                  ctx: Context) -> httpx.Response:
+    params = {
+        "city": rng.choice(ctx.cities),
+        "max_price": rng.choice((200, 300, 500, 1000)),
+        "min_capacity": rng.randint(1, 4),
+        "sort": rng.choice(("property_id", "price_per_night")),
+    }
+    response = await client.get("/properties/", params=params)
+    cursor = response.status_code == 200 and response.json()["next_cursor"]
+    if cursor and rng.random() < 0.3:
+        response = await client.get("/properties/",
+                                    params={**params, "cursor": cursor})
+    return response
+
+
+async def get(client: httpx.AsyncClient, rng: random.Random,
+              ctx: Context) -> httpx.Response:
+    return await client.get(f"/properties/{rng.choice(ctx.ids)}")
+
+
+SCENARIOS = {
+    "book": book,
+    "create": create,
+    "availability": availability,
+    "listing": listing,
+    "get": get,
+}
+
+
+async def sample_properties(client: httpx.AsyncClient) -> list[dict]:
+    """
+    Lê até SAMPLE_SIZE propriedades pela listagem paginada.
+    Args:
+        client: Cliente HTTP da API.
+    Returns:
+        Propriedades lidas.
+    """
+    properties, cursor = [], None
+    while len(properties) < SAMPLE_SIZE:
+        params = {"limit": 100}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get("/properties/", params=params)
+        response.raise_for_status()
+        page = response.json()
+        properties += page["items"]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    return properties
+
+
+async def run_scenario(name: str, base_url: str, concurrency: int,
+                       duration: float, ctx: Context,
+                       random_seed: int) -> Recorder:
+    """
+    Executa um cenário com clientes concorrentes até o fim da duração.
+    Args:
+        name: Nome do cenário (chave de SCENARIOS).
+        base_url: URL da API.
+        concurrency: Clientes simultâneos.
+        duration: Duração em segundos.
+        ctx: Dados compartilhados.
+        random_seed: Semente base dos clientes.
+    Returns:
+        Amostras do cenário.
+    """
+    scenario = SCENARIOS[name]
+    recorder = Recorder(name)
+    limits = httpx.Limits(max_connections=concurrency,
+                          max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits,
+                                 timeout=30.0) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker(index: int):
+            rng = random.Random(random_seed * 1000 + index)
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    status = (await scenario(client, rng, ctx)).status_code
+                except httpx.HTTPError:
+                    status = 0
+                recorder.record(time.perf_counter() - started, status)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        recorder.elapsed = time.perf_counter() - started
+    return recorder
+
+
+async def main(args) -> None:
+    names = list(SCENARIOS) if "all" in args.scenario else args.scenario
+    async with httpx.AsyncClient(base_url=args.base_url,
+                                 timeout=30.0) as client:
+        properties = await sample_properties(client)
+    if not properties:
+        raise SystemExit("no properties found, run benchmarks.seed first")
+    ctx = Context(properties, args.hot_properties)
+
+    summaries = []
+    for name in names:
+        recorder = await run_scenario(name, args.base_url, args.concurrency,
+                                      args.duration, ctx, args.random_seed)
+        summaries.append(recorder.summary())
+    print(format_table(summaries))
+    if args.json:
+        write_json(args.json, summaries, {
+            "base_url": args.base_url,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "hot_properties": args.hot_properties,
+            "random_seed": args.random_seed,
+        })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Executa cenários de carga contra a API.")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--scenario", action="append",
+                        choices=list(SCENARIOS) + ["all"],
+                        help="repetível; padrão: todos")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0,
+                        help="segundos por cenário")
+    parser.add_argument("--hot-properties", type=int, default=5,
+                        help="propriedades disputadas no cenário book")
+    parser.add_argument("--random-seed", type=int, default=42)
+    parser.add_argument("--json", help="grava os resultados neste arquivo")
+    args = parser.parse_args()
+    args.scenario = args.scenario or ["all"]
+    asyncio.run(main(args))
@@ -0,0 +1,108 @@
+"""
+Resumo dos resultados de carga: latência p50/p95/p99 e vazão por cenário.
+"""
+import json
+import math
+from collections import Counter
+
+
+def percentile(values: list, q: float) -> float:
+    """
+    Percentil por interpolação linear entre as amostras vizinhas.
+    Args:
+        values: Amostras em ordem crescente.
+        q: Percentil entre 0 e 100.
+    Returns:
+        Valor do percentil (0.0 sem amostras).
+    """
+    if not values:
+        return 0.0
+    position = (len(values) - 1) * q / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (
+        position - lower)
+
+
+class Recorder:
+    """
+    Acumula as amostras (latência e status) de um cenário.
+    Status 0 representa erro de transporte (timeout, conexão recusada).
+    """
+
+    def __init__(self, scenario: str):
+        self.scenario = scenario
+        self.latencies: list[float] = []
+        self.statuses: Counter = Counter()
+        self.elapsed = 0.0
+
+    def record(self, seconds: float, status: int) -> None:
+        self.latencies.append(seconds)
+        self.statuses[status] += 1
+
+    def summary(self) -> dict:
+        """
+        Returns:
+            Requisições, vazão, percentis em milissegundos, erros (5xx e
+            falhas de transporte) e contagem por status.
+        """
+        latencies = sorted(self.latencies)
+        requests = len(latencies)
+        errors = sum(count for status, count in self.statuses.items()
+                     if status == 0 or status >= 500)
+        return {
+            "scenario": self.scenario,
+            "requests": requests,
+            "errors": errors,
+            "seconds": round(self.elapsed, 3),
+            "rps": round(requests / self.elapsed, 1) if self.elapsed else 0.0,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+            "statuses": {str(status): count for status, count
+                         in sorted(self.statuses.items())},
+        }
+
+
+COLUMNS = ("scenario", "requests", "rps", "p50_ms", "p95_ms", "p99_ms",
+           "max_ms", "errors")
+
+
+def format_table(summaries: list[dict]) -> str:
+    """
+    Formata os resumos como tabela de texto, um cenário por linha.
+    Args:
+        summaries: Resultados de Recorder.summary().
+    Returns:
+        Tabela alinhada, com a contagem por status ao final de cada linha.
+    """
+    rows = [COLUMNS] + [
+        tuple(str(summary[column]) for column in COLUMNS)
+        for summary in summaries
+    ]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(COLUMNS))]
+    lines = []
+    for index, row in enumerate(rows):
+        line = "  ".join(value.rjust(width) if i else value.ljust(width)
+                         for i, (value, width) in enumerate(zip(row, widths)))
+        if index:
+            statuses = summaries[index - 1]["statuses"]
+            line += "  " + " ".join(f"{status}={count}"
+                                    for status, count in statuses.items())
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def write_json(path: str, summaries: list[dict], settings: dict) -> None:
+    """
+    Grava os resultados e os parâmetros da execução em JSON, para comparar
+    execuções.
+    Args:
+        path: Arquivo de saída.
+        summaries: Resultados de Recorder.summary().
+        settings: Parâmetros usados (URL, concorrência, duração...).
+    """
+    with open(path, "w", encoding="utf-8") as output:
+        json.dump({"settings": settings, "results": summaries}, output,
+                  indent=2, ensure_ascii=False)
@@ -0,0 +1,267 @@
+"""
+Gerador de massa de dados para os benchmarks.
+Cria N propriedades e M reservas com distribuições próximas das reais:
+poucas cidades concentram a maior parte das propriedades, o preço varia
+com a cidade e a capacidade, a procura por propriedade segue uma lei de
+potência (poucas muito reservadas, muitas quase vazias) e a duração das
+estadias se concentra entre 2 e 5 noites, com caudas semanais e mensais.
+As reservas de uma mesma propriedade nunca se sobrepõem.
+
+Tudo é determinístico para uma mesma --random-seed e data de referência.
+As propriedades geradas têm título "Bench <n>" e podem ser removidas com
+--reset.
+
+Uso:
+    python -m benchmarks.seed --properties 10000 --reservations 200000
+    python -m benchmarks.seed --reset
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Iterator
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from app.db import engine
+from app.reservations.repository import CALENDAR_NIGHTS
+
+TITLE_PREFIX = "Bench "
+
+# (cidade, UF, peso, diária base, bairros)
+CITIES = (
+    ("São Paulo", "SP", 22, 280, ("Pinheiros", "Vila Madalena", "Moema",
+                                  "Bela Vista", "Capão Redondo")),
+    ("Rio de Janeiro", "RJ", 20, 350, ("Copacabana", "Ipanema", "Lapa",
+                                       "Botafogo", "Barra da Tijuca")),
+    ("Florianópolis", "SC", 14, 320, ("Jurerê", "Lagoa da Conceição",
+                                      "Centro", "Campeche")),
+    ("Salvador", "BA", 10, 240, ("Barra", "Rio Vermelho", "Pelourinho")),
+    ("Belo Horizonte", "MG", 8, 200, ("Savassi", "Lourdes", "Pampulha")),
+    ("Porto Alegre", "RS", 6, 190, ("Moinhos de Vento", "Cidade Baixa")),
+    ("Recife", "PE", 6, 220, ("Boa Viagem", "Recife Antigo")),
+    ("Fortaleza", "CE", 5, 210, ("Meireles", "Praia de Iracema")),
+    ("Curitiba", "PR", 5, 180, ("Batel", "Centro Cívico")),
+    ("Gramado", "RS", 4, 400, ("Centro", "Planalto")),
+)
+
+# Noites da estadia e seu peso relativo
+STAY_NIGHTS = ((1, 8), (2, 18), (3, 20), (4, 15), (5, 11), (6, 6), (7, 9),
+               (10, 4), (14, 5), (21, 2), (28, 2))
+
+# Janela das reservas em torno da data de referência
+HISTORY_DAYS = 180
+HORIZON_DAYS = 365
+# Ocupação máxima de uma propriedade na janela; o excedente de procura das
+# mais populares vai para as seguintes
+MAX_OCCUPANCY = 0.8
+
+PROPERTY_COLUMNS = (
+    "title", "address_street", "address_number", "address_neighborhood",
+    "address_city", "address_state", "country", "rooms", "capacity",
+    "price_per_night",
+)
+RESERVATION_COLUMNS = (
+    "client_name", "client_email", "start_date", "end_date",
+    "guests_quantity", "total_value", "property_id",
+)
+
+
+def generate_properties(rng: random.Random, count: int) -> Iterator[tuple]:
+    """
+    Gera as linhas de propriedades.
+    Args:
+        rng: Gerador aleatório semeado.
+        count: Número de propriedades.
+    Returns:
+        Iterador de tuplas na ordem de PROPERTY_COLUMNS.
+    """
+    weights = [city[2] for city in CITIES]
+    for n in range(count):
+        city, state, _, base_price, neighborhoods = rng.choices(
+            CITIES, weights)[0]
+        rooms = min(1 + int(rng.expovariate(0.8)), 8)
+        capacity = rooms * 2 + rng.choice((0, 0, 1, 2))
+        price = base_price * (0.6 + 0.25 * rooms) * rng.lognormvariate(0, 0.3)
+        yield (
+            f"{TITLE_PREFIX}{n}",
+            f"Rua {rng.randint(1, 500)}",
+            str(rng.randint(1, 9999)),
+            rng.choice(neighborhoods),
+            city,
+            state,
+            "BRA",
+            rooms,
+            capacity,
+            Decimal(f"{max(price, 60):.2f}"),
+        )
+
+
+def allocate(count: int, popularity: list, cap: int) -> list:
+    """
+    Divide as reservas proporcionalmente à popularidade, sem passar de cap
+    por propriedade. As mais populares são atendidas primeiro e o que
+    excede o limite é redistribuído entre as demais.
+    Args:
+        count: Total de reservas.
+        popularity: Peso de cada propriedade.
+        cap: Máximo de reservas por propriedade.
+    Returns:
+        Reservas de cada propriedade, na ordem de popularity.
+    """
+    wanted = [0] * len(popularity)
+    remaining, weight = count, sum(popularity)
+    for i in sorted(range(len(popularity)), key=lambda i: -popularity[i]):
+        if remaining <= 0 or weight <= 0:
+            break
+        wanted[i] = min(cap, round(remaining * popularity[i] / weight))
+        remaining -= wanted[i]
+        weight -= popularity[i]
+    return wanted
+
+
+def generate_reservations(rng: random.Random, properties: list,
+                          count: int, today: date) -> Iterator[tuple]:
+    """
+    Gera reservas sem sobreposição, distribuídas entre as propriedades
+    conforme uma popularidade com cauda longa.
+    Args:
+        rng: Gerador aleatório semeado.
+        properties: Lista de (property_id, capacity, price_per_night).
+        count: Número desejado de reservas (menos se não couberem).
+        today: Data de referência.
+    Returns:
+        Iterador de tuplas na ordem de RESERVATION_COLUMNS.
+    """
+    if not properties or count <= 0:
+        return
+    nights, weights = zip(*STAY_NIGHTS)
+    mean_stay = sum(n * w for n, w in STAY_NIGHTS) / sum(weights)
+    window = HISTORY_DAYS + HORIZON_DAYS
+    popularity = [rng.paretovariate(1.2) for _ in properties]
+    allocation = allocate(count, popularity,
+                          int(window * MAX_OCCUPANCY / mean_stay))
+    first_day = today - timedelta(days=HISTORY_DAYS)
+    # Base de clientes menor que o número de reservas: há clientes fiéis
+    clients = max(count // 3, 1)
+
+    for (property_id, capacity, price), wanted in zip(properties,
+                                                       allocation):
+        # Folga média entre estadias para espalhar as reservas na janela
+        mean_gap = max((window - wanted * mean_stay) / max(wanted, 1), 0.5)
+        day = int(rng.expovariate(1 / mean_gap))
+        for _ in range(wanted):
+            stay = rng.choices(nights, weights)[0]
+            if day + stay > window:
+                break
+            start = first_day + timedelta(days=day)
+            client = int(rng.paretovariate(0.8)) % clients
+            yield (
+                f"Cliente {client}",
+                f"cliente{client}@example.com",
+                start,
+                start + timedelta(days=stay),
+                rng.randint(1, capacity),
+                price * stay,
+                property_id,
+            )
+            day += stay + int(rng.expovariate(1 / mean_gap))
+
+
+async def reset(conn: AsyncConnection) -> int:
+    """
+    Remove as propriedades geradas e suas reservas.
+    Args:
+        conn: Conexão assíncrona, dentro de uma transação.
+    Returns:
+        Número de propriedades removidas.
+    """
+    pattern = {"pattern": f"{TITLE_PREFIX}%"}
+    await conn.execute(text(
+        "DELETE FROM reservations WHERE property_id IN ("
+        "SELECT property_id FROM properties WHERE title LIKE :pattern)"),
+        pattern)
+    result = await conn.execute(text(
+        "DELETE FROM properties WHERE title LIKE :pattern"), pattern)
+    return result.rowcount
+
+
+async def seed(conn: AsyncConnection, properties: int, reservations: int,
+               random_seed: int = 42, today: date | None = None) -> dict:
+    """
+    Grava a massa de dados com COPY, preenche o calendário de ocupação e
+    atualiza as estatísticas do planejador.
+    Args:
+        conn: Conexão assíncrona, dentro de uma transação.
+        properties: Número de propriedades.
+        reservations: Número desejado de reservas.
+        random_seed: Semente do gerador.
+        today: Data de referência (padrão: hoje).
+    Returns:
+        Contagens gravadas e IDs das propriedades geradas.
+    """
+    rng = random.Random(random_seed)
+    today = today or date.today()
+    driver = (await conn.get_raw_connection()).driver_connection
+    # Só as propriedades desta execução, mesmo que já existam outras
+    # geradas antes
+    generated = {
+        "pattern": f"{TITLE_PREFIX}%",
+        "after": (await conn.execute(text(
+            "SELECT coalesce(max(property_id), 0) FROM properties"
+        ))).scalar(),
+    }
+
+    await driver.copy_records_to_table(
+        "properties", columns=PROPERTY_COLUMNS,
+        records=generate_properties(rng, properties))
+    rows = (await conn.execute(text(
+        "SELECT property_id, capacity, price_per_night FROM properties "
+        "WHERE title LIKE :pattern AND property_id > :after "
+        "ORDER BY property_id"), generated)).all()
+    rows = [tuple(row) for row in rows]
+
+    records = list(generate_reservations(rng, rows, reservations, today))
+    await driver.copy_records_to_table(
+        "reservations", columns=RESERVATION_COLUMNS, records=records)
+
+    nights = await conn.execute(text(
+        CALENDAR_NIGHTS + "WHERE r.property_id IN (SELECT property_id "
+        "FROM properties WHERE title LIKE :pattern AND property_id > :after)"),
+        generated)
+    for table in ("properties", "reservations", "property_calendar"):
+        await conn.execute(text(f"ANALYZE {table}"))
+    return {
+        "properties": len(rows),
+        "reservations": len(records),
+        "nights": nights.rowcount,
+        "property_ids": [row[0] for row in rows],
+    }
+
+
+async def main(args) -> None:
+    started = time.perf_counter()
+    async with engine.begin() as conn:
+        removed = await reset(conn)
+        if removed:
+            print(f"removed {removed} benchmark properties")
+        if not args.reset:
+            counts = await seed(conn, args.properties, args.reservations,
+                                args.random_seed)
+            print(f"seeded {counts['properties']} properties, "
+                  f"{counts['reservations']} reservations, "
+                  f"{counts['nights']} calendar nights")
+    await engine.dispose()
+    print(f"done in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Gera a massa de dados dos benchmarks.")
+    parser.add_argument("--properties", type=int, default=10000)
+    parser.add_argument("--reservations", type=int, default=200000)
+    parser.add_argument("--random-seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true",
+                        help="só remove os dados gerados anteriormente")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,201 @@
+"""
+Infraestrutura de testes e benchmarks.
+
+Cada processo do pytest (ou cada worker do pytest-xdist) recebe um banco
+descartável, criado por cópia de um banco modelo migrado uma única vez com
+o Alembic; o modelo só é recriado quando a cabeça das migrações muda. As
+configurações da aplicação passam a apontar para esse banco antes de
+app.db ser importado, então nenhum teste toca o banco de desenvolvimento.
+
+Fixtures:
+    db_connection  conexão com uma transação desfeita ao final do teste
+    db_session     sessão sobre essa transação
+    client         httpx.AsyncClient sobre app.main.app (ASGITransport),
+                   com get_db/get_read_db usando a transação do teste
+
+Sem servidor PostgreSQL acessível, os testes que dependem do banco são
+ignorados, como antes.
+"""
+import asyncio
+import hashlib
+import os
+import warnings
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+
+ROOT = Path(__file__).resolve().parent
+
+# Serializa a criação do banco modelo entre processos
+TEMPLATE_LOCK = int(hashlib.sha1(b"seazone-test-template").hexdigest()[:15],
+                    16)
+
+_databases: dict = {}
+
+
+def _alembic_config(url: str):
+    from alembic.config import Config
+
+    # Sem arquivo .ini: o fileConfig do env.py desligaria os loggers da
+    # aplicação durante os testes
+    config = Config()
+    config.set_main_option("script_location", str(ROOT / "alembic"))
+    config.attributes["database_url"] = url
+    return config
+
+
+def _dsn(url) -> str:
+    return url.set(drivername="postgresql").render_as_string(
+        hide_password=False)
+
+
+async def _provision(base_url, template: str, database: str) -> None:
+    import asyncpg
+    from alembic import command
+    from alembic.script import ScriptDirectory
+
+    head = ScriptDirectory.from_config(
+        _alembic_config(str(base_url))).get_current_head()
+    admin = await asyncpg.connect(_dsn(base_url))
+    try:
+        await admin.execute("SELECT pg_advisory_lock($1)", TEMPLATE_LOCK)
+        try:
+            exists = await admin.fetchval(
+                "SELECT 1 FROM pg_database WHERE datname = $1", template)
+            version = None
+            if exists:
+                conn = await asyncpg.connect(
+                    _dsn(base_url.set(database=template)))
+                try:
+                    version = await conn.fetchval(
+                        "SELECT version_num FROM alembic_version")
+                except asyncpg.UndefinedTableError:
+                    pass
+                finally:
+                    await conn.close()
+            if version != head:
+                await admin.execute(
+                    f'DROP DATABASE IF EXISTS "{template}" WITH (FORCE)')
+                await admin.execute(f'CREATE DATABASE "{template}"')
+                # env.py roda as migrações com asyncio.run: fora deste loop
+                await asyncio.to_thread(
+                    command.upgrade,
+                    _alembic_config(str(base_url.set(database=template))),
+                    "head")
+            await admin.execute(
+                f'DROP DATABASE IF EXISTS "{database}" WITH (FORCE)')
+            await admin.execute(
+                f'CREATE DATABASE "{database}" TEMPLATE "{template}"')
+        finally:
+            await admin.execute("SELECT pg_advisory_unlock($1)",
+                                TEMPLATE_LOCK)
+    finally:
+        await admin.close()
+
+
+async def _drop(base_url, database: str) -> None:
+    import asyncpg
+
+    admin = await asyncpg.connect(_dsn(base_url))
+    try:
+        await admin.execute(
+            f'DROP DATABASE IF EXISTS "{database}" WITH (FORCE)')
+    finally:
+        await admin.close()
+
+
+def pytest_configure(config):
+    if config.option.help or config.option.version:
+        return
+    try:
+        from sqlalchemy.engine import make_url
+        from app.settings import settings
+    except Exception:  # sem DATABASE_URL configurada
+        return
+
+    base_url = make_url(settings.DATABASE_URL)
+    worker = os.getenv("PYTEST_XDIST_WORKER", "main")
+    template = f"{base_url.database}_test_template"
+    database = f"{base_url.database}_test_{worker}_{os.getpid()}"
+    try:
+        asyncio.run(_provision(base_url, template, database))
+    except (OSError, ConnectionError) as exc:
+        warnings.warn(f"database unavailable, tests will skip: {exc!r}")
+        return
+
+    url = base_url.set(database=database)
+    settings.DATABASE_URL = url.render_as_string(hide_password=False)
+    settings.SYNC_DATABASE_URL = url.set(
+        drivername="postgresql").render_as_string(hide_password=False)
+    settings.READ_DATABASE_URL = ""
+    _databases["base_url"] = base_url
+    _databases["database"] = database
+
+
+def pytest_unconfigure(config):
+    if "database" in _databases:
+        asyncio.run(_drop(_databases["base_url"], _databases["database"]))
+
+
+@pytest.fixture(scope="session")
+def test_engine():
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlalchemy.pool import NullPool
+    from app.settings import settings
+
+    # Sem pool: cada teste pode rodar em um event loop diferente
+    return create_async_engine(settings.DATABASE_URL, poolclass=NullPool)
+
+
+@pytest_asyncio.fixture
+async def db_connection(test_engine):
+    try:
+        conn = await test_engine.connect()
+    except (OSError, ConnectionError) as exc:
+        pytest.skip(f"database unavailable: {exc}")
+    trans = await conn.begin()
+    try:
+        yield conn
+    finally:
+        await trans.rollback()
+        await conn.close()
+
+
+def _session_factory(conn):
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    def factory():
+        # Os commits do código viram savepoints dentro da transação do teste
+        return AsyncSession(bind=conn, expire_on_commit=False,
+                            join_transaction_mode="create_savepoint")
+    return factory
+
+
+@pytest_asyncio.fixture
+async def db_session(db_connection):
+    async with _session_factory(db_connection)() as session:
+        yield session
+
+
+@pytest_asyncio.fixture
+async def client(db_connection):
+    import httpx
+    from app.db import get_db, get_read_db, read_session_factory
+    from app.main import app
+
+    factory = _session_factory(db_connection)
+
+    async def override_db():
+        async with factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_read_db] = override_db
+    app.dependency_overrides[read_session_factory] = lambda: factory
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app),
+                                     base_url="http://test") as ac:
+            yield ac
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,80 @@
+import unittest
+from datetime import date
+
+try:
+    import numpy as np
+    from app.availability import AvailabilityIndex
+except ImportError:  # numpy é opcional
+    np = None
+
+ORIGIN = date(2030, 1, 1)
+
+
+def day(offset):
+    return date.fromordinal(ORIGIN.toordinal() + offset)
+
+
+@unittest.skipIf(np is None, "numpy not installed")
+class TestAvailabilityIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = AvailabilityIndex(horizon_days=60)
+        # Propriedade 30 ocupada nas noites 3 e 4; 10 ocupada na noite 9
+        self.index.replace(
+            ORIGIN,
+            ids=[30, 10, 20],
+            capacity=[4, 2, 6],
+            price=[20000, 15000, 15000],
+            night_ids=[30, 30, 10],
+            night_offsets=[3, 4, 9],
+        )
+
+    def test_free_properties_half_open_range(self):
+        self.assertEqual(self.index.find(day(3), day(5)), [10, 20])
+        self.assertEqual(self.index.find(day(5), day(9)), [10, 20, 30])
+        self.assertEqual(self.index.find(day(1), day(3)), [10, 20, 30])
+
+    def test_filters(self):
+        self.assertEqual(
+            self.index.find(day(0), day(2), min_capacity=3), [20, 30])
+        self.assertEqual(
+            self.index.find(day(0), day(2), max_price=150.0), [10, 20])
+
+    def test_price_sort_and_keyset(self):
+        found = self.index.find(day(0), day(2), sort="price_per_night")
+        self.assertEqual(found, [10, 20, 30])
+        after = self.index.find(day(0), day(2), sort="price_per_night",
+                                after=["150.00", 10], limit=1)
+        self.assertEqual(after, [20])
+        self.assertEqual(
+            self.index.find(day(0), day(2), after=[10], limit=1), [20])
+
+    def test_mark_booked_and_released(self):
+        self.index.mark(20, day(0), day(2), True)
+        self.assertEqual(self.index.find(day(1), day(2)), [10, 30])
+        self.index.mark(20, day(0), day(2), False)
+        self.assertEqual(self.index.find(day(1), day(2)), [10, 20, 30])
+
+    def test_unknown_property_is_pending(self):
+        self.index.mark(99, day(0), day(2), True)
+        self.assertIn(99, self.index.dirty)
+
+    def test_upsert_new_changed_and_removed(self):
+        self.index.upsert(
+            ids=[15, 30], capacity=[8, 4], price=[10000, 20000],
+            night_ids=[15, 30], night_offsets=[0, 3], requested=[10, 15, 30])
+        self.assertEqual(self.index.find(day(0), day(1)), [20, 30])
+        self.assertEqual(self.index.find(day(3), day(4)), [15, 20])
+        self.assertEqual(self.index.find(day(4), day(5)), [15, 20, 30])
+        self.assertEqual(
+            self.index.find(day(1), day(2), sort="price_per_night"),
+            [15, 20, 30])
+
+    def test_outside_horizon_falls_back(self):
+        self.assertIsNone(self.index.find(day(-1), day(2)))
+        self.assertIsNone(self.index.find(day(50), day(61)))
+
+    def test_invalidation_marks_pending(self):
+        self.index.on_invalidate("availability:42")
+        self.index.on_invalidate("property:7")
+        self.index.on_invalidate("other:1")
+        self.assertEqual(self.index.dirty, {42, 7})
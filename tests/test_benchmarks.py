@@ -0,0 +1,69 @@
+import random
+import unittest
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from benchmarks import seed
+from benchmarks.report import Recorder, format_table, percentile
+
+
+class TestReport(unittest.TestCase):
+    def test_percentile_interpolates(self):
+        values = [1.0, 2.0, 3.0, 4.0]
+        self.assertEqual(percentile(values, 0), 1.0)
+        self.assertEqual(percentile(values, 50), 2.5)
+        self.assertEqual(percentile(values, 100), 4.0)
+        self.assertEqual(percentile([], 99), 0.0)
+
+    def test_summary_counts_errors_and_throughput(self):
+        recorder = Recorder("book")
+        for status in (200, 400, 500, 0):
+            recorder.record(0.01, status)
+        recorder.elapsed = 2.0
+        summary = recorder.summary()
+        self.assertEqual(summary["requests"], 4)
+        self.assertEqual(summary["errors"], 2)
+        self.assertEqual(summary["rps"], 2.0)
+        self.assertEqual(summary["p99_ms"], 10.0)
+        self.assertEqual(summary["statuses"],
+                         {"0": 1, "200": 1, "400": 1, "500": 1})
+        self.assertIn("book", format_table([summary]))
+
+
+class TestSeed(unittest.TestCase):
+    def setUp(self):
+        self.today = date(2025, 1, 1)
+
+    def test_properties_are_deterministic(self):
+        first = list(seed.generate_properties(random.Random(7), 50))
+        second = list(seed.generate_properties(random.Random(7), 50))
+        self.assertEqual(first, second)
+        for row in first:
+            self.assertTrue(row[0].startswith(seed.TITLE_PREFIX))
+            self.assertGreaterEqual(row[8], row[7] * 2)
+
+    def test_allocation_respects_cap(self):
+        wanted = seed.allocate(100, [50.0, 1.0, 1.0, 1.0], cap=40)
+        self.assertEqual(wanted[0], 40)
+        self.assertEqual(sum(wanted), 100)
+        self.assertTrue(all(n <= 40 for n in wanted))
+
+    def test_reservations_never_overlap(self):
+        properties = [(n, 4, Decimal("200.00")) for n in range(1, 201)]
+        rows = list(seed.generate_reservations(
+            random.Random(3), properties, 5000, self.today))
+        self.assertGreater(len(rows), 4500)
+        by_property = defaultdict(list)
+        for row in rows:
+            by_property[row[6]].append((row[2], row[3]))
+            self.assertLessEqual(row[4], 4)
+            self.assertEqual(row[5], Decimal("200.00") * (row[3] - row[2]).days)
+        for stays in by_property.values():
+            stays.sort()
+            for (_, end), (start, _) in zip(stays, stays[1:]):
+                self.assertLessEqual(end, start)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+
+from app.properties import bulk
+
+
+async def stream(data: bytes, size: int = 3):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+async def collect(records):
+    return [record async for record in records]
+
+
+class TestBulkParsing(unittest.IsolatedAsyncioTestCase):
+    async def test_lines_split_across_chunks(self):
+        lines = await collect(bulk.iter_lines(stream("São\r\nCapão".encode())))
+        self.assertEqual(lines, ["São", "Capão"])
+
+    async def test_ndjson_records_and_errors(self):
+        data = b'{"title": "Casa"}\n\nnot json\n[1]\n'
+        records = await collect(bulk.iter_ndjson(bulk.iter_lines(stream(data))))
+        self.assertEqual(records[0], (1, {"title": "Casa"}))
+        self.assertEqual(records[1][0], 3)
+        self.assertTrue(records[1][1].startswith("invalid JSON"))
+        self.assertEqual(records[2][0], 4)
+
+    async def test_csv_quoted_newline(self):
+        data = 'title,rooms\n"Casa\ndo Capão",4\nLab,2,extra\n'.encode()
+        records = await collect(bulk.iter_csv(bulk.iter_lines(stream(data))))
+        self.assertEqual(records[0], (1, {"title": "Casa\ndo Capão",
+                                          "rooms": "4"}))
+        self.assertEqual(records[1], (2, "expected 2 columns, got 3"))
+
+    async def test_csv_escaped_quotes_across_lines(self):
+        data = 'title,rooms\n"Casa ""da\nPonte""\nVelha",4\nLab,2\n'.encode()
+        records = await collect(bulk.iter_csv(bulk.iter_lines(stream(data))))
+        self.assertEqual(records, [
+            (1, {"title": 'Casa "da\nPonte"\nVelha', "rooms": "4"}),
+            (2, {"title": "Lab", "rooms": "2"})])
+
+    async def test_csv_unbalanced_quote_is_capped(self):
+        rows = "".join(f"Casa {index},2\n" for index in range(100))
+        data = f'title,rooms\n"Casa,1\n{rows}'.encode()
+        records = await collect(bulk.iter_csv(
+            bulk.iter_lines(stream(data, 64)), max_length=100))
+        self.assertEqual(records[0], (1, "record too long"))
+        # Depois do registro descartado, a leitura volta ao normal
+        self.assertEqual(records[-1], (len(records),
+                                       {"title": "Casa 99", "rooms": "2"}))
+        self.assertGreater(len(records), 80)
+
+    async def test_long_lines_are_discarded(self):
+        data = b"ok\n" + b"x" * 50 + b"\n\r\nfim\n" + b"y" * 50
+        lines = await collect(bulk.iter_lines(stream(data, 7), max_length=20))
+        self.assertEqual(lines, ["ok", None, "", "fim", None])
+
+    async def test_long_line_is_a_row_error(self):
+        data = b'{"title": "Casa"}\n' + b"x" * 100 + b'\n{"title": "Lab"}\n'
+        records = await collect(bulk.iter_ndjson(
+            bulk.iter_lines(stream(data, 16), max_length=50)))
+        self.assertEqual(records, [(1, {"title": "Casa"}),
+                                   (2, "line too long"),
+                                   (3, {"title": "Lab"})])
+
+        data = b"title,rooms\n" + b"x" * 100 + b",1\nLab,2\n"
+        records = await collect(bulk.iter_csv(
+            bulk.iter_lines(stream(data, 16), max_length=50)))
+        self.assertEqual(records, [(1, "record too long"),
+                                   (2, {"title": "Lab", "rooms": "2"})])
+
+
+if __name__ == "__main__":
+    unittest.main()
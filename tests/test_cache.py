@@ -0,0 +1,181 @@
+import asyncio
+import unittest
+
+from app.cache import (
+    AsyncTTLCache, CacheBackend, EntityCache, MemoryBackend, RedisBackend)
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+
+def make_entity_cache(backend, local_size=0):
+    return EntityCache(
+        "property",
+        backend,
+        ttl=60,
+        encode=str,
+        decode=str,
+        local_size=local_size,
+        local_ttl=60,
+    )
+
+
+class TestAsyncTTLCache(unittest.IsolatedAsyncioTestCase):
+    async def test_hit_after_load(self):
+        cache = AsyncTTLCache(maxsize=10, ttl=60)
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            return "casa"
+
+        self.assertEqual(await cache.get_or_load(1, loader), "casa")
+        self.assertEqual(await cache.get_or_load(1, loader), "casa")
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+
+    async def test_lru_eviction(self):
+        cache = AsyncTTLCache(maxsize=2, ttl=60)
+        cache.set(1, "a")
+        cache.set(2, "b")
+        cache.get(1)
+        cache.set(3, "c")
+        self.assertEqual(cache.get(2), (False, None))
+        self.assertEqual(cache.get(1), (True, "a"))
+        self.assertEqual(cache.evictions, 1)
+
+    async def test_ttl_expiration(self):
+        cache = AsyncTTLCache(maxsize=2, ttl=0.01)
+        cache.set(1, "a")
+        await asyncio.sleep(0.02)
+        self.assertEqual(cache.get(1), (False, None))
+        self.assertEqual(cache.expirations, 1)
+
+    async def test_concurrent_misses_are_coalesced(self):
+        cache = AsyncTTLCache(maxsize=10, ttl=60)
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "casa"
+
+        results = await asyncio.gather(
+            *(cache.get_or_load(1, loader) for _ in range(5)))
+        self.assertEqual(results, ["casa"] * 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.coalesced, 4)
+
+    async def test_invalidate_discards_inflight_load(self):
+        cache = AsyncTTLCache(maxsize=10, ttl=60)
+
+        async def loader():
+            await asyncio.sleep(0.01)
+            return "antigo"
+
+        task = asyncio.create_task(cache.get_or_load(1, loader))
+        await asyncio.sleep(0)
+        cache.invalidate(1)
+        self.assertEqual(await task, "antigo")
+        self.assertEqual(cache.get(1), (False, None))
+
+
+class TestEntityCache(unittest.IsolatedAsyncioTestCase):
+    async def test_invalidate_bumps_version(self):
+        cache = make_entity_cache(MemoryBackend(maxsize=10, ttl=60))
+        values = iter(["v1", "v2"])
+
+        async def loader():
+            return next(values)
+
+        self.assertEqual(await cache.get_or_load(1, loader), "v1")
+        self.assertEqual(await cache.get_or_load(1, loader), "v1")
+        await cache.invalidate(1)
+        self.assertEqual(await cache.get_or_load(1, loader), "v2")
+        self.assertEqual(cache.loads, 2)
+
+    async def test_memory_backend_counts_and_honours_ttl(self):
+        backend = MemoryBackend(maxsize=10, ttl=60)
+        self.assertIsNone(await backend.get("a", str))
+        await backend.set("a", "casa", 60, str)
+        await backend.set("b", "lab", 0.01, str)
+        self.assertEqual(await backend.get("a", str), "casa")
+        await asyncio.sleep(0.02)
+        self.assertIsNone(await backend.get("b", str))
+        stats = backend.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+
+    def test_backend_interface_is_abstract(self):
+        with self.assertRaises(TypeError):
+            CacheBackend()
+
+    async def test_variants_invalidated_together(self):
+        cache = make_entity_cache(MemoryBackend(maxsize=10, ttl=60))
+        await cache.get_or_load(1, lambda: asyncio.sleep(0, "dez"), "dez")
+        await cache.get_or_load(1, lambda: asyncio.sleep(0, "jan"), "jan")
+        await cache.invalidate(1)
+        self.assertEqual(
+            await cache.get_or_load(1, lambda: asyncio.sleep(0, "novo"), "jan"),
+            "novo")
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis not installed")
+class TestRedisBackend(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        server = fakeredis.FakeServer()
+        # Dois workers compartilhando o mesmo Redis
+        self.backends = [
+            RedisBackend(fakeredis.FakeAsyncRedis(
+                server=server, decode_responses=True))
+            for _ in range(2)
+        ]
+        for backend in self.backends:
+            await backend.start()
+
+    async def asyncTearDown(self):
+        for backend in self.backends:
+            await backend.close()
+
+    async def test_shared_value_between_workers(self):
+        first, second = (make_entity_cache(b, local_size=10)
+                         for b in self.backends)
+        await first.get_or_load(1, lambda: asyncio.sleep(0, "casa"))
+        value = await second.get_or_load(1, lambda: asyncio.sleep(0, "x"))
+        self.assertEqual(value, "casa")
+        self.assertEqual(second.shared_hits, 1)
+
+    async def test_invalidation_reaches_other_worker(self):
+        first, second = (make_entity_cache(b, local_size=10)
+                         for b in self.backends)
+        await second.get_or_load(1, lambda: asyncio.sleep(0, "antigo"))
+        await first.invalidate(1)
+        for _ in range(50):
+            if second.local.get(("1", "")) == (False, None):
+                break
+            await asyncio.sleep(0.02)
+        value = await second.get_or_load(1, lambda: asyncio.sleep(0, "novo"))
+        self.assertEqual(value, "novo")
+
+    async def test_local_variants_invalidated_together(self):
+        first, second = (make_entity_cache(b, local_size=10)
+                         for b in self.backends)
+        for cache in (first, second):
+            await cache.get_or_load(1, lambda: asyncio.sleep(0, "dez"), "dez")
+            await cache.get_or_load(1, lambda: asyncio.sleep(0, "jan"), "jan")
+        await first.invalidate(1)
+        for _ in range(50):
+            if not second.local.stats()["size"]:
+                break
+            await asyncio.sleep(0.02)
+        for cache in (first, second):
+            self.assertEqual(cache.local.stats()["size"], 0)
+            value = await cache.get_or_load(
+                1, lambda: asyncio.sleep(0, "novo"), "jan")
+            self.assertEqual(value, "novo")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
+from httpx import ASGITransport, AsyncClient
+
+from app import compression, http_cache
+from app.compression import CompressionMiddleware, accepted_encodings
+
+BODY = "reserva " * 500
+ETAG = http_cache.make_etag("reserva", 1)
+
+
+def make_app():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    @app.get("/large")
+    async def large():
+        return PlainTextResponse(BODY)
+
+    @app.get("/small")
+    async def small():
+        return PlainTextResponse("ok")
+
+    @app.get("/cached")
+    async def cached(request: Request):
+        headers = {"ETag": ETAG}
+        if http_cache.is_not_modified(request, ETAG):
+            return http_cache.not_modified(headers)
+        return PlainTextResponse(BODY, headers=headers)
+
+    return app
+
+
+async def get(path, accept_encoding, **headers):
+    transport = ASGITransport(app=make_app())
+    async with AsyncClient(transport=transport,
+                           base_url="http://test") as client:
+        return await client.get(
+            path, headers={"Accept-Encoding": accept_encoding, **headers})
+
+
+def test_accepted_encodings():
+    assert accepted_encodings("gzip, br;q=0.5") == {"gzip", "br"}
+    assert accepted_encodings("gzip;q=0, identity") == {"identity"}
+    assert accepted_encodings("") == set()
+
+
+@pytest.mark.asyncio
+async def test_gzip_above_threshold(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    response = await get("/large", "br, gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.text == BODY
+
+    response = await get("/small", "gzip")
+    assert "content-encoding" not in response.headers
+    response = await get("/large", "identity")
+    assert "content-encoding" not in response.headers
+    assert response.text == BODY
+
+
+@pytest.mark.asyncio
+async def test_brotli_when_available():
+    brotli = pytest.importorskip("brotli")
+    response = await get("/large", "gzip, br")
+    assert response.headers["content-encoding"] == "br"
+    # httpx só decodifica br com o pacote brotli; compara o corpo bruto
+    assert brotli.decompress(response.content) == BODY.encode()
+
+
+@pytest.mark.asyncio
+async def test_compressed_body_has_its_own_etag(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    response = await get("/cached", "identity")
+    assert response.headers["etag"] == ETAG
+
+    response = await get("/cached", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    gzip_etag = response.headers["etag"]
+    assert gzip_etag == http_cache.encoded_etag(ETAG, "gzip") != ETAG
+
+    response = await get("/cached", "gzip", **{"If-None-Match": gzip_etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == gzip_etag
+
+    # A variante sem compressão continua válida com Accept-Encoding: gzip
+    response = await get("/cached", "gzip", **{"If-None-Match": ETAG})
+    assert response.status_code == 304
+    assert response.headers["etag"] == ETAG
@@ -0,0 +1,166 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+from starlette.requests import Request
+
+from app import db
+from app.main import app
+from app.settings import settings
+
+PROPERTY = {
+    "title": "Casa do Sabotage",
+    "address_street": "Rua Canão",
+    "address_number": "1",
+    "address_neighborhood": "Brooklin",
+    "address_city": "Cidade Réplica",
+    "address_state": "SP",
+    "country": "BRA",
+    "rooms": 2,
+    "capacity": 2,
+    "price_per_night": 100.00
+}
+
+
+@pytest.fixture
+def replica(monkeypatch, client, db_connection):
+    """
+    Réplica apontando para o mesmo PostgreSQL. As sessões das duas
+    fábricas usam a transação do teste e registram qual foi usada.
+    """
+    monkeypatch.setattr(settings, "READ_DATABASE_URL", settings.DATABASE_URL)
+    monkeypatch.setattr(db, "read_engine", create_async_engine(
+        settings.DATABASE_URL, poolclass=NullPool))
+    used = []
+
+    def factory(name):
+        def session():
+            used.append(name)
+            return AsyncSession(bind=db_connection, expire_on_commit=False,
+                                join_transaction_mode="create_savepoint")
+        return session
+
+    monkeypatch.setattr(db, "AsyncSessionLocal", factory("primary"))
+    monkeypatch.setattr(db, "ReadSessionLocal", factory("read"))
+    # Leituras passam pela escolha real de read_session_factory
+    app.dependency_overrides.pop(db.get_read_db)
+    app.dependency_overrides.pop(db.read_session_factory)
+    return used
+
+
+def request(cookie=None):
+    headers = []
+    if cookie:
+        headers.append((b"cookie", cookie.encode()))
+    return Request({"type": "http", "headers": headers})
+
+
+def test_read_session_factory_follows_pin_cookie(monkeypatch):
+    monkeypatch.setattr(db, "ReadSessionLocal", object())
+    assert db.read_session_factory(request()) is db.ReadSessionLocal
+    assert db.read_session_factory(
+        request(f"{db.PRIMARY_PIN_COOKIE}=1")) is db.AsyncSessionLocal
+
+
+@pytest.mark.asyncio
+async def test_write_pins_reads_to_primary(client, replica):
+    response = await client.get("/properties/", params={
+        "city": PROPERTY["address_city"]})
+    assert db.PRIMARY_PIN_COOKIE not in response.headers.get("set-cookie", "")
+    assert replica == ["read"]
+
+    response = await client.post("/properties/", json=PROPERTY)
+    assert response.status_code == 200
+    cookie = response.headers["set-cookie"]
+    assert cookie.startswith(f"{db.PRIMARY_PIN_COOKIE}=1")
+    assert f"Max-Age={settings.READ_YOUR_WRITES_SECONDS}" in cookie
+
+    replica.clear()
+    response = await client.get(
+        f"/properties/{response.json()['property_id']}")
+    assert response.status_code == 200
+    assert replica == ["primary"]
+
+    client.cookies.clear()
+    replica.clear()
+    await client.get("/properties/", params={
+        "city": PROPERTY["address_city"]})
+    assert replica == ["read"]
+
+
+@pytest.mark.asyncio
+async def test_failed_write_does_not_pin(client, replica):
+    response = await client.post("/reservations/", json={
+        "property_id": 999999999, "client_name": "Sabotage",
+        "client_email": "sabotage@rap.com", "start_date": "2030-01-01",
+        "end_date": "2030-01-03", "guests_quantity": 1})
+    assert response.status_code == 404
+    assert "set-cookie" not in response.headers
+
+    response = await client.post("/properties/", json={"title": ""})
+    assert response.status_code == 422
+    assert "set-cookie" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_idempotent_responses_pin_reads(client, replica):
+    headers = {"Idempotency-Key": "pin-replica"}
+    first = await client.post("/properties/", json=PROPERTY, headers=headers)
+    client.cookies.clear()
+    retry = await client.post("/properties/", json=PROPERTY, headers=headers)
+    assert retry.headers["idempotent-replayed"] == "true"
+    for response in (first, retry):
+        assert response.headers["set-cookie"].startswith(
+            f"{db.PRIMARY_PIN_COOKIE}=1")
+
+    replica.clear()
+    await client.get(f"/properties/{retry.json()['property_id']}")
+    assert replica == ["primary"]
+
+
+@pytest.mark.asyncio
+async def test_pinned_reads_are_not_cached_publicly(client, replica):
+    response = await client.post("/properties/", json=PROPERTY)
+    property_id = response.json()["property_id"]
+    for path in (f"/properties/{property_id}", "/properties/"):
+        response = await client.get(path)
+        assert response.headers["cache-control"] == "private, no-store"
+        assert "Cookie" in response.headers["vary"]
+
+    client.cookies.clear()
+    response = await client.get(f"/properties/{property_id}")
+    assert response.headers["cache-control"] == settings.HTTP_CACHE_PROPERTY
+    assert "Cookie" in response.headers["vary"]
+
+
+@pytest.mark.asyncio
+async def test_pool_counts_only_checkouts_that_wait():
+    engine_ = create_async_engine(
+        settings.DATABASE_URL, poolclass=db.InstrumentedQueuePool,
+        pool_size=1, max_overflow=0)
+    pool = engine_.pool
+    pool.metrics_name = "test"
+
+    async def checkout():
+        async with engine_.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    try:
+        # Abrir a primeira conexão e reutilizar a ociosa não é espera
+        try:
+            await checkout()
+        except (OSError, ConnectionError) as exc:
+            pytest.skip(f"database unavailable: {exc}")
+        await checkout()
+        assert pool.wait_count == 0
+
+        async with engine_.connect():
+            waiting = asyncio.create_task(checkout())
+            await asyncio.sleep(0.05)
+        await waiting
+        assert pool.wait_count == 1
+        assert pool.wait_seconds_max >= 0.04
+    finally:
+        await engine_.dispose()
@@ -0,0 +1,31 @@
+import csv
+import io
+import unittest
+from datetime import date
+from decimal import Decimal
+
+from app.reservations import export
+from app.reservations.repository import EXPORT_COLUMNS
+
+
+class TestExportFormatting(unittest.TestCase):
+    def test_csv_header_matches_columns(self):
+        header = export.csv_header().decode()
+        self.assertEqual(header.rstrip("\r\n").split(","), list(EXPORT_COLUMNS))
+
+    def test_csv_quotes_free_text(self):
+        rows = [(1, 'Djonga, "o"', "djonga@rap.com", date(2024, 12, 10),
+                 date(2024, 12, 15), 2, Decimal("1750.00"), 3)]
+        parsed = list(csv.reader(io.StringIO(export.to_csv(rows).decode())))
+        self.assertEqual(parsed, [[
+            "1", 'Djonga, "o"', "djonga@rap.com", "2024-12-10",
+            "2024-12-15", "2", "1750.00", "3"]])
+
+    def test_ndjson_one_object_per_line(self):
+        rows = [('{"reservation_id":1}',), ('{"reservation_id":2}',)]
+        self.assertEqual(export.to_ndjson(rows),
+                         b'{"reservation_id":1}\n{"reservation_id":2}\n')
+
+    def test_empty_batch(self):
+        self.assertEqual(export.to_csv([]), b"")
+        self.assertEqual(export.to_ndjson([]), b"")
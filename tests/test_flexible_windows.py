@@ -0,0 +1,47 @@
+import unittest
+from datetime import date
+
+from fastapi import HTTPException
+
+from app.properties.service import MAX_FLEXIBLE_WINDOWS, _flexible_windows
+
+
+class TestFlexibleWindows(unittest.TestCase):
+    def test_every_start_with_stay_inside_range(self):
+        windows = _flexible_windows(
+            date(2025, 12, 1), date(2025, 12, 6), 3, None)
+        self.assertEqual(windows, [
+            (date(2025, 12, 1), date(2025, 12, 4)),
+            (date(2025, 12, 2), date(2025, 12, 5)),
+            (date(2025, 12, 3), date(2025, 12, 6)),
+        ])
+
+    def test_explicit_windows_sorted_and_deduplicated(self):
+        windows = _flexible_windows(None, None, None, [
+            "2025-12-20/2025-12-23", "2025-12-01/2025-12-03",
+            "2025-12-20/2025-12-23"])
+        self.assertEqual(windows, [
+            (date(2025, 12, 1), date(2025, 12, 3)),
+            (date(2025, 12, 20), date(2025, 12, 23)),
+        ])
+
+    def test_invalid_requests(self):
+        invalid = [
+            (date(2025, 12, 1), date(2025, 12, 3), 3, None),
+            (date(2025, 12, 1), None, 3, None),
+            (None, None, None, ["2025-12-01"]),
+            (None, None, None, ["2025-12-03/2025-12-01"]),
+            (date(2025, 12, 1), None, None, ["2025-12-01/2025-12-03"]),
+            (date(2025, 1, 1), date(2027, 1, 1), 1, None),
+        ]
+        for args in invalid:
+            with self.subTest(args=args):
+                with self.assertRaises(HTTPException) as ctx:
+                    _flexible_windows(*args)
+                self.assertEqual(ctx.exception.status_code, 400)
+
+    def test_window_limit(self):
+        windows = _flexible_windows(
+            date(2025, 1, 1), date(2025, 1, 1 + 30), 1, None)
+        self.assertEqual(len(windows), 30)
+        self.assertLess(len(windows), MAX_FLEXIBLE_WINDOWS)
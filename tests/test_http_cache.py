@@ -0,0 +1,100 @@
+from datetime import datetime, timezone
+
+import pytest
+from starlette.requests import Request
+
+from app.http_cache import cache_headers, is_not_modified, make_etag
+
+PROPERTY = {
+    "title": "Casa do Rincon Sapiência",
+    "address_street": "Rua Galanga",
+    "address_number": "33",
+    "address_neighborhood": "Cohab",
+    "address_city": "Cidade ETag",
+    "address_state": "SP",
+    "country": "BRA",
+    "rooms": 2,
+    "capacity": 3,
+    "price_per_night": 210.00
+}
+
+
+def request(**headers):
+    return Request({"type": "http", "headers": [
+        (name.replace("_", "-").encode(), value.encode())
+        for name, value in headers.items()]})
+
+
+def test_if_none_match():
+    etag = make_etag(1, 2)
+    assert etag == make_etag(1, 2) != make_etag(1, 3)
+    assert is_not_modified(request(if_none_match=etag), etag)
+    assert is_not_modified(request(if_none_match=f'"x", W/{etag}'), etag)
+    assert is_not_modified(request(if_none_match="*"), etag)
+    assert not is_not_modified(request(if_none_match='"x"'), etag)
+    assert not is_not_modified(request(), etag)
+
+
+def test_if_modified_since_only_without_if_none_match():
+    modified = datetime(2030, 1, 1, 12, 0, 0, 500000, tzinfo=timezone.utc)
+    since = cache_headers('"e"', "public", modified)["Last-Modified"]
+    assert since == "Tue, 01 Jan 2030 12:00:00 GMT"
+    assert is_not_modified(request(if_modified_since=since), '"e"', modified)
+    assert not is_not_modified(
+        request(if_modified_since="Tue, 01 Jan 2030 11:59:59 GMT"),
+        '"e"', modified)
+    assert not is_not_modified(
+        request(if_modified_since=since, if_none_match='"x"'),
+        '"e"', modified)
+    assert not is_not_modified(request(if_modified_since="bad"), '"e"',
+                               modified)
+
+
+@pytest.mark.asyncio
+async def test_property_read_revalidates(client):
+    response = await client.post("/properties/", json=PROPERTY)
+    property_id = response.json()["property_id"]
+
+    response = await client.get(f"/properties/{property_id}")
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"].startswith("public")
+    assert "last-modified" in response.headers
+    assert "version" not in response.json()
+
+    response = await client.get(f"/properties/{property_id}",
+                                headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    await client.put(f"/properties/{property_id}", json={"rooms": 3})
+    response = await client.get(f"/properties/{property_id}",
+                                headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["rooms"] == 3
+    assert response.headers["etag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_list_etag_follows_versions(client):
+    response = await client.post("/properties/", json=PROPERTY)
+    property_id = response.json()["property_id"]
+    params = {"city": PROPERTY["address_city"]}
+
+    response = await client.get("/properties/", params=params)
+    etag = response.headers["etag"]
+    assert "version" not in response.json()["items"][0]
+    response = await client.get("/properties/", params=params,
+                                headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    await client.put(f"/properties/{property_id}",
+                     json={"price_per_night": 250.0})
+    response = await client.get("/properties/", params=params,
+                                headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+    response = await client.get("/properties/availability", params={
+        "start_date": "2030-01-01", "end_date": "2030-01-02"})
+    assert "s-maxage" in response.headers["cache-control"]
@@ -0,0 +1,171 @@
+import hashlib
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import update
+
+from app.idempotency import models, repository
+from app.reservations.schemas import ReservationCreate
+
+PROPERTY = {
+    "title": "Casa do Emicida",
+    "address_street": "Rua Laboratório Fantasma",
+    "address_number": "20",
+    "address_neighborhood": "Cachoeirinha",
+    "address_city": "São Paulo",
+    "address_state": "SP",
+    "country": "BRA",
+    "rooms": 2,
+    "capacity": 2,
+    "price_per_night": 180.00
+}
+
+
+def reservation(property_id, guests=2):
+    return {
+        "property_id": property_id,
+        "client_name": "Emicida",
+        "client_email": "emicida@rap.com",
+        "start_date": "2030-10-01",
+        "end_date": "2030-10-03",
+        "guests_quantity": guests,
+    }
+
+
+async def create_property(client):
+    response = await client.post("/properties/", json=PROPERTY)
+    return response.json()["property_id"]
+
+
+@pytest.mark.asyncio
+async def test_retry_replays_first_response(client):
+    property_id = await create_property(client)
+    headers = {"Idempotency-Key": "retry-1"}
+    first = await client.post("/reservations/", json=reservation(property_id),
+                              headers=headers)
+    retry = await client.post("/reservations/", json=reservation(property_id),
+                              headers=headers)
+    assert first.status_code == retry.status_code == 200
+    assert retry.json() == first.json()
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in first.headers
+
+    response = await client.get("/reservations/",
+                                params={"property_id": property_id})
+    assert len(response.json()) == 1
+
+
+@pytest.mark.asyncio
+async def test_same_key_on_other_route_is_independent(client):
+    headers = {"Idempotency-Key": "shared"}
+    first = await client.post("/properties/", json=PROPERTY, headers=headers)
+    retry = await client.post("/properties/", json=PROPERTY, headers=headers)
+    assert retry.json()["property_id"] == first.json()["property_id"]
+
+    response = await client.post(
+        "/reservations/", json=reservation(first.json()["property_id"]),
+        headers=headers)
+    assert response.status_code == 200
+    assert "idempotent-replayed" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_key_reused_with_other_body_is_rejected(client):
+    property_id = await create_property(client)
+    headers = {"Idempotency-Key": "reused"}
+    await client.post("/reservations/", json=reservation(property_id, 1),
+                      headers=headers)
+    response = await client.post("/reservations/",
+                                 json=reservation(property_id, 2),
+                                 headers=headers)
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_errors_are_not_stored(client):
+    property_id = await create_property(client)
+    headers = {"Idempotency-Key": "too-many-guests"}
+    for _ in range(2):
+        response = await client.post("/reservations/",
+                                     json=reservation(property_id, 9),
+                                     headers=headers)
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Guests exceed capacity"
+
+
+@pytest.mark.asyncio
+async def test_key_in_progress_conflicts(client, db_session):
+    property_id = await create_property(client)
+    body = reservation(property_id)
+    request_hash = hashlib.sha256(
+        ReservationCreate(**body).model_dump_json().encode()).digest()
+    assert await repository.claim_key(db_session, "POST /reservations/",
+                                      "in-flight", request_hash)
+    response = await client.post("/reservations/", json=body,
+                                 headers={"Idempotency-Key": "in-flight"})
+    assert response.status_code == 409
+
+
+@pytest.mark.asyncio
+async def test_failed_store_rolls_back_the_write(client, monkeypatch):
+    property_id = await create_property(client)
+    store_response = repository.store_response
+
+    async def fail_once(*args):
+        monkeypatch.setattr(repository, "store_response", store_response)
+        raise RuntimeError("connection lost")
+
+    monkeypatch.setattr(repository, "store_response", fail_once)
+    headers = {"Idempotency-Key": "store-fails"}
+    with pytest.raises(RuntimeError):
+        await client.post("/reservations/", json=reservation(property_id),
+                          headers=headers)
+
+    # A reserva foi desfeita com a resposta: a repetição escreve uma vez
+    retry = await client.post("/reservations/", json=reservation(property_id),
+                              headers=headers)
+    assert retry.status_code == 200
+    assert "idempotent-replayed" not in retry.headers
+    response = await client.get("/reservations/",
+                                params={"property_id": property_id})
+    assert [item["reservation_id"] for item in response.json()] == [
+        retry.json()["reservation_id"]]
+
+
+@pytest.mark.asyncio
+async def test_store_response_only_for_the_claiming_request(db_session):
+    scope = "POST /properties/"
+    assert await repository.claim_key(db_session, scope, "owner", b"a")
+    assert not await repository.store_response(db_session, scope, "owner",
+                                               b"b", 200, b"{}")
+    assert await repository.store_response(db_session, scope, "owner",
+                                           b"a", 200, b"{}")
+    assert not await repository.store_response(db_session, scope, "owner",
+                                               b"a", 200, b"[]")
+    stored = await repository.get_key(db_session, scope, "owner")
+    assert stored.response == b"{}"
+
+
+@pytest.mark.asyncio
+async def test_expired_keys_are_reclaimed_and_purged(db_session):
+    scope = "POST /properties/"
+    assert await repository.claim_key(db_session, scope, "old", b"a")
+    assert not await repository.claim_key(db_session, scope, "old", b"a")
+    assert await repository.store_response(db_session, scope, "old", b"a",
+                                           200, b"{}")
+    await db_session.execute(
+        update(models.IdempotencyKey)
+        .where(models.IdempotencyKey.key == "old")
+        .values(created_at=models.IdempotencyKey.created_at
+                - timedelta(days=30)))
+    assert await repository.get_key(db_session, scope, "old") is None
+    assert await repository.claim_key(db_session, scope, "old", b"b")
+    stored = await repository.get_key(db_session, scope, "old")
+    assert stored.request_hash == b"b" and stored.status_code is None
+
+    await db_session.execute(
+        update(models.IdempotencyKey)
+        .where(models.IdempotencyKey.key == "old")
+        .values(created_at=models.IdempotencyKey.created_at
+                - timedelta(days=30)))
+    assert await repository.purge_expired(db_session) == 1
@@ -1,22 +1,62 @@
 import pytest
-from httpx import AsyncClient
 
 @pytest.mark.asyncio
-async def test_create_property():
-    async with AsyncClient(base_url="http://localhost:8000") as ac:
-        response = await ac.post("/properties/", json={
-            "title": "Casa de Férias Algarve",
-            "address_street": "Av Github",
-            "address_number": "2024",
-            "address_neighborhood": "Jurerê",
-            "address_city": "Florianópolis",
-            "address_state": "SC",
-            "country": "BRA",
-            "rooms": 3,
-            "capacity": 6,
-            "price_per_night": 120.00
-        })
+async def test_create_property(client):
+    response = await client.post("/properties/", json={
+        "title": "Casa de Férias Algarve",
+        "address_street": "Av Github",
+        "address_number": "2024",
+        "address_neighborhood": "Jurerê",
+        "address_city": "Florianópolis",
+        "address_state": "SC",
+        "country": "BRA",
+        "rooms": 3,
+        "capacity": 6,
+        "price_per_night": 120.00
+    })
     assert response.status_code in [200, 201]
     data = response.json()
     assert data["title"] == "Casa de Férias Algarve"
     assert data["capacity"] == 6
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_reports_database_limits_per_row(client):
+    import json
+
+    base = {
+        "title": "Casa do Criolo",
+        "address_street": "Rua Grajaú",
+        "address_number": "10",
+        "address_neighborhood": "Grajaú",
+        "address_city": "São Paulo",
+        "address_state": "SP",
+        "country": "BRA",
+        "rooms": 2,
+        "capacity": 4,
+        "price_per_night": 100.00
+    }
+    rows = [
+        base,
+        {**base, "title": "x" * 256},
+        {**base, "rooms": 2**31},
+        {**base, "price_per_night": 10**8},
+        # Só o PostgreSQL recusa: o bloco cai para a cópia linha a linha
+        {**base, "title": "Casa\x00"},
+        {**base, "title": "Casa do Emicida"},
+    ]
+    response = await client.post(
+        "/properties/bulk", params={"format": "ndjson"},
+        content="\n".join(json.dumps(row) for row in rows))
+    assert response.status_code == 200
+    body = response.json()
+    assert body["created"] == 2
+    assert [error["row"] for error in body["errors"]] == [2, 3, 4, 5]
+    assert body["errors"][0]["message"].startswith("title:")
+    assert body["errors"][3]["message"] == (
+        'invalid byte sequence for encoding "UTF8": 0x00')
+
+    first, last = body["property_ids"]
+    assert (await client.get(f"/properties/{first}")).status_code == 200
+    response = await client.get(f"/properties/{last}")
+    assert response.json()["title"] == "Casa do Emicida"
@@ -0,0 +1,177 @@
+import pytest
+
+PROPERTY = {
+    "title": "Casa da Sabotage",
+    "address_street": "Rua do Canão",
+    "address_number": "10",
+    "address_neighborhood": "Brooklin",
+    "address_city": "São Paulo",
+    "address_state": "SP",
+    "country": "BRA",
+    "rooms": 2,
+    "capacity": 4,
+    "price_per_night": 150.00
+}
+
+
+async def create_property(client):
+    response = await client.post("/properties/", json=PROPERTY)
+    assert response.status_code == 200
+    return response.json()["property_id"]
+
+
+def reservation(property_id, start_date, end_date, guests=2):
+    return {
+        "property_id": property_id,
+        "client_name": "Sabotage",
+        "client_email": "sabotage@rap.com",
+        "start_date": start_date,
+        "end_date": end_date,
+        "guests_quantity": guests,
+    }
+
+
+@pytest.mark.asyncio
+async def test_booking_and_calendar(client):
+    property_id = await create_property(client)
+    response = await client.post("/reservations/", json=reservation(
+        property_id, "2030-03-01", "2030-03-04"))
+    assert response.status_code == 200
+    assert response.json()["total_value"] == 450.0
+
+    response = await client.get(f"/properties/{property_id}/calendar",
+                                params={"from": "2030-02-28",
+                                        "to": "2030-03-05"})
+    booked = [day["night"] for day in response.json()["days"]
+              if not day["available"]]
+    assert booked == ["2030-03-01", "2030-03-02", "2030-03-03"]
+
+    response = await client.get("/properties/availability", params={
+        "start_date": "2030-03-02", "end_date": "2030-03-03",
+        "city": "São Paulo", "limit": 100})
+    ids = [item["property_id"] for item in response.json()["items"]]
+    assert property_id not in ids
+
+
+@pytest.mark.asyncio
+async def test_batch_rejects_conflicts_within_batch(client):
+    property_id = await create_property(client)
+    response = await client.post("/reservations/batch", json={"items": [
+        reservation(property_id, "2030-05-01", "2030-05-05"),
+        reservation(property_id, "2030-05-03", "2030-05-06"),
+        reservation(property_id, "2030-05-05", "2030-05-07"),
+    ]})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["accepted"] == 2
+    assert body["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_export_streams_rows_from_test_transaction(client):
+    property_id = await create_property(client)
+    await client.post("/reservations/", json=reservation(
+        property_id, "2030-07-01", "2030-07-03"))
+    response = await client.get("/reservations/export", params={
+        "format": "csv", "property_id": property_id})
+    assert response.status_code == 200
+    lines = response.text.strip().splitlines()
+    assert len(lines) == 2
+    assert "sabotage@rap.com" in lines[1]
+
+
+@pytest.mark.asyncio
+async def test_each_test_starts_clean(client):
+    response = await client.get("/reservations/", params={
+        "client_email": "sabotage@rap.com"})
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+@pytest.mark.asyncio
+async def test_booking_writes_calendar_in_same_statement(client):
+    property_id = await create_property(client)
+    response = await client.post("/reservations/", json=reservation(
+        property_id, "2030-09-10", "2030-09-12"))
+    body = response.json()
+    assert body["reservation_id"] and body["property_id"] == property_id
+    response = await client.post("/reservations/", json=reservation(
+        property_id, "2030-09-11", "2030-09-13"))
+    assert response.status_code == 400
+    response = await client.post("/reservations/", json=reservation(
+        property_id, "2030-09-10", "2030-09-11", guests=9))
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Guests exceed capacity"
+
+
+@pytest.mark.asyncio
+async def test_property_update_returns_new_values(client):
+    property_id = await create_property(client)
+    response = await client.put(f"/properties/{property_id}",
+                                json={"price_per_night": 200.0})
+    assert response.status_code == 200
+    assert response.json()["price_per_night"] == 200.0
+    assert response.json()["title"] == PROPERTY["title"]
+    response = await client.put(f"/properties/{property_id}", json={})
+    assert response.json()["price_per_night"] == 200.0
+    response = await client.put("/properties/999999999",
+                                json={"rooms": 3})
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_price_update_enqueues_recompute_in_same_transaction(
+        client, db_session, monkeypatch):
+    from sqlalchemy import select
+    from app.jobs import models as job_models
+    from app.jobs import repository as jobs_repo
+
+    property_id = await create_property(client)
+    response = await client.put(f"/properties/{property_id}",
+                                json={"price_per_night": 200.0})
+    assert response.status_code == 200
+    jobs = await db_session.execute(
+        select(job_models.Job.payload).where(
+            job_models.Job.kind == "reservations.recompute_totals"))
+    assert {"property_id": property_id} in jobs.scalars().all()
+
+    # Sem o job, o preço novo também não é gravado
+    async def broken_enqueue(*args, **kwargs):
+        raise RuntimeError("queue unavailable")
+
+    monkeypatch.setattr(jobs_repo, "enqueue", broken_enqueue)
+    with pytest.raises(RuntimeError):
+        await client.put(f"/properties/{property_id}",
+                         json={"price_per_night": 300.0})
+    response = await client.get(f"/properties/{property_id}")
+    assert response.json()["price_per_night"] == 200.0
+
+
+@pytest.mark.asyncio
+async def test_calendar_rebuild_invalidates_availability(
+        client, db_session, monkeypatch):
+    from app import cache
+    from app.reservations import repository
+
+    property_id = await create_property(client)
+    for start, end in (("2030-10-01", "2030-10-03"),
+                       ("2030-10-05", "2030-10-06")):
+        response = await client.post("/reservations/", json=reservation(
+            property_id, start, end))
+        assert response.status_code == 200
+
+    invalidated = []
+
+    async def record(namespace, ident):
+        invalidated.append((namespace, ident))
+
+    monkeypatch.setattr(cache, "invalidate", record)
+    nights = await repository.rebuild_calendar(db_session, property_id)
+    assert nights == 3
+    assert invalidated == [("availability", property_id)]
+
+    response = await client.get(f"/properties/{property_id}/calendar",
+                                params={"from": "2030-10-01",
+                                        "to": "2030-10-07"})
+    assert [day["available"] for day in response.json()["days"]] == [
+        False, False, True, True, False, True]
@@ -0,0 +1,156 @@
+"""
+Testes da fila de jobs: backoff das novas tentativas e o ciclo
+enfileirar/reservar/falhar/concluir contra o banco, dentro de uma
+transação desfeita ao final.
+"""
+import asyncio
+from datetime import datetime, timezone
+from unittest import mock
+
+import pytest
+from sqlalchemy import update
+
+try:
+    from app import worker
+    from app.jobs import models, repository
+    from app.jobs.handlers import HANDLERS
+    from app.settings import settings
+except Exception as exc:  # banco não configurado no ambiente
+    pytest.skip(f"database not configured: {exc}", allow_module_level=True)
+
+# Antes de qualquer job real, para ser o primeiro da fila
+PAST = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+
+def test_backoff_grows_and_is_capped():
+    with mock.patch("random.uniform", return_value=1.0):
+        delays = [repository.backoff_seconds(n) for n in range(1, 30)]
+    assert delays[0] == settings.JOB_BACKOFF_SECONDS
+    assert delays[1] == settings.JOB_BACKOFF_SECONDS * 2
+    assert delays == sorted(delays)
+    assert delays[-1] == settings.JOB_BACKOFF_MAX_SECONDS
+
+
+def test_backoff_jitter_stays_below_delay():
+    for _ in range(100):
+        delay = repository.backoff_seconds(1)
+        assert settings.JOB_BACKOFF_SECONDS / 2 <= delay
+        assert delay <= settings.JOB_BACKOFF_SECONDS
+
+
+def test_handlers_registered():
+    assert {"calendar.rebuild",
+            "reservations.recompute_totals"} <= set(HANDLERS)
+
+
+@pytest.mark.asyncio
+async def test_claim_fail_retry_and_complete(db_session):
+    job = await repository.enqueue(db_session, "calendar.rebuild", {},
+                                   run_at=PAST, max_attempts=2)
+    assert job.status == models.QUEUED
+
+    claimed = await repository.claim(db_session)
+    assert claimed["job_id"] == job.job_id
+    assert claimed["status"] == models.RUNNING
+    assert claimed["attempts"] == 1
+
+    status = await repository.fail(db_session, job.job_id, 1, 2, "boom")
+    assert status == models.QUEUED
+    # Em backoff: não pode ser reservado de novo imediatamente
+    retry = await repository.claim(db_session)
+    assert retry is None or retry["job_id"] != job.job_id
+
+    await db_session.execute(
+        update(models.Job).where(models.Job.job_id == job.job_id)
+        .values(run_at=PAST))
+    retry = await repository.claim(db_session)
+    assert retry["job_id"] == job.job_id and retry["attempts"] == 2
+    assert await repository.complete(db_session, job.job_id, 2, {"nights": 0})
+    done = await repository.get_job(db_session, job.job_id)
+    await db_session.refresh(done)
+    assert done.status == models.SUCCEEDED
+    assert done.result == {"nights": 0}
+    assert done.finished_at is not None
+
+
+@pytest.mark.asyncio
+async def test_fail_without_attempts_left(db_session):
+    job = await repository.enqueue(db_session, "calendar.rebuild", {},
+                                   run_at=PAST, max_attempts=1)
+    await repository.claim(db_session)
+    status = await repository.fail(db_session, job.job_id, 1, 1, "boom")
+    assert status == models.FAILED
+    listed = await repository.list_jobs(db_session, status=models.FAILED,
+                                        kind="calendar.rebuild", limit=1)
+    assert listed[0].job_id == job.job_id
+    await db_session.refresh(listed[0])
+    assert listed[0].last_error == "boom"
+
+
+@pytest.mark.asyncio
+async def test_late_result_of_requeued_attempt_is_ignored(db_session):
+    job = await repository.enqueue(db_session, "calendar.rebuild", {},
+                                   run_at=PAST, max_attempts=3)
+    first = await repository.claim(db_session)
+    # Lock expirado: devolvido à fila e reservado por outro worker
+    await db_session.execute(
+        update(models.Job).where(models.Job.job_id == job.job_id)
+        .values(locked_at=PAST))
+    assert await repository.requeue_stale(db_session) >= 1
+    await db_session.execute(
+        update(models.Job).where(models.Job.job_id == job.job_id)
+        .values(run_at=PAST))
+    second = await repository.claim(db_session)
+    assert second["job_id"] == job.job_id and second["attempts"] == 2
+
+    assert not await repository.complete(db_session, job.job_id,
+                                         first["attempts"], {"late": True})
+    assert await repository.fail(db_session, job.job_id, first["attempts"], 3,
+                                 "late") is None
+    current = await repository.get_job(db_session, job.job_id)
+    await db_session.refresh(current)
+    assert current.status == models.RUNNING and current.attempts == 2
+
+    assert await repository.complete(db_session, job.job_id,
+                                     second["attempts"], {"nights": 0})
+
+
+@pytest.mark.asyncio
+async def test_consume_survives_errors_finishing_a_job(monkeypatch):
+    stop = asyncio.Event()
+    claimed = [{"job_id": 1}, {"job_id": 2}]
+    finished = []
+
+    async def claim(db):
+        if claimed:
+            return claimed.pop(0)
+        stop.set()
+        return None
+
+    async def run_job(job):
+        finished.append(job["job_id"])
+        raise ConnectionError("connection lost")
+
+    monkeypatch.setattr(worker.repository, "claim", claim)
+    monkeypatch.setattr(worker, "run_job", run_job)
+    await asyncio.wait_for(worker.consume(stop), 5)
+    assert finished == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_enqueue_validates_payload(client):
+    for payload in ({}, {"property_id": "abc"}, {"property_id": 1, "x": 1}):
+        response = await client.post("/jobs/", json={
+            "kind": "reservations.recompute_totals", "payload": payload})
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"][:2] == ["body", "payload"]
+
+    response = await client.post("/jobs/", json={
+        "kind": "reservations.recompute_totals",
+        "payload": {"property_id": "7"}})
+    assert response.status_code == 202
+    assert response.json()["payload"] == {"property_id": 7}
+
+    response = await client.post("/jobs/", json={"kind": "calendar.rebuild"})
+    assert response.status_code == 202
+    assert response.json()["payload"] == {}
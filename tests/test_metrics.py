@@ -0,0 +1,91 @@
+import unittest
+
+import httpx
+from fastapi import FastAPI
+
+from app import metrics
+
+
+class TestHistogram(unittest.TestCase):
+    def test_buckets_are_cumulative(self):
+        histogram = metrics.Histogram("t_seconds", "Teste.", (0.1, 1.0),
+                                      ("route",))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, "/x")
+        lines = histogram.render()
+        self.assertIn('t_seconds_bucket{route="/x",le="0.1"} 2', lines)
+        self.assertIn('t_seconds_bucket{route="/x",le="1.0"} 3', lines)
+        self.assertIn('t_seconds_bucket{route="/x",le="+Inf"} 4', lines)
+        self.assertIn('t_seconds_count{route="/x"} 4', lines)
+        self.assertEqual(histogram.sum("/x"), 3.65)
+
+    def test_label_values_are_escaped(self):
+        counter = metrics.Counter("t_total", "Teste.", ("route",))
+        counter.inc('a"b\\c\n')
+        self.assertIn('t_total{route="a\\"b\\\\c\\n"} 1', counter.render())
+
+    def test_unlabeled_counter_starts_at_zero(self):
+        counter = metrics.Counter("t_total", "Teste.")
+        self.assertEqual(counter.render()[-1], "t_total 0")
+
+
+class TestRequestStats(unittest.TestCase):
+    def test_queries_are_attributed_to_current_request(self):
+        stats = metrics.RequestStats()
+        token = metrics._current.set(stats)
+        try:
+            metrics.record_query("SELECT 1", 0.002)
+            metrics.record_query("SELECT 2", 0.003)
+        finally:
+            metrics._current.reset(token)
+        metrics.record_query("SELECT 3", 0.001)
+        self.assertEqual(stats.queries, 2)
+        self.assertAlmostEqual(stats.db_seconds, 0.005)
+
+    def test_server_timing_header(self):
+        stats = metrics.RequestStats()
+        stats.queries, stats.db_seconds = 3, 0.0125
+        self.assertEqual(stats.server_timing(0.02),
+                         'app;dur=20.0, db;dur=12.5;desc="3 queries", '
+                         'pool;dur=0.0')
+
+
+class TestMetricsMiddleware(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        app = FastAPI()
+
+        @app.get("/items/{item_id}")
+        async def get_item(item_id: int):
+            metrics.record_query("SELECT * FROM items", 0.001)
+            return {"item_id": item_id}
+
+        app.add_middleware(metrics.MetricsMiddleware, server_timing=True)
+        self.client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    async def test_records_route_template_and_queries(self):
+        before = metrics.request_duration.count(
+            "GET", "/items/{item_id}", "200")
+        for item_id in (1, 2):
+            response = await self.client.get(f"/items/{item_id}")
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('db;dur=1.0;desc="1 queries"',
+                          response.headers["server-timing"])
+        self.assertEqual(metrics.request_duration.count(
+            "GET", "/items/{item_id}", "200"), before + 2)
+        self.assertGreaterEqual(
+            metrics.request_queries.sum("GET", "/items/{item_id}"), 2)
+
+    async def test_unmatched_paths_share_one_label(self):
+        before = metrics.request_duration.count("GET", "unmatched", "404")
+        await self.client.get("/nope/1")
+        await self.client.get("/nope/2")
+        self.assertEqual(metrics.request_duration.count(
+            "GET", "unmatched", "404"), before + 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,26 @@
+import base64
+import unittest
+
+from app.pagination import decode_cursor, encode_cursor
+
+
+class TestCursor(unittest.TestCase):
+    def test_round_trip(self):
+        cursor = encode_cursor(42)
+        self.assertEqual(decode_cursor(cursor), [42])
+
+    def test_cursor_is_url_safe(self):
+        cursor = encode_cursor("São Paulo", 99)
+        self.assertNotIn("=", cursor)
+        self.assertNotIn("/", cursor)
+        self.assertEqual(decode_cursor(cursor), ["São Paulo", 99])
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(ValueError):
+            decode_cursor("not-a-cursor")
+        with self.assertRaises(ValueError):
+            decode_cursor(base64.urlsafe_b64encode(b'{"id": 1}').decode())
+
+
+if __name__ == "__main__":
+    unittest.main()
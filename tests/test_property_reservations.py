@@ -0,0 +1,136 @@
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event
+
+PROPERTY = {
+    "title": "Casa da Karol Conká",
+    "address_street": "Rua Tombei",
+    "address_number": "12",
+    "address_neighborhood": "Boqueirão",
+    "address_city": "Cidade Include",
+    "address_state": "PR",
+    "country": "BRA",
+    "rooms": 2,
+    "capacity": 4,
+    "price_per_night": 150.00
+}
+
+TODAY = date.today()
+
+
+@contextmanager
+def count_queries(db_connection):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        # Savepoints vêm da transação do teste, não da rota
+        if "SAVEPOINT" not in statement:
+            statements.append(statement)
+
+    sync_connection = db_connection.sync_connection
+    event.listen(sync_connection, "before_cursor_execute",
+                 before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(sync_connection, "before_cursor_execute",
+                     before_cursor_execute)
+
+
+async def book(client, property_id, start, nights=2):
+    response = await client.post("/reservations/", json={
+        "property_id": property_id,
+        "client_name": "Karol Conká",
+        "client_email": "karol@rap.com",
+        "start_date": str(start),
+        "end_date": str(start + timedelta(days=nights)),
+        "guests_quantity": 2,
+    })
+    assert response.status_code == 200
+    return response.json()["reservation_id"]
+
+
+async def create_properties(client, count):
+    property_ids = []
+    for index in range(count):
+        response = await client.post("/properties/", json=PROPERTY)
+        property_id = response.json()["property_id"]
+        await book(client, property_id, TODAY + timedelta(days=10 + index))
+        property_ids.append(property_id)
+    return property_ids
+
+
+@pytest.mark.asyncio
+async def test_get_includes_upcoming_reservations(client):
+    [property_id] = await create_properties(client, 1)
+    later = await book(client, property_id, TODAY + timedelta(days=30))
+    past = await book(client, property_id, TODAY - timedelta(days=5))
+
+    response = await client.get(f"/properties/{property_id}")
+    assert "upcoming_reservations" not in response.json()
+    assert response.json()["reservation"] == []
+
+    response = await client.get(f"/properties/{property_id}",
+                                params={"include": "reservations"})
+    body = response.json()
+    windows = body["upcoming_reservations"]
+    assert [window["start_date"] for window in windows] == [
+        str(TODAY + timedelta(days=10)), str(TODAY + timedelta(days=30))]
+    assert body["reservation"][-1] == later and past not in body["reservation"]
+    assert "last-modified" not in response.headers
+
+    # Nova reserva não muda a versão, mas muda o ETag
+    etag = response.headers["etag"]
+    await book(client, property_id, TODAY + timedelta(days=60))
+    response = await client.get(f"/properties/{property_id}",
+                                params={"include": "reservations"},
+                                headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.json()["upcoming_reservations"]) == 3
+
+    response = await client.get(f"/properties/{property_id}",
+                                params={"include": "hosts"})
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_list_includes_reservations_with_projection(client):
+    [property_id] = await create_properties(client, 1)
+    response = await client.get("/properties/", params={
+        "city": PROPERTY["address_city"], "include": "reservations",
+        "fields": "title"})
+    [item] = response.json()["items"]
+    assert set(item) == {"title", "upcoming_reservations"}
+    assert item["upcoming_reservations"][0]["start_date"] == str(
+        TODAY + timedelta(days=10))
+
+    response = await client.get("/properties/", params={
+        "fields": "upcoming_reservations"})
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_list_include_query_count_is_constant(client, db_connection):
+    property_ids = await create_properties(client, 6)
+    params = {"city": PROPERTY["address_city"], "include": "reservations"}
+
+    counts = []
+    for limit in (1, 6):
+        with count_queries(db_connection) as statements:
+            response = await client.get("/properties/",
+                                        params={**params, "limit": limit})
+        assert len(response.json()["items"]) == limit
+        assert all(item["upcoming_reservations"]
+                   for item in response.json()["items"])
+        counts.append(len(statements))
+    # Página + uma consulta em lote das reservas, qualquer que seja o limit
+    assert counts == [2, 2]
+
+    # Detalhe: a propriedade + o selectinload das reservas
+    with count_queries(db_connection) as statements:
+        response = await client.get(f"/properties/{property_ids[0]}",
+                                    params={"include": "reservations"})
+    assert response.json()["upcoming_reservations"]
+    assert len(statements) == 2
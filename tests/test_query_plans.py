@@ -0,0 +1,163 @@
+"""
+Testes de regressão de plano de execução (EXPLAIN) das consultas de reservas.
+Populam o banco com um volume grande de reservas dentro de uma transação
+(desfeita ao final) e falham se alguma consulta do repositório voltar a
+fazer Seq Scan nas tabelas reservations ou property_calendar.
+Tamanho da carga configurável por EXPLAIN_SEED_RESERVATIONS.
+"""
+import os
+from datetime import date
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+try:
+    from app.db import engine
+    from app.properties import repository as properties_repo
+    from app.reservations import repository as reservations_repo
+except Exception as exc:  # banco não configurado no ambiente
+    pytest.skip(f"database not configured: {exc}", allow_module_level=True)
+
+SEED_RESERVATIONS = int(os.getenv("EXPLAIN_SEED_RESERVATIONS", "1000000"))
+SEED_PROPERTIES = 10000
+
+SEED_SQL = """
+WITH seeded AS (
+    INSERT INTO properties (
+        title, address_street, address_number, address_neighborhood,
+        address_city, address_state, country, rooms, capacity,
+        price_per_night)
+    SELECT 'Seed ' || g, 'Rua Seed', g::text, 'Centro', 'Florianópolis',
+           'SC', 'BRA', 2, 4, 100 + g % 400
+    FROM generate_series(1, :properties) AS g
+    RETURNING property_id
+), numbered AS (
+    SELECT property_id, row_number() OVER (ORDER BY property_id) - 1 AS n
+    FROM seeded
+)
+INSERT INTO reservations (
+    client_name, client_email, start_date, end_date, guests_quantity,
+    total_value, property_id)
+SELECT 'Seed', 'seed' || (g % 100000) || '@example.com',
+       DATE '2020-01-06' + (g / :properties) * 7,
+       DATE '2020-01-06' + (g / :properties) * 7 + 1 + g % 6,
+       2, 100, numbered.property_id
+FROM generate_series(0, :reservations - 1) AS g
+JOIN numbered ON numbered.n = g % :properties
+"""
+
+SEED_CALENDAR_SQL = reservations_repo.CALENDAR_NIGHTS + (
+    "JOIN properties p ON p.property_id = r.property_id "
+    "WHERE p.title LIKE 'Seed %'"
+)
+
+
+class ExplainSession:
+    """
+    Substitui a sessão nas funções do repositório: em vez de executar a
+    consulta, executa EXPLAIN e guarda o plano gerado.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.plans = []
+
+    async def execute(self, statement):
+        sql = statement.compile(
+            dialect=postgresql.dialect(),
+            compile_kwargs={"literal_binds": True})
+        result = await self.session.execute(
+            text(f"EXPLAIN (FORMAT JSON) {sql}"))
+        plan = result.scalar()
+        self.plans.append(plan)
+        return await self.session.execute(text("SELECT NULL WHERE false"))
+
+
+def seq_scans(node):
+    """Retorna as tabelas lidas por Seq Scan em um nó do plano."""
+    found = []
+    if node.get("Node Type") == "Seq Scan":
+        found.append(node.get("Relation Name"))
+    for child in node.get("Plans", []):
+        found.extend(seq_scans(child))
+    return found
+
+
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
+async def seeded_session():
+    try:
+        conn = await engine.connect()
+    except Exception as exc:
+        pytest.skip(f"database unavailable: {exc}")
+    trans = await conn.begin()
+    session = AsyncSession(bind=conn)
+    await session.execute(text(SEED_SQL), {
+        "properties": SEED_PROPERTIES,
+        "reservations": SEED_RESERVATIONS,
+    })
+    await session.execute(text(SEED_CALENDAR_SQL))
+    await session.execute(text("ANALYZE properties"))
+    await session.execute(text("ANALYZE reservations"))
+    await session.execute(text("ANALYZE property_calendar"))
+    property_id = (await session.execute(text(
+        "SELECT min(property_id) FROM properties WHERE title LIKE 'Seed %'"
+    ))).scalar()
+    yield ExplainSession(session), property_id
+    await session.close()
+    await trans.rollback()
+    await conn.close()
+
+
+async def assert_no_seq_scan(explain, call, table="reservations"):
+    await call
+    plan = explain.plans[-1][0]["Plan"]
+    assert table not in seq_scans(plan), plan
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_check_overlap_uses_index(seeded_session):
+    explain, property_id = seeded_session
+    await assert_no_seq_scan(
+        explain,
+        reservations_repo.check_overlap(
+            explain, property_id, date(2021, 3, 1), date(2021, 3, 5)))
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_reservation_by_property_uses_index(seeded_session):
+    explain, property_id = seeded_session
+    await assert_no_seq_scan(
+        explain,
+        reservations_repo.get_reservation_by_property(explain, property_id))
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_reservation_by_email_uses_index(seeded_session):
+    explain, _ = seeded_session
+    await assert_no_seq_scan(
+        explain,
+        reservations_repo.get_reservation_by_email(
+            explain, "seed42@example.com"))
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_available_properties_uses_index(seeded_session):
+    explain, _ = seeded_session
+    await assert_no_seq_scan(
+        explain,
+        properties_repo.get_available_properties(
+            explain, date(2021, 3, 1), date(2021, 3, 5)),
+        table="property_calendar")
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_booked_nights_uses_index(seeded_session):
+    explain, property_id = seeded_session
+    await assert_no_seq_scan(
+        explain,
+        properties_repo.get_booked_nights(
+            explain, property_id, date(2021, 1, 1), date(2021, 12, 31)),
+        table="property_calendar")
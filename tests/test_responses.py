@@ -0,0 +1,124 @@
+import json
+from collections import namedtuple
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.properties import schemas as property_schemas
+from app.reservations import schemas as reservation_schemas
+from app.responses import json_response, parse_fields, row_dicts
+
+PROPERTY = {
+    "title": "Casa do Criolo",
+    "address_street": "Rua Grajaú",
+    "address_number": "7",
+    "address_neighborhood": "Grajaú",
+    "address_city": "Cidade Serialização",
+    "address_state": "SP",
+    "country": "BRA",
+    "rooms": 3,
+    "capacity": 5,
+    "price_per_night": 199.90
+}
+
+
+def test_row_dicts_adds_constants():
+    Row = namedtuple("Row", ("a", "b"))
+    assert row_dicts([Row(1, "x"), Row(2, "y")], extra=[]) == [
+        {"a": 1, "b": "x", "extra": []}, {"a": 2, "b": "y", "extra": []}]
+    assert row_dicts([]) == []
+
+
+def test_row_json_matches_response_model():
+    row = {"client_name": "Criolo", "client_email": "criolo@rap.com",
+           "start_date": date(2030, 1, 1), "end_date": date(2030, 1, 3),
+           "guests_quantity": 2, "property_id": 7, "reservation_id": 1,
+           "total_value": Decimal("399.80")}
+    body = json_response(reservation_schemas.reservation_rows, [row]).body
+    expected = reservation_schemas.ReservationResponse(**row).model_dump(
+        mode="json")
+    assert json.loads(body) == [expected]
+
+
+@pytest.mark.asyncio
+async def test_list_endpoints_keep_response_format(client):
+    response = await client.post("/properties/", json=PROPERTY)
+    property_id = response.json()["property_id"]
+    await client.post("/reservations/", json={
+        "property_id": property_id, "client_name": "Criolo",
+        "client_email": "criolo@rap.com", "start_date": "2030-01-01",
+        "end_date": "2030-01-03", "guests_quantity": 2})
+
+    response = await client.get("/properties/", params={
+        "city": PROPERTY["address_city"]})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    page = response.json()
+    assert page == {"items": [property_schemas.PropertyResponse(
+        property_id=property_id, **PROPERTY).model_dump(mode="json")],
+        "next_cursor": None}
+
+    response = await client.get("/reservations/", params={
+        "property_id": property_id})
+    assert response.status_code == 200
+    [item] = response.json()
+    assert item["total_value"] == 399.8
+    assert item["start_date"] == "2030-01-01"
+    assert set(item) == set(reservation_schemas.ReservationResponse
+                            .model_fields)
+
+
+def test_parse_fields():
+    allowed = ("a", "b", "c")
+    assert parse_fields(None, allowed) is None
+    assert parse_fields(" , ", allowed) is None
+    assert parse_fields("c, a,a", allowed) == ("a", "c")
+    with pytest.raises(ValueError, match="Unknown fields: x"):
+        parse_fields("a,x", allowed)
+
+
+def test_row_dicts_projects_fields():
+    Row = namedtuple("Row", ("a", "b", "sort_key"))
+    assert row_dicts([Row(1, "x", 9)], ("b",), extra=[]) == [{"b": "x"}]
+    assert row_dicts([Row(1, "x", 9)], ("a", "extra"), extra=[]) == [
+        {"a": 1, "extra": []}]
+
+
+@pytest.mark.asyncio
+async def test_list_endpoints_project_fields(client):
+    response = await client.post("/properties/", json=PROPERTY)
+    property_id = response.json()["property_id"]
+    await client.post("/reservations/", json={
+        "property_id": property_id, "client_name": "Criolo",
+        "client_email": "criolo@rap.com", "start_date": "2030-01-01",
+        "end_date": "2030-01-03", "guests_quantity": 2})
+    fields = "title,address_city,price_per_night"
+
+    response = await client.get("/properties/", params={
+        "city": PROPERTY["address_city"], "fields": fields})
+    assert response.json()["items"] == [{
+        "title": PROPERTY["title"], "address_city": PROPERTY["address_city"],
+        "price_per_night": PROPERTY["price_per_night"]}]
+    all_fields = await client.get("/properties/", params={
+        "city": PROPERTY["address_city"]})
+    assert response.headers["etag"] != all_fields.headers["etag"]
+
+    # A chave de ordenação é lida para o cursor, mesmo fora de fields
+    response = await client.get("/properties/availability", params={
+        "start_date": "2030-02-01", "end_date": "2030-02-03",
+        "city": PROPERTY["address_city"], "sort": "price_per_night",
+        "limit": 1, "fields": "property_id,reservation"})
+    page = response.json()
+    assert page["items"] == [{"property_id": property_id, "reservation": []}]
+    assert "s-maxage" in response.headers["cache-control"]
+
+    response = await client.get("/reservations/", params={
+        "property_id": property_id, "fields": "reservation_id,total_value"})
+    [item] = response.json()
+    assert set(item) == {"reservation_id", "total_value"}
+
+    for url in ("/properties/", "/reservations/"):
+        response = await client.get(url, params={"fields": "title,secret"})
+        assert response.status_code == 400
+        assert "secret" in response.json()["detail"]